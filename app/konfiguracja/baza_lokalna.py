@@ -0,0 +1,793 @@
+"""Lokalny zamiennik asynchronicznego klienta Firestore (pamięć lub SQLite).
+
+Klient odwzorowuje tę część API firestore_async, z której korzystają
+repozytoria: kolekcje i dokumenty, zapytania where/order_by/limit/
+start_after/select, get_all, paczki zapisów oraz transakcje zgodne
+z dekoratorem firestore.async_transactional. Wartości specjalne
+(SERVER_TIMESTAMP, DELETE_FIELD, ArrayUnion, ArrayRemove, Increment,
+Maximum, Minimum) są interpretowane tak jak przez serwer Firestore.
+
+Wszystkie zapisy jednej paczki lub transakcji dostają ten sam czas
+zatwierdzenia i są stosowane atomowo. Transakcja przy zatwierdzeniu
+sprawdza, czy odczytane dokumenty nie zmieniły się w międzyczasie,
+i w przeciwnym razie zgłasza Aborted, co wywołuje jej ponowienie.
+"""
+
+import copy
+import datetime
+import pickle
+import random
+import sqlite3
+import string
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from google.api_core import exceptions
+from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+from google.cloud.firestore_v1 import transforms
+from google.cloud.firestore_v1.field_path import FieldPath
+
+MAKS_ZAPISOW_PACZKI = 500
+DOMYSLNA_LICZBA_PROB = 5
+
+_ID_DOKUMENTU = '__name__'
+_ZNAKI_ID = string.ascii_letters + string.digits
+_losowosc = random.SystemRandom()
+
+
+class ZapisanyDokument(NamedTuple):
+    """Stan dokumentu w magazynie: dane oraz czasy utworzenia i zmiany (ns)."""
+    dane: Dict[str, Any]
+    utworzono: int
+    zmieniono: int
+
+
+class WynikZapisu(NamedTuple):
+    """Odpowiednik WriteResult zwracany przez zapisy."""
+    update_time: DatetimeWithNanoseconds
+
+
+def _czas_z_ns(ns: int) -> DatetimeWithNanoseconds:
+    sekundy, nanosekundy = divmod(ns, 10 ** 9)
+    czas = datetime.datetime.fromtimestamp(sekundy, tz=datetime.timezone.utc)
+    return DatetimeWithNanoseconds(
+        czas.year, czas.month, czas.day, czas.hour, czas.minute, czas.second,
+        nanosecond=nanosekundy, tzinfo=datetime.timezone.utc
+    )
+
+
+def _czas_pola(ns: int) -> DatetimeWithNanoseconds:
+    """Znacznik czasu zapisywany w polu dokumentu (Firestore przechowuje mikrosekundy)."""
+    return _czas_z_ns(ns - ns % 1000)
+
+
+def _czesci_sciezki(pole: Any) -> Tuple[str, ...]:
+    if isinstance(pole, FieldPath):
+        return pole.parts
+    return FieldPath.from_string(pole).parts
+
+
+# --- Magazyny -----------------------------------------------------------------
+
+
+class MagazynPamieci:
+    """Przechowuje dokumenty w słownikach procesu; dane znikają po jego zakończeniu."""
+
+    def __init__(self):
+        self._kolekcje: Dict[str, Dict[str, ZapisanyDokument]] = {}
+
+    def odczytaj(self, kolekcja: str, doc_id: str) -> Optional[ZapisanyDokument]:
+        """Zwraca stan dokumentu lub None, gdy dokument nie istnieje."""
+        return self._kolekcje.get(kolekcja, {}).get(doc_id)
+
+    def dokumenty(self, kolekcja: str) -> List[Tuple[str, ZapisanyDokument]]:
+        """Zwraca wszystkie dokumenty kolekcji."""
+        return list(self._kolekcje.get(kolekcja, {}).items())
+
+    def zastosuj(self, zmiany: Dict[Tuple[str, str], Optional[ZapisanyDokument]]) -> None:
+        """Zapisuje (lub usuwa, gdy stan to None) wszystkie zmienione dokumenty."""
+        for (kolekcja, doc_id), stan in zmiany.items():
+            if stan is None:
+                self._kolekcje.get(kolekcja, {}).pop(doc_id, None)
+            else:
+                self._kolekcje.setdefault(kolekcja, {})[doc_id] = stan
+
+
+class MagazynSQLite:
+    """Przechowuje dokumenty w pliku SQLite; zmiany jednej paczki są jedną transakcją."""
+
+    def __init__(self, sciezka: str):
+        self.sciezka = sciezka
+        self._polaczenie = sqlite3.connect(sciezka, check_same_thread=False, isolation_level=None)
+        self._polaczenie.execute('PRAGMA journal_mode=WAL')
+        self._polaczenie.execute('PRAGMA synchronous=NORMAL')
+        self._polaczenie.execute(
+            'CREATE TABLE IF NOT EXISTS dokumenty ('
+            ' kolekcja TEXT NOT NULL, id TEXT NOT NULL, dane BLOB NOT NULL,'
+            ' utworzono INTEGER NOT NULL, zmieniono INTEGER NOT NULL,'
+            ' PRIMARY KEY (kolekcja, id)) WITHOUT ROWID'
+        )
+
+    def odczytaj(self, kolekcja: str, doc_id: str) -> Optional[ZapisanyDokument]:
+        """Zwraca stan dokumentu lub None, gdy dokument nie istnieje."""
+        wiersz = self._polaczenie.execute(
+            'SELECT dane, utworzono, zmieniono FROM dokumenty WHERE kolekcja = ? AND id = ?',
+            (kolekcja, doc_id)
+        ).fetchone()
+        if wiersz is None:
+            return None
+        return ZapisanyDokument(pickle.loads(wiersz[0]), wiersz[1], wiersz[2])
+
+    def dokumenty(self, kolekcja: str) -> List[Tuple[str, ZapisanyDokument]]:
+        """Zwraca wszystkie dokumenty kolekcji."""
+        wiersze = self._polaczenie.execute(
+            'SELECT id, dane, utworzono, zmieniono FROM dokumenty WHERE kolekcja = ?',
+            (kolekcja,)
+        )
+        return [
+            (doc_id, ZapisanyDokument(pickle.loads(dane), utworzono, zmieniono))
+            for doc_id, dane, utworzono, zmieniono in wiersze
+        ]
+
+    def zastosuj(self, zmiany: Dict[Tuple[str, str], Optional[ZapisanyDokument]]) -> None:
+        """Zapisuje (lub usuwa, gdy stan to None) wszystkie zmienione dokumenty."""
+        with self._polaczenie:
+            self._polaczenie.execute('BEGIN')
+            for (kolekcja, doc_id), stan in zmiany.items():
+                if stan is None:
+                    self._polaczenie.execute(
+                        'DELETE FROM dokumenty WHERE kolekcja = ? AND id = ?', (kolekcja, doc_id)
+                    )
+                else:
+                    self._polaczenie.execute(
+                        'INSERT OR REPLACE INTO dokumenty VALUES (?, ?, ?, ?, ?)',
+                        (kolekcja, doc_id, pickle.dumps(stan.dane, pickle.HIGHEST_PROTOCOL),
+                         stan.utworzono, stan.zmieniono)
+                    )
+
+    def zamknij(self) -> None:
+        """Zamyka połączenie z plikiem bazy."""
+        self._polaczenie.close()
+
+
+# --- Zapisy i wartości specjalne ----------------------------------------------
+
+
+def _wartosc_liczbowa(wartosc: Any) -> bool:
+    return isinstance(wartosc, (int, float)) and not isinstance(wartosc, bool)
+
+
+def _przeksztalc(wartosc: Any, stara: Any, czas_ns: int) -> Any:
+    """Wylicza wartość pola po zapisie, rozwijając wartości specjalne Firestore."""
+    if wartosc is transforms.SERVER_TIMESTAMP:
+        return _czas_pola(czas_ns)
+    if wartosc is transforms.DELETE_FIELD:
+        raise ValueError("DELETE_FIELD jest dozwolone tylko w update() lub set(merge=True)")
+    if isinstance(wartosc, transforms.ArrayUnion):
+        wynik = list(stara) if isinstance(stara, list) else []
+        for element in wartosc.values:
+            if element not in wynik:
+                wynik.append(element)
+        return wynik
+    if isinstance(wartosc, transforms.ArrayRemove):
+        if not isinstance(stara, list):
+            return []
+        return [element for element in stara if element not in wartosc.values]
+    if isinstance(wartosc, transforms.Increment):
+        return stara + wartosc.value if _wartosc_liczbowa(stara) else wartosc.value
+    if isinstance(wartosc, transforms.Maximum):
+        return max(stara, wartosc.value) if _wartosc_liczbowa(stara) else wartosc.value
+    if isinstance(wartosc, transforms.Minimum):
+        return min(stara, wartosc.value) if _wartosc_liczbowa(stara) else wartosc.value
+    if isinstance(wartosc, dict):
+        return {klucz: _przeksztalc(element, None, czas_ns) for klucz, element in wartosc.items()}
+    if isinstance(wartosc, (list, tuple)):
+        return [_przeksztalc(element, None, czas_ns) for element in wartosc]
+    if isinstance(wartosc, datetime.datetime) and not isinstance(wartosc, DatetimeWithNanoseconds):
+        czas = wartosc if wartosc.tzinfo else wartosc.replace(tzinfo=datetime.timezone.utc)
+        czas = czas.astimezone(datetime.timezone.utc)
+        return DatetimeWithNanoseconds(
+            czas.year, czas.month, czas.day, czas.hour, czas.minute, czas.second,
+            czas.microsecond, tzinfo=datetime.timezone.utc
+        )
+    if isinstance(wartosc, ReferencjaDokumentuLokalna):
+        return wartosc
+    return copy.deepcopy(wartosc)
+
+
+def _zapisz_pole(dane: Dict[str, Any], czesci: Sequence[str], wartosc: Any, czas_ns: int) -> None:
+    wezel = dane
+    for czesc in czesci[:-1]:
+        if not isinstance(wezel.get(czesc), dict):
+            if wartosc is transforms.DELETE_FIELD:
+                return
+            wezel[czesc] = {}
+        wezel = wezel[czesc]
+    if wartosc is transforms.DELETE_FIELD:
+        wezel.pop(czesci[-1], None)
+    else:
+        wezel[czesci[-1]] = _przeksztalc(wartosc, wezel.get(czesci[-1]), czas_ns)
+
+
+def _scal(
+    dane: Dict[str, Any],
+    zmiany: Dict[str, Any],
+    przedrostek: Tuple[str, ...],
+    czas_ns: int
+) -> None:
+    for klucz, wartosc in zmiany.items():
+        czesci = przedrostek + (klucz,)
+        if isinstance(wartosc, dict) and wartosc:
+            _scal(dane, wartosc, czesci, czas_ns)
+        else:
+            _zapisz_pole(dane, czesci, wartosc, czas_ns)
+
+
+class _Operacja(NamedTuple):
+    rodzaj: str
+    referencja: 'ReferencjaDokumentuLokalna'
+    dane: Optional[Dict[str, Any]] = None
+    scal: bool = False
+
+
+def _wykonaj_operacje(
+    stan: Optional[ZapisanyDokument],
+    operacja: _Operacja,
+    czas_ns: int
+) -> Optional[ZapisanyDokument]:
+    """Zwraca stan dokumentu po jednej operacji zapisu."""
+    if operacja.rodzaj == 'delete':
+        return None
+    if operacja.rodzaj == 'create' and stan is not None:
+        raise exceptions.AlreadyExists(f"Dokument {operacja.referencja.path} już istnieje")
+    if operacja.rodzaj == 'update' and stan is None:
+        raise exceptions.NotFound(f"Brak dokumentu do aktualizacji: {operacja.referencja.path}")
+
+    if operacja.rodzaj == 'update':
+        dane = copy.deepcopy(stan.dane)
+        for pole, wartosc in operacja.dane.items():
+            _zapisz_pole(dane, _czesci_sciezki(pole), wartosc, czas_ns)
+    elif operacja.scal and stan is not None:
+        dane = copy.deepcopy(stan.dane)
+        _scal(dane, operacja.dane, (), czas_ns)
+    elif operacja.scal:
+        dane = {}
+        _scal(dane, operacja.dane, (), czas_ns)
+    else:
+        dane = _przeksztalc(operacja.dane, None, czas_ns)
+
+    utworzono = stan.utworzono if stan is not None else czas_ns
+    return ZapisanyDokument(dane, utworzono, czas_ns)
+
+
+# --- Odczyty i zapytania ------------------------------------------------------
+
+
+_BRAK = object()
+
+
+def _wartosc_pola(doc_id: str, dane: Dict[str, Any], czesci: Tuple[str, ...]) -> Any:
+    if czesci == (_ID_DOKUMENTU,):
+        return doc_id
+    wezel: Any = dane
+    for czesc in czesci:
+        if not isinstance(wezel, dict) or czesc not in wezel:
+            return _BRAK
+        wezel = wezel[czesc]
+    return wezel
+
+
+def _ranga(wartosc: Any) -> int:
+    """Kolejność typów w indeksach Firestore."""
+    if wartosc is None:
+        return 0
+    if isinstance(wartosc, bool):
+        return 1
+    if _wartosc_liczbowa(wartosc):
+        return 2
+    if isinstance(wartosc, datetime.datetime):
+        return 3
+    if isinstance(wartosc, str):
+        return 4
+    if isinstance(wartosc, bytes):
+        return 5
+    if isinstance(wartosc, ReferencjaDokumentuLokalna):
+        return 6
+    if isinstance(wartosc, list):
+        return 8
+    return 9
+
+
+def _klucz_wartosci(wartosc: Any) -> Tuple[int, Any]:
+    ranga = _ranga(wartosc)
+    if ranga == 0:
+        return (0, 0)
+    if ranga == 6:
+        return (6, wartosc.path)
+    if ranga == 8:
+        return (8, tuple(_klucz_wartosci(element) for element in wartosc))
+    if ranga == 9:
+        return (9, tuple(sorted(
+            (klucz, _klucz_wartosci(element)) for klucz, element in wartosc.items()
+        )))
+    return (ranga, wartosc)
+
+
+def _jako_id(wartosc: Any) -> Any:
+    if isinstance(wartosc, ReferencjaDokumentuLokalna):
+        return wartosc.id
+    return wartosc
+
+
+def _spelnia(wartosc: Any, operator: str, oczekiwana: Any) -> bool:
+    if wartosc is _BRAK:
+        return False
+    if operator == '==':
+        return wartosc == oczekiwana and _ranga(wartosc) == _ranga(oczekiwana)
+    if operator == '!=':
+        return wartosc is not None and not _spelnia(wartosc, '==', oczekiwana)
+    if operator == 'in':
+        return any(_spelnia(wartosc, '==', element) for element in oczekiwana)
+    if operator == 'not-in':
+        return wartosc is not None and not _spelnia(wartosc, 'in', oczekiwana)
+    if operator == 'array_contains':
+        return isinstance(wartosc, list) and any(_spelnia(e, '==', oczekiwana) for e in wartosc)
+    if operator == 'array_contains_any':
+        return isinstance(wartosc, list) and any(
+            _spelnia(wartosc, 'array_contains', e) for e in oczekiwana
+        )
+    if _ranga(wartosc) != _ranga(oczekiwana):
+        return False
+    lewy, prawy = _klucz_wartosci(wartosc), _klucz_wartosci(oczekiwana)
+    if operator == '<':
+        return lewy < prawy
+    if operator == '<=':
+        return lewy <= prawy
+    if operator == '>':
+        return lewy > prawy
+    if operator == '>=':
+        return lewy >= prawy
+    raise ValueError(f"Nieobsługiwany operator zapytania: {operator}")
+
+
+def _projekcja(dane: Dict[str, Any], pola: Optional[Sequence[Any]]) -> Dict[str, Any]:
+    if pola is None:
+        return dane
+    wynik: Dict[str, Any] = {}
+    for pole in pola:
+        czesci = _czesci_sciezki(pole)
+        wartosc = _wartosc_pola('', dane, czesci)
+        if wartosc is not _BRAK:
+            _zapisz_pole(wynik, czesci, wartosc, 0)
+    return wynik
+
+
+class SnapshotDokumentuLokalny:
+    """Odpowiednik DocumentSnapshot."""
+
+    def __init__(self, referencja: 'ReferencjaDokumentuLokalna', stan: Optional[ZapisanyDokument],
+                 pola: Optional[Sequence[Any]] = None, czas_odczytu: Optional[int] = None):
+        self.reference = referencja
+        self.id = referencja.id
+        self.exists = stan is not None
+        self._zmieniono = stan.zmieniono if stan is not None else None
+        self._dane = _projekcja(stan.dane, pola) if stan is not None else None
+        self.create_time = _czas_z_ns(stan.utworzono) if stan is not None else None
+        self.update_time = _czas_z_ns(stan.zmieniono) if stan is not None else None
+        self.read_time = _czas_z_ns(czas_odczytu or time.time_ns())
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        """Zwraca kopię danych dokumentu lub None, gdy dokument nie istnieje."""
+        if not self.exists:
+            return None
+        return copy.deepcopy(self._dane)
+
+    def get(self, pole: str) -> Any:
+        """Zwraca wartość pola (również zagnieżdżonego) lub zgłasza KeyError."""
+        wartosc = _wartosc_pola(self.id, self._dane or {}, _czesci_sciezki(pole))
+        if wartosc is _BRAK:
+            raise KeyError(pole)
+        return copy.deepcopy(wartosc)
+
+
+class ZapytanieLokalne:
+    """Odpowiednik AsyncQuery; każda metoda zwraca nowe zapytanie."""
+
+    def __init__(self, klient: 'KlientLokalny', sciezka_kolekcji: str):
+        self._klient = klient
+        self._sciezka_kolekcji = sciezka_kolekcji
+        self._filtry: Tuple[Tuple[Tuple[str, ...], str, Any], ...] = ()
+        self._porzadek: Tuple[Tuple[Tuple[str, ...], bool], ...] = ()
+        self._pola: Optional[Tuple[Any, ...]] = None
+        self._limit: Optional[int] = None
+        self._przesuniecie = 0
+        self._po: Optional[Tuple[Any, ...]] = None
+        self._od: Optional[Tuple[Any, ...]] = None
+
+    def _kopia(self, **zmiany) -> 'ZapytanieLokalne':
+        nowe = copy.copy(self)
+        nowe.__class__ = ZapytanieLokalne
+        for nazwa, wartosc in zmiany.items():
+            setattr(nowe, nazwa, wartosc)
+        return nowe
+
+    def where(self, field_path: Optional[str] = None, op_string: Optional[str] = None,
+              value: Any = None, *, filter: Any = None) -> 'ZapytanieLokalne':
+        """Dodaje filtr pola (również w postaci FieldFilter)."""
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        czesci = _czesci_sciezki(field_path)
+        if czesci == (_ID_DOKUMENTU,):
+            if op_string in ('in', 'not-in'):
+                value = [_jako_id(v) for v in value]
+            else:
+                value = _jako_id(value)
+        return self._kopia(_filtry=self._filtry + ((czesci, op_string, value),))
+
+    def order_by(self, field_path: Any, direction: str = 'ASCENDING') -> 'ZapytanieLokalne':
+        """Dodaje pole sortowania; dokumenty bez tego pola są pomijane."""
+        malejaco = direction == 'DESCENDING'
+        return self._kopia(_porzadek=self._porzadek + ((_czesci_sciezki(field_path), malejaco),))
+
+    def select(self, field_paths: Iterable[Any]) -> 'ZapytanieLokalne':
+        """Ogranicza zwracane dane do wskazanych pól."""
+        return self._kopia(_pola=tuple(field_paths))
+
+    def limit(self, count: int) -> 'ZapytanieLokalne':
+        """Ogranicza liczbę zwracanych dokumentów."""
+        return self._kopia(_limit=count)
+
+    def offset(self, num_to_skip: int) -> 'ZapytanieLokalne':
+        """Pomija początkowe dokumenty wyniku."""
+        return self._kopia(_przesuniecie=num_to_skip)
+
+    def _kursor(self, dokument: Any) -> Tuple[Any, ...]:
+        if isinstance(dokument, SnapshotDokumentuLokalny):
+            return tuple(
+                _wartosc_pola(dokument.id, dokument._dane or {}, czesci)
+                for czesci, _ in self._porzadek_pelny()
+            )
+        if isinstance(dokument, dict):
+            wartosci = {_czesci_sciezki(pole): _jako_id(w) for pole, w in dokument.items()}
+            return tuple(wartosci[czesci] for czesci, _ in self._porzadek if czesci in wartosci)
+        return tuple(dokument)
+
+    def start_after(self, document_fields_or_snapshot: Any) -> 'ZapytanieLokalne':
+        """Zaczyna wynik po dokumencie o podanych wartościach pól sortowania."""
+        return self._kopia(_po=self._kursor(document_fields_or_snapshot), _od=None)
+
+    def start_at(self, document_fields_or_snapshot: Any) -> 'ZapytanieLokalne':
+        """Zaczyna wynik od dokumentu o podanych wartościach pól sortowania."""
+        return self._kopia(_od=self._kursor(document_fields_or_snapshot), _po=None)
+
+    def _porzadek_pelny(self) -> Tuple[Tuple[Tuple[str, ...], bool], ...]:
+        if any(czesci == (_ID_DOKUMENTU,) for czesci, _ in self._porzadek):
+            return self._porzadek
+        malejaco = self._porzadek[-1][1] if self._porzadek else False
+        return self._porzadek + (((_ID_DOKUMENTU,), malejaco),)
+
+    def _wykonaj(self) -> List[SnapshotDokumentuLokalny]:
+        porzadek = self._porzadek_pelny()
+        czas_odczytu = time.time_ns()
+        wiersze = []
+        for doc_id, stan in self._klient._dokumenty(self._sciezka_kolekcji):
+            if not all(_spelnia(_wartosc_pola(doc_id, stan.dane, czesci), op, wartosc)
+                       for czesci, op, wartosc in self._filtry):
+                continue
+            wartosci = tuple(_wartosc_pola(doc_id, stan.dane, czesci) for czesci, _ in porzadek)
+            if any(wartosc is _BRAK for wartosc in wartosci):
+                continue
+            wiersze.append((wartosci, doc_id, stan))
+
+        for pozycja in reversed(range(len(porzadek))):
+            wiersze.sort(key=lambda w: _klucz_wartosci(w[0][pozycja]), reverse=porzadek[pozycja][1])
+
+        kursor = self._po if self._po is not None else self._od
+        if kursor is not None:
+            po_kursorze = self._po is not None
+            wiersze = [w for w in wiersze if self._za_kursorem(w[0], kursor, porzadek, po_kursorze)]
+
+        wiersze = wiersze[self._przesuniecie:]
+        if self._limit is not None:
+            wiersze = wiersze[:self._limit]
+        kolekcja = self._klient.collection(self._sciezka_kolekcji)
+        return [
+            SnapshotDokumentuLokalny(kolekcja.document(doc_id), stan, self._pola, czas_odczytu)
+            for _, doc_id, stan in wiersze
+        ]
+
+    @staticmethod
+    def _za_kursorem(wartosci, kursor, porzadek, wylacznie: bool) -> bool:
+        for wartosc, granica, (_, malejaco) in zip(wartosci, kursor, porzadek):
+            lewy, prawy = _klucz_wartosci(wartosc), _klucz_wartosci(granica)
+            if lewy != prawy:
+                return (lewy < prawy) if malejaco else (lewy > prawy)
+        return not wylacznie
+
+    async def stream(self, transaction: Any = None) -> AsyncIterator[SnapshotDokumentuLokalny]:
+        """Zwraca dokumenty spełniające zapytanie."""
+        with self._klient._blokada:
+            wynik = self._wykonaj()
+        for snapshot in wynik:
+            if transaction is not None:
+                transaction._zapamietaj_odczyt(snapshot)
+            yield snapshot
+
+    async def get(self, transaction: Any = None) -> List[SnapshotDokumentuLokalny]:
+        """Zwraca listę dokumentów spełniających zapytanie."""
+        return [snapshot async for snapshot in self.stream(transaction=transaction)]
+
+
+class KolekcjaLokalna(ZapytanieLokalne):
+    """Odpowiednik AsyncCollectionReference."""
+
+    def __init__(self, klient: 'KlientLokalny', sciezka: str):
+        super().__init__(klient, sciezka)
+        self.id = sciezka.split('/')[-1]
+        self._sciezka = sciezka
+
+    def document(self, document_id: Optional[str] = None) -> 'ReferencjaDokumentuLokalna':
+        """Zwraca referencję dokumentu; bez ID generuje losowy, jak Firestore."""
+        if document_id is None:
+            document_id = ''.join(_losowosc.choice(_ZNAKI_ID) for _ in range(20))
+        return ReferencjaDokumentuLokalna(self._klient, f"{self._sciezka}/{document_id}")
+
+    async def add(self, document_data: Dict[str, Any], document_id: Optional[str] = None):
+        """Tworzy dokument o losowym (lub podanym) ID."""
+        referencja = self.document(document_id)
+        wynik = await referencja.create(document_data)
+        return wynik.update_time, referencja
+
+
+class ReferencjaDokumentuLokalna:
+    """Odpowiednik AsyncDocumentReference."""
+
+    def __init__(self, klient: 'KlientLokalny', sciezka: str):
+        self._klient = klient
+        self.path = sciezka
+        self._kolekcja, _, self.id = sciezka.rpartition('/')
+
+    def __eq__(self, inny: Any) -> bool:
+        return isinstance(inny, ReferencjaDokumentuLokalna) and inny.path == self.path
+
+    def __hash__(self) -> int:
+        return hash(self.path)
+
+    def __repr__(self) -> str:
+        return f"ReferencjaDokumentuLokalna({self.path!r})"
+
+    def __deepcopy__(self, memo) -> 'ReferencjaDokumentuLokalna':
+        return self
+
+    @property
+    def parent(self) -> KolekcjaLokalna:
+        return self._klient.collection(self._kolekcja)
+
+    def collection(self, collection_id: str) -> KolekcjaLokalna:
+        """Zwraca podkolekcję dokumentu."""
+        return self._klient.collection(f"{self.path}/{collection_id}")
+
+    async def get(
+        self,
+        field_paths: Optional[Iterable[Any]] = None,
+        transaction: Any = None
+    ) -> SnapshotDokumentuLokalny:
+        """Odczytuje dokument (opcjonalnie tylko wskazane pola)."""
+        snapshot = self._klient._odczytaj(self, field_paths)
+        if transaction is not None:
+            transaction._zapamietaj_odczyt(snapshot)
+        return snapshot
+
+    async def create(self, document_data: Dict[str, Any]) -> WynikZapisu:
+        """Tworzy dokument; zgłasza AlreadyExists, gdy już istnieje."""
+        return (await self._klient._zatwierdz([_Operacja('create', self, document_data)]))[0]
+
+    async def set(self, document_data: Dict[str, Any], merge: bool = False) -> WynikZapisu:
+        """Zapisuje dokument w całości lub scala go z istniejącym (merge=True)."""
+        return (await self._klient._zatwierdz([_Operacja('set', self, document_data, merge)]))[0]
+
+    async def update(self, field_updates: Dict[str, Any]) -> WynikZapisu:
+        """Zmienia wskazane pola; zgłasza NotFound, gdy dokument nie istnieje."""
+        return (await self._klient._zatwierdz([_Operacja('update', self, field_updates)]))[0]
+
+    async def delete(self) -> DatetimeWithNanoseconds:
+        """Usuwa dokument (brak dokumentu nie jest błędem)."""
+        return (await self._klient._zatwierdz([_Operacja('delete', self)]))[0].update_time
+
+
+# --- Paczki i transakcje ------------------------------------------------------
+
+
+class PaczkaLokalna:
+    """Odpowiednik AsyncWriteBatch; zapisy są stosowane atomowo przy commit()."""
+
+    def __init__(self, klient: 'KlientLokalny'):
+        self._klient = klient
+        self._operacje: List[_Operacja] = []
+
+    def __len__(self) -> int:
+        return len(self._operacje)
+
+    def _dodaj(self, operacja: _Operacja) -> None:
+        if len(self._operacje) >= MAKS_ZAPISOW_PACZKI:
+            raise exceptions.InvalidArgument(
+                f"Paczka może zawierać najwyżej {MAKS_ZAPISOW_PACZKI} zapisów"
+            )
+        self._operacje.append(operacja)
+
+    def create(self, reference: ReferencjaDokumentuLokalna, document_data: Dict[str, Any]) -> None:
+        """Dodaje utworzenie dokumentu."""
+        self._dodaj(_Operacja('create', reference, document_data))
+
+    def set(
+        self,
+        reference: ReferencjaDokumentuLokalna,
+        document_data: Dict[str, Any],
+        merge: bool = False
+    ) -> None:
+        """Dodaje zapis dokumentu."""
+        self._dodaj(_Operacja('set', reference, document_data, merge))
+
+    def update(self, reference: ReferencjaDokumentuLokalna, field_updates: Dict[str, Any]) -> None:
+        """Dodaje zmianę pól dokumentu."""
+        self._dodaj(_Operacja('update', reference, field_updates))
+
+    def delete(self, reference: ReferencjaDokumentuLokalna) -> None:
+        """Dodaje usunięcie dokumentu."""
+        self._dodaj(_Operacja('delete', reference))
+
+    async def commit(self) -> List[WynikZapisu]:
+        """Zatwierdza wszystkie zapisy paczki jednym czasem zatwierdzenia."""
+        operacje, self._operacje = self._operacje, []
+        return await self._klient._zatwierdz(operacje)
+
+
+class TransakcjaLokalna(PaczkaLokalna):
+    """Transakcja optymistyczna zgodna z firestore.async_transactional.
+
+    Zapamiętuje czas zmiany każdego odczytanego dokumentu i przy
+    zatwierdzeniu zgłasza Aborted, jeśli którykolwiek z nich się zmienił.
+    """
+
+    def __init__(
+        self,
+        klient: 'KlientLokalny',
+        max_attempts: int = DOMYSLNA_LICZBA_PROB,
+        read_only: bool = False
+    ):
+        super().__init__(klient)
+        self._max_attempts = max_attempts
+        self._read_only = read_only
+        self._id: Optional[bytes] = None
+        self._odczyty: Dict[str, Optional[int]] = {}
+
+    @property
+    def in_progress(self) -> bool:
+        return self._id is not None
+
+    def _zapamietaj_odczyt(self, snapshot: SnapshotDokumentuLokalny) -> None:
+        if self._operacje:
+            raise ValueError("Transakcja musi wykonać wszystkie odczyty przed zapisami")
+        self._odczyty.setdefault(snapshot.reference.path, snapshot._zmieniono)
+
+    def _dodaj(self, operacja: _Operacja) -> None:
+        if self._read_only:
+            raise ValueError("Transakcja tylko do odczytu nie może zapisywać")
+        super()._dodaj(operacja)
+
+    def _clean_up(self) -> None:
+        self._operacje = []
+        self._odczyty = {}
+        self._id = None
+
+    async def _begin(self, retry_id: Optional[bytes] = None) -> None:
+        if self.in_progress:
+            raise ValueError("Transakcja jest już rozpoczęta")
+        self._id = _losowosc.randbytes(16)
+
+    async def _rollback(self) -> None:
+        self._clean_up()
+
+    async def _commit(self) -> List[WynikZapisu]:
+        if not self.in_progress:
+            raise ValueError("Transakcja nie została rozpoczęta")
+        try:
+            return await self._klient._zatwierdz(self._operacje, self._odczyty)
+        finally:
+            self._clean_up()
+
+    async def get_all(self, references: Iterable[ReferencjaDokumentuLokalna], field_paths=None):
+        """Odczytuje wiele dokumentów w ramach transakcji."""
+        async for snapshot in self._klient.get_all(references, field_paths, transaction=self):
+            yield snapshot
+
+    async def get(self, ref_or_query: Any):
+        """Odczytuje dokument lub wynik zapytania w ramach transakcji."""
+        if isinstance(ref_or_query, ReferencjaDokumentuLokalna):
+            return self.get_all([ref_or_query])
+        return ref_or_query.stream(transaction=self)
+
+
+# --- Klient -------------------------------------------------------------------
+
+
+class KlientLokalny:
+    """Odpowiednik AsyncClient działający na magazynie w pamięci lub w SQLite."""
+
+    def __init__(self, magazyn: Any):
+        self._magazyn = magazyn
+        self._blokada = threading.RLock()
+        self._ostatni_czas = 0
+
+    def collection(self, collection_path: str) -> KolekcjaLokalna:
+        """Zwraca referencję kolekcji."""
+        return KolekcjaLokalna(self, collection_path)
+
+    def document(self, document_path: str) -> ReferencjaDokumentuLokalna:
+        """Zwraca referencję dokumentu o pełnej ścieżce 'kolekcja/id'."""
+        return ReferencjaDokumentuLokalna(self, document_path)
+
+    def batch(self) -> PaczkaLokalna:
+        """Tworzy paczkę zapisów."""
+        return PaczkaLokalna(self)
+
+    def transaction(
+        self,
+        max_attempts: int = DOMYSLNA_LICZBA_PROB,
+        read_only: bool = False
+    ) -> TransakcjaLokalna:
+        """Tworzy transakcję do użycia z firestore.async_transactional."""
+        return TransakcjaLokalna(self, max_attempts=max_attempts, read_only=read_only)
+
+    async def get_all(
+        self,
+        references: Iterable[ReferencjaDokumentuLokalna],
+        field_paths=None,
+        transaction: Any = None
+    ):
+        """Odczytuje wiele dokumentów jednym wywołaniem."""
+        for referencja in list(references):
+            yield await referencja.get(field_paths=field_paths, transaction=transaction)
+
+    def _odczytaj(self, referencja: ReferencjaDokumentuLokalna, pola) -> SnapshotDokumentuLokalny:
+        with self._blokada:
+            stan = self._magazyn.odczytaj(referencja._kolekcja, referencja.id)
+        return SnapshotDokumentuLokalny(referencja, stan, list(pola) if pola is not None else None)
+
+    def _dokumenty(self, sciezka_kolekcji: str) -> List[Tuple[str, ZapisanyDokument]]:
+        return self._magazyn.dokumenty(sciezka_kolekcji)
+
+    def _nastepny_czas(self) -> int:
+        self._ostatni_czas = max(time.time_ns(), self._ostatni_czas + 1)
+        return self._ostatni_czas
+
+    async def _zatwierdz(
+        self,
+        operacje: Sequence[_Operacja],
+        odczyty: Optional[Dict[str, Optional[int]]] = None
+    ) -> List[WynikZapisu]:
+        with self._blokada:
+            for sciezka, zmieniono in (odczyty or {}).items():
+                kolekcja, _, doc_id = sciezka.rpartition('/')
+                stan = self._magazyn.odczytaj(kolekcja, doc_id)
+                if (stan.zmieniono if stan else None) != zmieniono:
+                    raise exceptions.Aborted(f"Dokument {sciezka} zmienił się w trakcie transakcji")
+
+            czas_ns = self._nastepny_czas()
+            zmiany: Dict[Tuple[str, str], Optional[ZapisanyDokument]] = {}
+            for operacja in operacje:
+                klucz = (operacja.referencja._kolekcja, operacja.referencja.id)
+                stan = zmiany[klucz] if klucz in zmiany else self._magazyn.odczytaj(*klucz)
+                zmiany[klucz] = _wykonaj_operacje(stan, operacja, czas_ns)
+            self._magazyn.zastosuj(zmiany)
+        return [WynikZapisu(_czas_z_ns(czas_ns)) for _ in operacje]
+
+
+def utworz_klienta_lokalnego(rodzaj: str, sciezka_sqlite: Optional[str] = None) -> KlientLokalny:
+    """Tworzy klienta lokalnego: 'pamiec' albo 'sqlite' (zapis do pliku)."""
+    if rodzaj == 'pamiec':
+        return KlientLokalny(MagazynPamieci())
+    if rodzaj == 'sqlite':
+        return KlientLokalny(MagazynSQLite(sciezka_sqlite or 'baza_lokalna.sqlite3'))
+    raise ValueError(f"Nieznany backend bazy danych: {rodzaj}")
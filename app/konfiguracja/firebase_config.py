@@ -1,15 +1,33 @@
-"""Konfiguracja Firebase Admin SDK dla aplikacji FastAPI."""
+"""Konfiguracja Firebase Admin SDK dla aplikacji FastAPI.
+
+Zmienna środowiskowa BACKEND_BAZY wybiera magazyn dokumentów: 'firestore'
+(domyślnie), 'pamiec' albo 'sqlite' (plik wskazany przez SCIEZKA_BAZY_SQLITE).
+Backendy lokalne nie wymagają poświadczeń ani sieci. Każdy klient jest
+opakowany w KlientZPomiarem, który zlicza operacje na potrzeby metryk.
+"""
+
+import os
 
 import firebase_admin
-from firebase_admin import credentials, firestore, auth
+from firebase_admin import credentials, firestore_async, auth
+
+from app.konfiguracja.baza_lokalna import utworz_klienta_lokalnego
+from app.konfiguracja.operacje_firestore import KlientZPomiarem
+
+BACKEND_BAZY = os.environ.get('BACKEND_BAZY', 'firestore')
 
-try:
-    cred = credentials.Certificate(r"app\konfiguracja\serviceAccountKey.json")
-    firebase_admin.initialize_app(cred)
-except Exception as e:
-    print(f"Błąd podczas inicjalizacji Firebase Admin SDK: {e}")
-    raise e
+if BACKEND_BAZY == 'firestore':
+    try:
+        cred = credentials.Certificate(r"app\konfiguracja\serviceAccountKey.json")
+        firebase_admin.initialize_app(cred)
+    except Exception as e:
+        print(f"Błąd podczas inicjalizacji Firebase Admin SDK: {e}")
+        raise e
 
-db = firestore.client()
+    db = KlientZPomiarem(firestore_async.client())
+else:
+    db = KlientZPomiarem(
+        utworz_klienta_lokalnego(BACKEND_BAZY, os.environ.get('SCIEZKA_BAZY_SQLITE'))
+    )
 
 __all__ = ['auth', 'db']
@@ -0,0 +1,80 @@
+"""Łączenie odczytów pojedynczych dokumentów Firestore w paczki get_all.
+
+Odczyty zgłoszone przez dowolne korutyny w jednym obiegu pętli zdarzeń
+są zbierane, deduplikowane po ścieżce i wysyłane jednym wywołaniem get_all
+na początku następnego obiegu. Każda oczekująca korutyna dostaje snapshot
+swojego dokumentu. Deduplikacja obejmuje tylko paczkę jeszcze niewysłaną,
+więc odczyt zgłoszony po zapisie zawsze widzi ten zapis.
+
+Współbieżne zapytania dostają ten sam snapshot tej samej ścieżki, więc
+wynik ładowacza nie może być warunkiem zapisu (odczyt, a potem zapis
+zależny od odczytanej wartości). Takie odczyty muszą iść w transakcji,
+którą ładowacz zawsze omija, jak w RepozytoriumOcen.usun_ocene.
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+_Paczka = Dict[str, Tuple[Any, 'asyncio.Future']]
+
+
+class LadowaczDokumentow:
+    """Zbiera odczyty dokumentów z jednego obiegu pętli zdarzeń w jedno get_all."""
+
+    def __init__(self, klient: Any):
+        self._klient = klient
+        self._oczekujace: _Paczka = {}
+        self._petla: Optional[asyncio.AbstractEventLoop] = None
+        self._w_toku: Set['asyncio.Task'] = set()
+
+    async def pobierz(self, referencja: Any) -> Tuple[Any, bool]:
+        """Zwraca snapshot dokumentu i informację, czy ten odczyt trafił do paczki jako pierwszy.
+
+        Odczyty dołączone do już zgłoszonej ścieżki nie kosztują osobnego odczytu Firestore.
+        """
+        future, pierwszy = self._zglos(referencja)
+        return await asyncio.shield(future), pierwszy
+
+    async def pobierz_wiele(self, referencje: Sequence[Any]) -> List[Tuple[Any, bool]]:
+        """Zwraca snapshoty dokumentów w kolejności referencji, jak pobierz()."""
+        zgloszone = [self._zglos(referencja) for referencja in referencje]
+        snapshoty = await asyncio.shield(asyncio.gather(*(future for future, _ in zgloszone)))
+        return [(snapshot, pierwszy) for snapshot, (_, pierwszy) in zip(snapshoty, zgloszone)]
+
+    def _zglos(self, referencja: Any) -> Tuple['asyncio.Future', bool]:
+        petla = asyncio.get_running_loop()
+        if self._petla is not petla:
+            self._petla = petla
+            self._oczekujace = {}
+        wpis = self._oczekujace.get(referencja.path)
+        if wpis is not None:
+            return wpis[1], False
+        if not self._oczekujace:
+            petla.call_soon(self._wyslij)
+        future = petla.create_future()
+        self._oczekujace[referencja.path] = (referencja, future)
+        return future, True
+
+    def _wyslij(self) -> None:
+        paczka, self._oczekujace = self._oczekujace, {}
+        if not paczka:
+            return
+        zadanie = asyncio.ensure_future(self._pobierz_paczke(paczka))
+        self._w_toku.add(zadanie)
+        zadanie.add_done_callback(self._w_toku.discard)
+
+    async def _pobierz_paczke(self, paczka: _Paczka) -> None:
+        try:
+            referencje = [referencja for referencja, _ in paczka.values()]
+            async for snapshot in self._klient.get_all(referencje):
+                _, future = paczka[snapshot.reference.path]
+                if not future.done():
+                    future.set_result(snapshot)
+        except Exception as e:
+            for _, future in paczka.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for sciezka, (_, future) in paczka.items():
+            if not future.done():
+                future.set_exception(LookupError(f"get_all nie zwrócił dokumentu {sciezka}"))
@@ -0,0 +1,135 @@
+"""Mapa tożsamości dokumentów Firestore o zasięgu jednego zapytania HTTP.
+
+W obrębie zapytania każdy dokument jest odczytywany z Firestore i dekodowany
+(to_dict) co najwyżej raz; kolejne odczyty tej samej ścieżki dostają
+zapamiętany dokument. Zapis lub usunięcie dokumentu usuwa go z mapy,
+a odczyty w transakcjach i z projekcją pól zawsze idą do Firestore.
+"""
+
+import contextlib
+import copy
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+
+class ZapamietanyDokument:
+    """Snapshot dokumentu z danymi zdekodowanymi raz przy zapamiętaniu."""
+
+    __slots__ = ('reference', 'id', 'exists', 'create_time', 'update_time', 'read_time', '_dane')
+
+    def __init__(self, referencja: Any, dane: Optional[Dict[str, Any]], create_time: Any = None,
+                 update_time: Any = None, read_time: Any = None):
+        self.reference = referencja
+        self.id = referencja.id
+        self.exists = dane is not None
+        self.create_time = create_time
+        self.update_time = update_time
+        self.read_time = read_time
+        self._dane = dane
+
+    @classmethod
+    def ze_snapshotu(cls, snapshot: Any) -> 'ZapamietanyDokument':
+        """Dekoduje snapshot Firestore."""
+        return cls(
+            snapshot.reference,
+            snapshot.to_dict() if snapshot.exists else None,
+            snapshot.create_time,
+            snapshot.update_time,
+            snapshot.read_time
+        )
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        """Zwraca głęboką kopię danych, aby zmiany wywołującego nie trafiły do mapy."""
+        return copy.deepcopy(self._dane)
+
+    def get(self, pole: str) -> Any:
+        """Zwraca wartość pola (również zagnieżdżonego) lub zgłasza KeyError."""
+        wartosc: Any = self._dane or {}
+        for czesc in pole.split('.'):
+            if not isinstance(wartosc, dict) or czesc not in wartosc:
+                raise KeyError(pole)
+            wartosc = wartosc[czesc]
+        return copy.deepcopy(wartosc)
+
+
+class MapaTozsamosci:
+    """Dokumenty odczytane w bieżącym zapytaniu, według ścieżki."""
+
+    def __init__(self):
+        self._dokumenty: Dict[str, ZapamietanyDokument] = {}
+
+    def pobierz(self, sciezka: str) -> Optional[ZapamietanyDokument]:
+        """Zwraca zapamiętany dokument albo None, gdy trzeba go odczytać."""
+        return self._dokumenty.get(sciezka)
+
+    def zapamietaj(self, snapshot: Any) -> ZapamietanyDokument:
+        """Zapamiętuje odczytany snapshot i zwraca jego zdekodowaną postać."""
+        dokument = ZapamietanyDokument.ze_snapshotu(snapshot)
+        self._dokumenty[snapshot.reference.path] = dokument
+        return dokument
+
+    def zapamietaj_zapis(self, referencja: Any, dane: Dict[str, Any], update_time: Any) -> None:
+        """Zapamiętuje dokument o treści znanej po zapisie."""
+        self._dokumenty[referencja.path] = ZapamietanyDokument(
+            referencja, copy.deepcopy(dane), update_time=update_time
+        )
+
+    def uniewaznij(self, sciezki: Iterable[str]) -> None:
+        """Usuwa dokumenty po zapisie, aby następny odczyt trafił do Firestore."""
+        for sciezka in sciezki:
+            self._dokumenty.pop(sciezka, None)
+
+
+_biezaca_mapa: ContextVar[Optional[MapaTozsamosci]] = ContextVar('mapa_tozsamosci', default=None)
+
+
+def biezaca_mapa() -> Optional[MapaTozsamosci]:
+    """Zwraca mapę tożsamości bieżącego zapytania albo None poza zapytaniem."""
+    return _biezaca_mapa.get()
+
+
+@contextlib.contextmanager
+def mapa_tozsamosci() -> Iterator[MapaTozsamosci]:
+    """Otwiera mapę tożsamości; zagnieżdżony blok korzysta z mapy zewnętrznej."""
+    mapa = _biezaca_mapa.get()
+    if mapa is not None:
+        yield mapa
+        return
+    mapa = MapaTozsamosci()
+    token = _biezaca_mapa.set(mapa)
+    try:
+        yield mapa
+    finally:
+        _biezaca_mapa.reset(token)
+
+
+def uniewaznij(sciezki: Iterable[str]) -> None:
+    """Usuwa zapisane dokumenty z mapy bieżącego zapytania."""
+    mapa = _biezaca_mapa.get()
+    if mapa is not None:
+        mapa.uniewaznij(sciezki)
+
+
+def zapamietaj_zapis(referencja: Any, dane: Dict[str, Any], update_time: Any) -> None:
+    """Zapamiętuje dokument, którego pełna treść po zapisie jest znana bez odczytu.
+
+    Dane nie mogą zawierać wartości specjalnych (np. SERVER_TIMESTAMP),
+    bo Firestore zastępuje je dopiero przy zapisie.
+    """
+    mapa = _biezaca_mapa.get()
+    if mapa is not None:
+        mapa.zapamietaj_zapis(getattr(referencja, '_cel', referencja), dane, update_time)
+
+
+class PosrednikMapyTozsamosci:
+    """Middleware ASGI otwierający mapę tożsamości na czas każdego zapytania HTTP."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        with mapa_tozsamosci():
+            await self.app(scope, receive, send)
@@ -0,0 +1,291 @@
+"""Metryki HTTP aplikacji w tekstowym formacie ekspozycji Prometheusa.
+
+Liczniki i histogramy są zwykłymi słownikami aktualizowanymi w pętli zdarzeń,
+więc pomiar zapytania to kilka operacji na słownikach bez blokad i alokacji
+poza pierwszym wystąpieniem serii.
+"""
+
+import bisect
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from app.konfiguracja.operacje_firestore import licz_operacje, LicznikOperacji, OPERACJE
+from app.konfiguracja.wykonawca_auth import wykonawca_auth
+
+logger = logging.getLogger(__name__)
+
+TYP_ZAWARTOSCI = "text/plain; version=0.0.4; charset=utf-8"
+PRZEDZIALY_CZASU = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TRASA_NIEZNANA = "nieznana"
+PROG_WOLNEGO_ZAPYTANIA = float(os.environ.get('PROG_WOLNEGO_ZAPYTANIA_MS', '500')) / 1000
+
+Etykiety = Tuple[str, ...]
+
+
+def _wartosc_etykiety(wartosc: str) -> str:
+    return wartosc.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _etykiety(nazwy: Tuple[str, ...], wartosci: Etykiety) -> str:
+    if not nazwy:
+        return ''
+    pary = ','.join(f'{nazwa}="{_wartosc_etykiety(str(w))}"' for nazwa, w in zip(nazwy, wartosci))
+    return '{' + pary + '}'
+
+
+def _liczba(wartosc: float) -> str:
+    if wartosc == float('inf'):
+        return '+Inf'
+    return repr(float(wartosc)) if isinstance(wartosc, float) else str(wartosc)
+
+
+class Licznik:
+    """Monotonicznie rosnąca wartość z etykietami (typ 'counter')."""
+
+    def __init__(self, nazwa: str, opis: str, nazwy_etykiet: Tuple[str, ...] = ()):
+        self.nazwa = nazwa
+        self.opis = opis
+        self.nazwy_etykiet = nazwy_etykiet
+        self._wartosci: Dict[Etykiety, float] = {}
+
+    def zwieksz(self, etykiety: Etykiety = (), o: float = 1) -> None:
+        """Zwiększa serię o podanych etykietach."""
+        self._wartosci[etykiety] = self._wartosci.get(etykiety, 0) + o
+
+    def wartosc(self, etykiety: Etykiety = ()) -> float:
+        """Zwraca bieżącą wartość serii."""
+        return self._wartosci.get(etykiety, 0)
+
+    def linie(self) -> Iterable[str]:
+        """Zwraca linie formatu ekspozycji."""
+        yield f'# HELP {self.nazwa} {self.opis}'
+        yield f'# TYPE {self.nazwa} counter'
+        for etykiety, wartosc in list(self._wartosci.items()):
+            yield f'{self.nazwa}{_etykiety(self.nazwy_etykiet, etykiety)} {_liczba(wartosc)}'
+
+
+class WskaznikFunkcyjny:
+    """Wartość chwilowa (typ 'gauge') odczytywana z funkcji w chwili pobrania metryk."""
+
+    def __init__(
+        self,
+        nazwa: str,
+        opis: str,
+        funkcja: Callable[[], Dict[Etykiety, float]],
+        nazwy_etykiet: Tuple[str, ...] = ()
+    ):
+        self.nazwa = nazwa
+        self.opis = opis
+        self.nazwy_etykiet = nazwy_etykiet
+        self._funkcja = funkcja
+
+    def linie(self) -> Iterable[str]:
+        """Zwraca linie formatu ekspozycji."""
+        yield f'# HELP {self.nazwa} {self.opis}'
+        yield f'# TYPE {self.nazwa} gauge'
+        for etykiety, wartosc in self._funkcja().items():
+            yield f'{self.nazwa}{_etykiety(self.nazwy_etykiet, etykiety)} {_liczba(wartosc)}'
+
+
+class Histogram:
+    """Rozkład obserwacji w stałych przedziałach (typ 'histogram').
+
+    Każda seria przechowuje liczności przedziałów niekumulatywnie;
+    sumy kumulatywne wymagane przez format są liczone dopiero przy eksporcie.
+    """
+
+    def __init__(
+        self,
+        nazwa: str,
+        opis: str,
+        nazwy_etykiet: Tuple[str, ...] = (),
+        przedzialy: Tuple[float, ...] = PRZEDZIALY_CZASU
+    ):
+        self.nazwa = nazwa
+        self.opis = opis
+        self.nazwy_etykiet = nazwy_etykiet
+        self.przedzialy = tuple(sorted(przedzialy))
+        self._serie: Dict[Etykiety, List[Any]] = {}
+
+    def obserwuj(self, etykiety: Etykiety, wartosc: float) -> None:
+        """Dodaje obserwację do serii o podanych etykietach."""
+        seria = self._serie.get(etykiety)
+        if seria is None:
+            seria = self._serie[etykiety] = [[0] * (len(self.przedzialy) + 1), 0.0]
+        seria[0][bisect.bisect_left(self.przedzialy, wartosc)] += 1
+        seria[1] += wartosc
+
+    def liczba(self, etykiety: Etykiety) -> int:
+        """Zwraca liczbę obserwacji serii."""
+        seria = self._serie.get(etykiety)
+        return sum(seria[0]) if seria else 0
+
+    def linie(self) -> Iterable[str]:
+        """Zwraca linie formatu ekspozycji."""
+        yield f'# HELP {self.nazwa} {self.opis}'
+        yield f'# TYPE {self.nazwa} histogram'
+        nazwy_z_le = self.nazwy_etykiet + ('le',)
+        for etykiety, (licznosci, suma) in list(self._serie.items()):
+            narastajaco = 0
+            for granica, licznosc in zip(self.przedzialy + (float('inf'),), licznosci):
+                narastajaco += licznosc
+                opis_etykiet = _etykiety(nazwy_z_le, etykiety + (_liczba(granica),))
+                yield f'{self.nazwa}_bucket{opis_etykiet} {narastajaco}'
+            opis_etykiet = _etykiety(self.nazwy_etykiet, etykiety)
+            yield f'{self.nazwa}_sum{opis_etykiet} {_liczba(suma)}'
+            yield f'{self.nazwa}_count{opis_etykiet} {narastajaco}'
+
+
+class RejestrMetryk:
+    """Zbiór metryk eksportowanych razem pod /metrics."""
+
+    def __init__(self):
+        self._metryki: List[Any] = []
+
+    def rejestruj(self, metryka: Any) -> Any:
+        """Dodaje metrykę do rejestru i zwraca ją."""
+        self._metryki.append(metryka)
+        return metryka
+
+    def renderuj(self) -> str:
+        """Zwraca wszystkie metryki w tekstowym formacie ekspozycji."""
+        linie = []
+        for metryka in self._metryki:
+            linie.extend(metryka.linie())
+        return '\n'.join(linie) + '\n'
+
+
+class MetrykiHTTP:
+    """Metryki zapytań HTTP i ich operacji Firestore grupowane po metodzie i szablonie trasy."""
+
+    def __init__(self, rejestr: RejestrMetryk):
+        self.zapytania = rejestr.rejestruj(Licznik(
+            'http_requests_total', 'Liczba obsłużonych zapytań HTTP.', ('method', 'route', 'status')
+        ))
+        self.bledy = rejestr.rejestruj(Licznik(
+            'http_request_errors_total',
+            'Liczba zapytań zakończonych błędem serwera (5xx).',
+            ('method', 'route')
+        ))
+        self.czas = rejestr.rejestruj(Histogram(
+            'http_request_duration_seconds',
+            'Czas obsługi zapytań HTTP w sekundach.',
+            ('method', 'route')
+        ))
+        self.operacje_firestore = rejestr.rejestruj(Licznik(
+            'firestore_operations_total',
+            'Liczba operacji Firestore (read, write, delete, streamed) '
+            'wykonanych przez zapytania HTTP.',
+            ('method', 'route', 'operation')
+        ))
+        rejestr.rejestruj(WskaznikFunkcyjny(
+            'http_requests_in_flight',
+            'Liczba zapytań HTTP w trakcie obsługi.',
+            self.w_toku,
+            ('method', 'route')
+        ))
+        self._aktywne: Dict[int, Dict[str, Any]] = {}
+
+    def rozpocznij(self, scope: Dict[str, Any]) -> None:
+        """Oznacza zapytanie jako obsługiwane."""
+        self._aktywne[id(scope)] = scope
+
+    def zakoncz(
+        self,
+        scope: Dict[str, Any],
+        status: int,
+        czas: float,
+        operacje: LicznikOperacji
+    ) -> None:
+        """Zapisuje wynik, czas obsługi i operacje Firestore zakończonego zapytania."""
+        self._aktywne.pop(id(scope), None)
+        metoda = scope['method']
+        trasa = szablon_trasy(scope)
+        self.zapytania.zwieksz((metoda, trasa, str(status)))
+        self.czas.obserwuj((metoda, trasa), czas)
+        if status >= 500:
+            self.bledy.zwieksz((metoda, trasa))
+        for operacja in OPERACJE:
+            if operacje.operacje[operacja]:
+                self.operacje_firestore.zwieksz(
+                    (metoda, trasa, operacja), operacje.operacje[operacja]
+                )
+
+    def w_toku(self) -> Dict[Etykiety, float]:
+        """Zlicza zapytania w toku; trasa jest znana od chwili dopasowania przez router."""
+        wynik: Dict[Etykiety, float] = {}
+        for scope in list(self._aktywne.values()):
+            etykiety = (scope['method'], szablon_trasy(scope))
+            wynik[etykiety] = wynik.get(etykiety, 0) + 1
+        return wynik
+
+
+def szablon_trasy(scope: Dict[str, Any]) -> str:
+    """Zwraca szablon ścieżki dopasowanej trasy (np. '/grupy/{grupa_id}')."""
+    trasa = scope.get('route')
+    return getattr(trasa, 'path_format', None) or TRASA_NIEZNANA
+
+
+def _metryki_puli_auth() -> Dict[Etykiety, float]:
+    metryki = wykonawca_auth.metryki()
+    return {(nazwa,): metryki[nazwa] for nazwa in ('maks_watkow', 'w_kolejce', 'w_toku')}
+
+
+rejestr_metryk = RejestrMetryk()
+metryki_http = MetrykiHTTP(rejestr_metryk)
+rejestr_metryk.rejestruj(WskaznikFunkcyjny(
+    'firebase_auth_pool',
+    'Stan puli wątków wywołań Firebase Authentication.',
+    _metryki_puli_auth,
+    ('state',)
+))
+
+
+class PosrednikMetryk:
+    """Middleware ASGI mierzący każde zapytanie HTTP.
+
+    Szablon trasy jest odczytywany z 'scope' po obsłudze zapytania, więc
+    pomiar nie dopasowuje ścieżki drugi raz, a identyfikatory w URL nie
+    tworzą osobnych serii. Zapytania bez pasującej trasy trafiają do 'nieznana'.
+    Zapytania dłuższe niż próg są logowane razem z liczbą operacji Firestore.
+    """
+
+    def __init__(
+        self,
+        app,
+        metryki: MetrykiHTTP = metryki_http,
+        prog_wolnego_zapytania: float = PROG_WOLNEGO_ZAPYTANIA
+    ):
+        self.app = app
+        self.metryki = metryki
+        self.prog_wolnego_zapytania = prog_wolnego_zapytania
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def wyslij(wiadomosc):
+            nonlocal status
+            if wiadomosc['type'] == 'http.response.start':
+                status = wiadomosc['status']
+            await send(wiadomosc)
+
+        self.metryki.rozpocznij(scope)
+        start = time.perf_counter()
+        with licz_operacje() as operacje:
+            try:
+                await self.app(scope, receive, wyslij)
+            finally:
+                czas = time.perf_counter() - start
+                self.metryki.zakoncz(scope, status, czas, operacje)
+                if czas >= self.prog_wolnego_zapytania:
+                    logger.warning(
+                        "Wolne zapytanie %s %s (%s) %d: %.1f ms, Firestore: %r",
+                        scope['method'], scope.get('path'), szablon_trasy(scope),
+                        status, czas * 1000, operacje
+                    )
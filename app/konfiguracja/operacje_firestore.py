@@ -0,0 +1,345 @@
+"""Zliczanie operacji Firestore wykonywanych w ramach jednego zapytania HTTP.
+
+Klient bazy jest opakowany w KlientZPomiarem, który przepuszcza wywołania
+do właściwego klienta, a przy każdym odczycie, zapisie i usunięciu zwiększa
+licznik bieżącego kontekstu (ContextVar). Odczyty pojedynczych dokumentów
+przechodzą przez mapę tożsamości zapytania, a zapisy ją unieważniają. Pozostałe
+pełne odczyty poza transakcjami trafiają do LadowaczDokumentow, który łączy je
+między korutynami w paczki get_all. Poza kontekstem licz_operacje()
+zliczanie jest pomijane, więc skrypty i zadania w tle nie ponoszą kosztu.
+Zagnieżdżone bloki doliczają operacje także do wszystkich bloków zewnętrznych.
+"""
+
+import contextlib
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from app.konfiguracja.ladowacz_dokumentow import LadowaczDokumentow
+from app.konfiguracja.mapa_tozsamosci import biezaca_mapa, uniewaznij
+
+ODCZYT = 'read'
+ZAPIS = 'write'
+USUNIECIE = 'delete'
+STRUMIENIOWANY = 'streamed'
+OPERACJE = (ODCZYT, ZAPIS, USUNIECIE, STRUMIENIOWANY)
+
+
+class LicznikOperacji:
+    """Liczby operacji Firestore jednego zapytania.
+
+    'read' to odczyty pojedynczych dokumentów (get, get_all), 'streamed' to
+    dokumenty zwrócone przez zapytania; rozliczane odczyty są ich sumą.
+    """
+
+    __slots__ = ('operacje', 'rodzic')
+
+    def __init__(self, rodzic: Optional['LicznikOperacji'] = None):
+        self.operacje: Dict[str, int] = dict.fromkeys(OPERACJE, 0)
+        self.rodzic = rodzic
+
+    @property
+    def odczyty(self) -> int:
+        return self.operacje[ODCZYT]
+
+    @property
+    def zapisy(self) -> int:
+        return self.operacje[ZAPIS]
+
+    @property
+    def usuniecia(self) -> int:
+        return self.operacje[USUNIECIE]
+
+    @property
+    def strumieniowane(self) -> int:
+        return self.operacje[STRUMIENIOWANY]
+
+    def __repr__(self) -> str:
+        return ' '.join(f'{operacja}={liczba}' for operacja, liczba in self.operacje.items())
+
+
+_biezacy_licznik: ContextVar[Optional[LicznikOperacji]] = ContextVar(
+    'licznik_operacji_firestore', default=None
+)
+
+
+@contextlib.contextmanager
+def licz_operacje() -> Iterator[LicznikOperacji]:
+    """Zlicza operacje Firestore wykonane wewnątrz bloku, także w zadaniach potomnych."""
+    licznik = LicznikOperacji(_biezacy_licznik.get())
+    token = _biezacy_licznik.set(licznik)
+    try:
+        yield licznik
+    finally:
+        _biezacy_licznik.reset(token)
+
+
+class PrzekroczonyBudzetOperacji(AssertionError):
+    """Blok wykonał więcej operacji Firestore, niż pozwala jego budżet."""
+
+
+@contextlib.contextmanager
+def budzet_operacji(
+    odczyty: Optional[int] = None,
+    zapisy: Optional[int] = None,
+    usuniecia: Optional[int] = None,
+    strumieniowane: Optional[int] = None
+) -> Iterator[LicznikOperacji]:
+    """Zlicza operacje bloku i zgłasza PrzekroczonyBudzetOperacji po przekroczeniu limitów.
+
+    Limit None oznacza brak ograniczenia danego rodzaju operacji.
+    """
+    limity = dict(zip(OPERACJE, (odczyty, zapisy, usuniecia, strumieniowane)))
+    with licz_operacje() as licznik:
+        yield licznik
+    przekroczone = [
+        f"{operacja}: {licznik.operacje[operacja]} > {limit}"
+        for operacja, limit in limity.items()
+        if limit is not None and licznik.operacje[operacja] > limit
+    ]
+    if przekroczone:
+        raise PrzekroczonyBudzetOperacji(
+            f"Przekroczony budżet operacji Firestore ({', '.join(przekroczone)})"
+        )
+
+
+def zlicz(operacja: str, ile: int = 1) -> None:
+    """Dolicza operacje do licznika bieżącego kontekstu i liczników zewnętrznych."""
+    licznik = _biezacy_licznik.get()
+    while licznik is not None:
+        licznik.operacje[operacja] += ile
+        licznik = licznik.rodzic
+
+
+def _odpakuj(obiekt: Any) -> Any:
+    return getattr(obiekt, '_cel', obiekt)
+
+
+def _odczyt_pelny(args: tuple, kwargs: Dict[str, Any]) -> bool:
+    """Czy odczyt dotyczy całych dokumentów poza transakcją (może iść przez mapę tożsamości)."""
+    return not args and kwargs.get('transaction') is None and kwargs.get('field_paths') is None
+
+
+def _odpakuj_transakcje(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    if kwargs.get('transaction') is not None:
+        kwargs['transaction'] = _odpakuj(kwargs['transaction'])
+    return kwargs
+
+
+class _Opakowanie:
+    """Przepuszcza atrybuty nieobsłużone jawnie do opakowanego obiektu.
+
+    Referencje i zapytania przekazują dalej ładowacz klienta, z którego powstały.
+    """
+
+    def __init__(self, cel: Any, ladowacz: Optional[LadowaczDokumentow] = None):
+        self._cel = cel
+        self._ladowacz = ladowacz
+
+    def __getattr__(self, nazwa: str) -> Any:
+        if nazwa in ('_cel', '_ladowacz'):
+            raise AttributeError(nazwa)
+        return getattr(self._cel, nazwa)
+
+    def __eq__(self, inny: Any) -> bool:
+        return self._cel == _odpakuj(inny)
+
+    def __hash__(self) -> int:
+        return hash(self._cel)
+
+    def __repr__(self) -> str:
+        return repr(self._cel)
+
+
+class ZapytanieZPomiarem(_Opakowanie):
+    """Zapytanie (lub kolekcja) zliczające zwrócone dokumenty."""
+
+    def document(self, *args, **kwargs) -> 'ReferencjaZPomiarem':
+        return ReferencjaZPomiarem(self._cel.document(*args, **kwargs), self._ladowacz)
+
+    def where(self, *args, **kwargs) -> 'ZapytanieZPomiarem':
+        return ZapytanieZPomiarem(self._cel.where(*args, **kwargs), self._ladowacz)
+
+    def order_by(self, *args, **kwargs) -> 'ZapytanieZPomiarem':
+        return ZapytanieZPomiarem(self._cel.order_by(*args, **kwargs), self._ladowacz)
+
+    def select(self, *args, **kwargs) -> 'ZapytanieZPomiarem':
+        return ZapytanieZPomiarem(self._cel.select(*args, **kwargs), self._ladowacz)
+
+    def limit(self, *args, **kwargs) -> 'ZapytanieZPomiarem':
+        return ZapytanieZPomiarem(self._cel.limit(*args, **kwargs), self._ladowacz)
+
+    def offset(self, *args, **kwargs) -> 'ZapytanieZPomiarem':
+        return ZapytanieZPomiarem(self._cel.offset(*args, **kwargs), self._ladowacz)
+
+    def start_after(self, *args, **kwargs) -> 'ZapytanieZPomiarem':
+        return ZapytanieZPomiarem(self._cel.start_after(*args, **kwargs), self._ladowacz)
+
+    def start_at(self, *args, **kwargs) -> 'ZapytanieZPomiarem':
+        return ZapytanieZPomiarem(self._cel.start_at(*args, **kwargs), self._ladowacz)
+
+    async def stream(self, *args, **kwargs) -> AsyncIterator[Any]:
+        async for snapshot in self._cel.stream(*args, **_odpakuj_transakcje(kwargs)):
+            zlicz(STRUMIENIOWANY)
+            yield snapshot
+
+    async def get(self, *args, **kwargs) -> List[Any]:
+        wynik = await self._cel.get(*args, **_odpakuj_transakcje(kwargs))
+        zlicz(STRUMIENIOWANY, len(wynik))
+        return wynik
+
+
+class ReferencjaZPomiarem(_Opakowanie):
+    """Referencja dokumentu zliczająca odczyty, zapisy i usunięcia."""
+
+    def collection(self, *args, **kwargs) -> ZapytanieZPomiarem:
+        return ZapytanieZPomiarem(self._cel.collection(*args, **kwargs), self._ladowacz)
+
+    async def get(self, *args, **kwargs) -> Any:
+        mapa = biezaca_mapa() if _odczyt_pelny(args, kwargs) else None
+        if mapa is not None:
+            dokument = mapa.pobierz(self._cel.path)
+            if dokument is not None:
+                return dokument
+        if self._ladowacz is not None and _odczyt_pelny(args, kwargs):
+            wynik, pierwszy = await self._ladowacz.pobierz(self._cel)
+        else:
+            wynik, pierwszy = await self._cel.get(*args, **_odpakuj_transakcje(kwargs)), True
+        if pierwszy:
+            zlicz(ODCZYT)
+        return mapa.zapamietaj(wynik) if mapa is not None else wynik
+
+    async def _zapisz(self, metoda: str, operacja: str, *args, **kwargs) -> Any:
+        try:
+            wynik = await getattr(self._cel, metoda)(*args, **kwargs)
+        finally:
+            uniewaznij((self._cel.path,))
+        zlicz(operacja)
+        return wynik
+
+    async def create(self, *args, **kwargs) -> Any:
+        return await self._zapisz('create', ZAPIS, *args, **kwargs)
+
+    async def set(self, *args, **kwargs) -> Any:
+        return await self._zapisz('set', ZAPIS, *args, **kwargs)
+
+    async def update(self, *args, **kwargs) -> Any:
+        return await self._zapisz('update', ZAPIS, *args, **kwargs)
+
+    async def delete(self, *args, **kwargs) -> Any:
+        return await self._zapisz('delete', USUNIECIE, *args, **kwargs)
+
+
+class PaczkaZPomiarem(_Opakowanie):
+    """Paczka zapisów zliczająca swoje operacje dopiero po zatwierdzeniu."""
+
+    def __init__(self, cel: Any):
+        super().__init__(cel)
+        self._oczekujace = dict.fromkeys((ZAPIS, USUNIECIE), 0)
+        self._sciezki = set()
+
+    def __len__(self) -> int:
+        return len(self._cel)
+
+    def _dodaj(self, operacja: str, reference: Any) -> Any:
+        self._oczekujace[operacja] += 1
+        referencja = _odpakuj(reference)
+        self._sciezki.add(referencja.path)
+        return referencja
+
+    def create(self, reference: Any, *args, **kwargs) -> Any:
+        return self._cel.create(self._dodaj(ZAPIS, reference), *args, **kwargs)
+
+    def set(self, reference: Any, *args, **kwargs) -> Any:
+        return self._cel.set(self._dodaj(ZAPIS, reference), *args, **kwargs)
+
+    def update(self, reference: Any, *args, **kwargs) -> Any:
+        return self._cel.update(self._dodaj(ZAPIS, reference), *args, **kwargs)
+
+    def delete(self, reference: Any, *args, **kwargs) -> Any:
+        return self._cel.delete(self._dodaj(USUNIECIE, reference), *args, **kwargs)
+
+    def _zlicz_zatwierdzone(self) -> None:
+        for operacja, ile in self._oczekujace.items():
+            zlicz(operacja, ile)
+            self._oczekujace[operacja] = 0
+
+    async def commit(self, *args, **kwargs) -> Any:
+        try:
+            wynik = await self._cel.commit(*args, **kwargs)
+        finally:
+            uniewaznij(self._sciezki)
+        self._zlicz_zatwierdzone()
+        return wynik
+
+
+class TransakcjaZPomiarem(PaczkaZPomiarem):
+    """Transakcja zgodna z firestore.async_transactional.
+
+    Zapisy nieudanej próby są odrzucane w _clean_up, więc ponowienia
+    nie są liczone podwójnie. Wyniki zapisów zatwierdzonej próby są
+    dostępne w atrybucie 'wyniki' (async_transactional ich nie zwraca).
+    _commit i _clean_up to metody prywatne SDK; zgodność z przypiętą
+    wersją google-cloud-firestore sprawdzają testy z AsyncTransaction SDK.
+    """
+
+    wyniki: Optional[List[Any]] = None
+
+    def _clean_up(self) -> None:
+        self._oczekujace = dict.fromkeys((ZAPIS, USUNIECIE), 0)
+        self._cel._clean_up()
+
+    async def _commit(self) -> Any:
+        try:
+            wynik = await self._cel._commit()
+        finally:
+            uniewaznij(self._sciezki)
+        self._zlicz_zatwierdzone()
+        self.wyniki = wynik
+        return wynik
+
+
+class KlientZPomiarem(_Opakowanie):
+    """Klient Firestore zliczający operacje w kontekście licz_operacje().
+
+    Odczyt dołączony przez ładowacz do paczki, w której ten sam dokument
+    zgłosiła już inna korutyna, nie jest liczony ponownie.
+    """
+
+    def __init__(self, cel: Any):
+        super().__init__(cel, LadowaczDokumentow(cel))
+
+    def collection(self, *args, **kwargs) -> ZapytanieZPomiarem:
+        return ZapytanieZPomiarem(self._cel.collection(*args, **kwargs), self._ladowacz)
+
+    def document(self, *args, **kwargs) -> ReferencjaZPomiarem:
+        return ReferencjaZPomiarem(self._cel.document(*args, **kwargs), self._ladowacz)
+
+    def batch(self) -> PaczkaZPomiarem:
+        return PaczkaZPomiarem(self._cel.batch())
+
+    def transaction(self, *args, **kwargs) -> TransakcjaZPomiarem:
+        return TransakcjaZPomiarem(self._cel.transaction(*args, **kwargs))
+
+    async def get_all(self, references: Any, *args, **kwargs) -> AsyncIterator[Any]:
+        referencje = [_odpakuj(referencja) for referencja in references]
+        mapa = biezaca_mapa() if _odczyt_pelny(args, kwargs) else None
+        if mapa is not None:
+            brakujace = []
+            for referencja in referencje:
+                dokument = mapa.pobierz(referencja.path)
+                if dokument is None:
+                    brakujace.append(referencja)
+                else:
+                    yield dokument
+            referencje = brakujace
+            if not referencje:
+                return
+        if _odczyt_pelny(args, kwargs):
+            for snapshot, pierwszy in await self._ladowacz.pobierz_wiele(referencje):
+                if pierwszy:
+                    zlicz(ODCZYT)
+                yield mapa.zapamietaj(snapshot) if mapa is not None else snapshot
+            return
+        async for snapshot in self._cel.get_all(referencje, *args, **_odpakuj_transakcje(kwargs)):
+            zlicz(ODCZYT)
+            yield mapa.zapamietaj(snapshot) if mapa is not None else snapshot
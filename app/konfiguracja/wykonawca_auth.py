@@ -0,0 +1,87 @@
+"""Ograniczona pula wątków dla blokujących wywołań Firebase Authentication."""
+
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+MAKS_WATKOW_AUTH = 8
+
+
+class WykonawcaAuth:
+    """Uruchamia wywołania firebase_admin.auth poza pętlą zdarzeń.
+
+    Liczba wątków jest ograniczona, więc równoległe zapytania do Authentication
+    nie przekroczą limitu projektu; nadmiarowe wywołania czekają w kolejce.
+    """
+
+    def __init__(self, maks_watkow: int = MAKS_WATKOW_AUTH):
+        self.maks_watkow = maks_watkow
+        self._pula = ThreadPoolExecutor(
+            max_workers=maks_watkow,
+            thread_name_prefix="firebase-auth"
+        )
+        self._blokada = threading.Lock()
+        self._w_kolejce = 0
+        self._w_toku = 0
+        self._zakonczone = 0
+        self._bledy = 0
+        self._czas_oczekiwania_suma = 0.0
+        self._czas_wykonania_suma = 0.0
+        self._czas_wykonania_maks = 0.0
+
+    async def wykonaj(self, funkcja: Callable[..., Any], *args, **kwargs) -> Any:
+        """Wykonuje blokującą funkcję w puli i zwraca jej wynik."""
+        petla = asyncio.get_running_loop()
+        zgloszono = time.perf_counter()
+        with self._blokada:
+            self._w_kolejce += 1
+        return await petla.run_in_executor(
+            self._pula,
+            functools.partial(self._uruchom, zgloszono, funkcja, *args, **kwargs)
+        )
+
+    def _uruchom(self, zgloszono: float, funkcja: Callable[..., Any], *args, **kwargs) -> Any:
+        start = time.perf_counter()
+        with self._blokada:
+            self._w_kolejce -= 1
+            self._w_toku += 1
+            self._czas_oczekiwania_suma += start - zgloszono
+        blad = False
+        try:
+            return funkcja(*args, **kwargs)
+        except Exception:
+            blad = True
+            raise
+        finally:
+            czas = time.perf_counter() - start
+            with self._blokada:
+                self._w_toku -= 1
+                self._zakonczone += 1
+                self._bledy += int(blad)
+                self._czas_wykonania_suma += czas
+                self._czas_wykonania_maks = max(self._czas_wykonania_maks, czas)
+
+    def metryki(self) -> Dict[str, float]:
+        """Zwraca bieżący stan kolejki oraz skumulowane czasy wywołań."""
+        with self._blokada:
+            return {
+                'maks_watkow': self.maks_watkow,
+                'w_kolejce': self._w_kolejce,
+                'w_toku': self._w_toku,
+                'zakonczone': self._zakonczone,
+                'bledy': self._bledy,
+                'czas_oczekiwania_suma': self._czas_oczekiwania_suma,
+                'czas_wykonania_suma': self._czas_wykonania_suma,
+                'czas_wykonania_maks': self._czas_wykonania_maks,
+            }
+
+
+wykonawca_auth = WykonawcaAuth()
+
+
+async def wykonaj_auth(funkcja: Callable[..., Any], *args, **kwargs) -> Any:
+    """Wykonuje wywołanie firebase_admin.auth we wspólnej puli aplikacji."""
+    return await wykonawca_auth.wykonaj(funkcja, *args, **kwargs)
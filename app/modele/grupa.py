@@ -1,8 +1,12 @@
 """Modele danych dla grup w systemie USOS-like."""
 
-from typing import Optional, List
+from typing import Annotated, Optional, List
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, StringConstraints
+
+MAKS_STUDENTOW_W_PRZYPISANIU = 500
+
+IdStudenta = Annotated[str, StringConstraints(min_length=1, pattern=r'^[^/]+$')]
 
 class GrupaBazowa(BaseModel):
     """Model bazowy dla danych grupy."""
@@ -23,6 +27,20 @@ class PrzypiszStudentaDoGrupy(BaseModel):
     """Model danych do przypisywania studenta do grupy."""
     studentId: str
 
+class PrzypiszStudentowDoGrupy(BaseModel):
+    """Model danych do hurtowego przypisywania studentów do grupy."""
+    studenciIds: List[IdStudenta] = Field(max_length=MAKS_STUDENTOW_W_PRZYPISANIU)
+
+class OdrzuconyStudent(BaseModel):
+    """Model danych opisujący studenta, którego nie przypisano do grupy."""
+    studentId: str
+    powod: str
+
+class WynikPrzypisaniaStudentow(BaseModel):
+    """Model danych z wynikiem hurtowego przypisania studentów do grupy."""
+    przypisani: List[str] = []
+    odrzuceni: List[OdrzuconyStudent] = []
+
 class PrzypiszWykladowceDoGrupy(BaseModel):
     """Model danych do przypisywania wykładowcy do grupy."""
     wykladowcaId: str
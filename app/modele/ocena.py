@@ -1,20 +1,50 @@
 """Modele danych dla ocen w systemie USOS-like."""
 
 import datetime
-from pydantic import BaseModel, Field
+from typing import Annotated, Dict, List, Optional
+
+from pydantic import BaseModel, Field, StringConstraints
+
+MAKS_OCEN_W_IMPORCIE = 10000
+
+WartoscOceny = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
 
 class OcenaBazowa(BaseModel):
     """Model bazowy dla danych oceny."""
     studentId: str
     grupaId: str
     wystawionePrzez: str
-    wartoscOceny: str
+    wartoscOceny: WartoscOceny
 
 class OcenaTworzenie(OcenaBazowa):
     """Model danych do tworzenia nowej oceny."""
     pass
 
+ImportOcen = Annotated[List[OcenaTworzenie], Field(max_length=MAKS_OCEN_W_IMPORCIE)]
+
 class Ocena(OcenaBazowa):
     """Model danych reprezentujący istniejącą ocenę."""
     ocenaId: str
     timestamp: datetime.datetime = Field(default_factory=datetime.datetime.utcnow)
+
+class WynikImportuOceny(BaseModel):
+    """Model danych opisujący wynik zapisu jednego wiersza importu ocen."""
+    indeks: int
+    ocenaId: Optional[str] = None
+    blad: Optional[str] = None
+
+class RaportImportuOcen(BaseModel):
+    """Model danych podsumowujący hurtowy import ocen."""
+    utworzone: int
+    odrzucone: int
+    wyniki: List[WynikImportuOceny]
+
+class StatystykiOcen(BaseModel):
+    """Model danych ze statystykami liczbowych ocen grupy lub przedmiotu."""
+    liczbaOcen: int
+    liczbaNieliczbowych: int = 0
+    srednia: Optional[float] = None
+    mediana: Optional[float] = None
+    percentyle: Dict[str, float] = {}
+    histogram: Dict[str, int] = {}
+    odsetekZaliczonych: Optional[float] = None
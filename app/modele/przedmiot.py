@@ -1,5 +1,7 @@
 """Modele danych dla przedmiotów w systemie USOS-like."""
 
+from typing import Optional
+
 from pydantic import BaseModel
 
 class PrzedmiotBazowy(BaseModel):
@@ -14,3 +16,8 @@ class PrzedmiotTworzenie(PrzedmiotBazowy):
 class Przedmiot(PrzedmiotBazowy):
     """Model danych reprezentujący istniejący przedmiot."""
     przedmiotId: str
+
+class PrzedmiotAktualizacja(BaseModel):
+    """Model danych do aktualizacji istniejącego przedmiotu."""
+    nazwa: Optional[str] = None
+    opis: Optional[str] = None
@@ -0,0 +1,31 @@
+"""Modele danych dla stronicowanych list w systemie USOS-like."""
+
+import re
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+DOMYSLNY_LIMIT = 100
+MAKS_LIMIT = 1000
+MAKS_POL = 50
+
+_NAZWA_POLA = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$')
+
+def parsuj_pola(pola: Optional[str]) -> Optional[List[str]]:
+    """Zamienia parametr 'fields' (nazwy oddzielone przecinkami) na listę pól projekcji."""
+    if pola is None:
+        return None
+    lista_pol = list(dict.fromkeys(pole.strip() for pole in pola.split(',') if pole.strip()))
+    if not lista_pol:
+        raise ValueError("Nie podano żadnego pola w parametrze 'fields'")
+    if len(lista_pol) > MAKS_POL:
+        raise ValueError(f"Można wybrać najwyżej {MAKS_POL} pól")
+    for pole in lista_pol:
+        if not _NAZWA_POLA.match(pole):
+            raise ValueError(f"Nieprawidłowa nazwa pola: {pole}")
+    return lista_pol
+
+class Strona(BaseModel):
+    """Model danych reprezentujący jedną stronę wyników listy."""
+    elementy: List[Dict[str, Any]]
+    nastepnaStrona: Optional[str] = None
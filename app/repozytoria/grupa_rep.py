@@ -1,10 +1,129 @@
 """Repozytorium do zarządzania danymi grup w Firestore."""
 
-from typing import Dict, List, Optional, Any
+import asyncio
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Dict, List, Optional, Any, Tuple
 from firebase_admin import firestore
 
-from app.modele.grupa import Grupa, GrupaTworzenie
+from app.modele.grupa import Grupa, GrupaTworzenie, OdrzuconyStudent, WynikPrzypisaniaStudentow
 from app.konfiguracja.firebase_config import db
+from app.repozytoria.odczyt import pobierz_dokumenty, pobierz_z_wersja
+from app.repozytoria.przedmiot import RepozytoriumPrzedmiotow
+from app.repozytoria.stronicowanie import pobierz_strone, zastosuj_projekcje
+from app.repozytoria.uzytkownik_rep import RepozytoriumUzytkownikow
+
+MAKS_PROB_TRANSAKCJI = 10
+
+
+async def _sprawdz_role(user_id: str, rola: str, opis_roli: str) -> None:
+    aktualna_rola = await RepozytoriumUzytkownikow.pobierz_role_uzytkownika(user_id)
+    if aktualna_rola is None:
+        raise ValueError(f"Użytkownik o ID {user_id} nie istnieje")
+    if aktualna_rola != rola:
+        raise ValueError(f"Użytkownik o ID {user_id} nie jest {opis_roli}")
+
+
+async def _sprawdz_przedmiot(przedmiot_id: str) -> None:
+    if await RepozytoriumPrzedmiotow.pobierz_przedmiot_z_katalogu(przedmiot_id) is None:
+        raise ValueError(f"Przedmiot o ID {przedmiot_id} nie istnieje")
+
+
+class _GrupaNieIstnieje(Exception):
+    """Sprawdzana grupa nie istnieje."""
+
+
+async def _sprawdz_grupe(grupa_ref) -> None:
+    if not (await grupa_ref.get()).exists:
+        raise _GrupaNieIstnieje(grupa_ref.id)
+
+
+async def _sprawdz_wspolbieznie(*sprawdzenia: Awaitable[Any]) -> List[Any]:
+    """Wykonuje niezależne sprawdzenia współbieżnie i zwraca ich wyniki w kolejności.
+
+    Błąd sprawdzenia anuluje sprawdzenia podane po nim, a te podane przed nim
+    są dokańczane, więc zgłaszany jest błąd pierwszego nieudanego sprawdzenia
+    w kolejności argumentów, niezależnie od tego, które skończyło się pierwsze.
+    """
+    zadania = [asyncio.ensure_future(sprawdzenie) for sprawdzenie in sprawdzenia]
+    try:
+        oczekujace = set(zadania)
+        while oczekujace:
+            _, oczekujace = await asyncio.wait(oczekujace, return_when=asyncio.FIRST_EXCEPTION)
+            for indeks, zadanie in enumerate(zadania):
+                if zadanie.done() and not zadanie.cancelled() and zadanie.exception() is not None:
+                    for pozniejsze in zadania[indeks + 1:]:
+                        pozniejsze.cancel()
+                    break
+    finally:
+        trwajace = [zadanie for zadanie in zadania if not zadanie.done()]
+        for zadanie in trwajace:
+            zadanie.cancel()
+        await asyncio.gather(*trwajace, return_exceptions=True)
+    for zadanie in zadania:
+        if not zadanie.cancelled() and zadanie.exception() is not None:
+            raise zadanie.exception()
+    return [zadanie.result() for zadanie in zadania]
+
+
+def _powod_odrzucenia_studenta(student_id: str, user_doc) -> Optional[str]:
+    rola = RepozytoriumUzytkownikow.zapamietaj_role(student_id, user_doc)
+    if rola is None:
+        return f"Użytkownik o ID {student_id} nie istnieje"
+    if rola != 'student':
+        return f"Użytkownik o ID {student_id} nie jest studentem"
+    return None
+
+
+@firestore.async_transactional
+async def _przypisz_studenta_w_transakcji(transakcja, user_ref, grupa_ref, student_id: str) -> bool:
+    user_doc, grupa_doc = await pobierz_dokumenty(db, [user_ref, grupa_ref], transakcja)
+    powod = _powod_odrzucenia_studenta(student_id, user_doc)
+    if powod is not None:
+        raise ValueError(powod)
+
+    if not grupa_doc.exists:
+        return False
+
+    grupa_data = grupa_doc.to_dict()
+    if student_id in grupa_data.get('studentsIds', []):
+        raise ValueError(f"Student o ID {student_id} jest już przypisany do grupy")
+
+    transakcja.update(grupa_ref, {
+        'studentsIds': firestore.ArrayUnion([student_id]),
+        'updatedAt': firestore.SERVER_TIMESTAMP
+    })
+    return True
+
+
+@firestore.async_transactional
+async def _przypisz_studentow_w_transakcji(
+    transakcja,
+    grupa_ref,
+    user_refs: list
+) -> Optional[WynikPrzypisaniaStudentow]:
+    grupa_doc, *user_docs = await pobierz_dokumenty(db, [grupa_ref, *user_refs], transakcja)
+    if not grupa_doc.exists:
+        return None
+
+    obecni = set(grupa_doc.to_dict().get('studentsIds', []))
+    wynik = WynikPrzypisaniaStudentow()
+    for user_ref, user_doc in zip(user_refs, user_docs):
+        student_id = user_ref.id
+        powod = _powod_odrzucenia_studenta(student_id, user_doc)
+        if powod is None and student_id in obecni:
+            powod = f"Student o ID {student_id} jest już przypisany do grupy"
+        if powod is None:
+            wynik.przypisani.append(student_id)
+        else:
+            wynik.odrzuceni.append(OdrzuconyStudent(studentId=student_id, powod=powod))
+
+    if wynik.przypisani:
+        transakcja.update(grupa_ref, {
+            'studentsIds': firestore.ArrayUnion(wynik.przypisani),
+            'updatedAt': firestore.SERVER_TIMESTAMP
+        })
+    return wynik
+
 
 class RepozytoriumGrup:
     """Klasa repozytorium do interakcji z kolekcją 'groups' w Firestore."""
@@ -14,9 +133,7 @@ class RepozytoriumGrup:
     async def utworz_grupe(cls, dane_grupy: GrupaTworzenie) -> Grupa:
         """Tworzy nową grupę w Firestore."""
         try:
-            subject_doc = db.collection('subjects').document(dane_grupy.przedmiotId).get()
-            if not subject_doc.exists:
-                raise ValueError(f"Przedmiot o ID {dane_grupy.przedmiotId} nie istnieje")
+            await _sprawdz_przedmiot(dane_grupy.przedmiotId)
 
             grupa_doc_ref = db.collection(cls.COLLECTION_NAME).document()
             grupa_info = {
@@ -27,7 +144,7 @@ class RepozytoriumGrup:
                 'studentsIds': [],
                 'createdAt': firestore.SERVER_TIMESTAMP
             }
-            grupa_doc_ref.set(grupa_info)
+            await grupa_doc_ref.set(grupa_info)
 
             return Grupa(
                 grupaId=grupa_doc_ref.id,
@@ -42,54 +159,97 @@ class RepozytoriumGrup:
     @classmethod
     async def pobierz_grupe_po_id(cls, grupa_id: str) -> Optional[Dict[str, Any]]:
         """Pobiera dane grupy na podstawie jej ID."""
-        grupa_doc = db.collection(cls.COLLECTION_NAME).document(grupa_id).get()
+        grupa_doc = await db.collection(cls.COLLECTION_NAME).document(grupa_id).get()
         if grupa_doc.exists:
             return grupa_doc.to_dict()
         return None
 
     @classmethod
-    async def pobierz_wszystkie_grupy(cls) -> List[Dict[str, Any]]:
+    async def pobierz_grupe_z_wersja(
+        cls,
+        grupa_id: str
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[datetime]]:
+        """Pobiera dane grupy wraz z czasem ostatniego zapisu dokumentu."""
+        return await pobierz_z_wersja(db.collection(cls.COLLECTION_NAME).document(grupa_id))
+
+    @classmethod
+    async def pobierz_ids_grup_przedmiotu(cls, przedmiot_id: str) -> List[str]:
+        """Pobiera identyfikatory wszystkich grup danego przedmiotu."""
+        grupy_docs = (
+            db.collection(cls.COLLECTION_NAME)
+            .where('subjectId', '==', przedmiot_id)
+            .select(['subjectId'])
+            .stream()
+        )
+        return [doc.id async for doc in grupy_docs]
+
+    @classmethod
+    async def pobierz_wszystkie_grupy(
+        cls,
+        pola: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
         """Pobiera dane wszystkich grup z Firestore."""
         grupy = []
-        grupa_docs = db.collection(cls.COLLECTION_NAME).stream()
-        for doc in grupa_docs:
+        grupa_docs = zastosuj_projekcje(db.collection(cls.COLLECTION_NAME), pola).stream()
+        async for doc in grupa_docs:
             grupy.append(doc.to_dict())
         return grupy
 
+    @classmethod
+    async def pobierz_strone_grup(
+        cls,
+        limit: int,
+        kursor: Optional[str] = None,
+        pola: Optional[List[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Pobiera jedną stronę grup uporządkowaną po ID dokumentu."""
+        return await pobierz_strone(
+            zastosuj_projekcje(db.collection(cls.COLLECTION_NAME), pola), limit, kursor
+        )
+
+    @classmethod
+    async def strumieniuj_grupy(
+        cls,
+        pola: Optional[List[str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Zwraca kolejne grupy w miarę ich odczytu ze strumienia Firestore."""
+        async for doc in zastosuj_projekcje(db.collection(cls.COLLECTION_NAME), pola).stream():
+            yield doc.to_dict()
+
     @classmethod
     async def aktualizuj_grupe(cls, grupa_id: str, dane_aktualizacji: Dict[str, Any]) -> bool:
-        """Aktualizuje dane istniejącej grupy."""
+        """Aktualizuje dane istniejącej grupy.
+
+        Istnienie grupy, przedmiotu i rola wykładowcy są sprawdzane
+        współbieżnie. Sprawdzenie grupy jest zawsze dokańczane, więc brak
+        grupy daje False także wtedy, gdy inne sprawdzenie zawiodło wcześniej.
+        Odczyty zgłoszone razem trafiają do jednego get_all klienta.
+        """
         try:
             grupa_ref = db.collection(cls.COLLECTION_NAME).document(grupa_id)
-            grupa_doc = grupa_ref.get()
-
-            if not grupa_doc.exists:
-                return False
-
+            sprawdzenia = [_sprawdz_grupe(grupa_ref)]
             pola_do_zapisu = {}
             if 'nazwa' in dane_aktualizacji:
                 pola_do_zapisu['name'] = dane_aktualizacji['nazwa']
 
             if 'przedmiotId' in dane_aktualizacji:
-                subject_id = dane_aktualizacji['przedmiotId']
-                subject_doc = db.collection('subjects').document(subject_id).get()
-                if not subject_doc.exists:
-                    raise ValueError(f"Przedmiot o ID {subject_id} nie istnieje")
-                pola_do_zapisu['subjectId'] = subject_id
+                sprawdzenia.append(_sprawdz_przedmiot(dane_aktualizacji['przedmiotId']))
+                pola_do_zapisu['subjectId'] = dane_aktualizacji['przedmiotId']
 
             if 'wykladowcaId' in dane_aktualizacji:
-                lecturer_id = dane_aktualizacji['wykladowcaId']
-                lecturer_doc = db.collection('users').document(lecturer_id).get()
-                if not lecturer_doc.exists:
-                    raise ValueError(f"Użytkownik o ID {lecturer_id} nie istnieje")
-                lecturer_data = lecturer_doc.to_dict()
-                if lecturer_data.get('role') != 'wykladowca':
-                    raise ValueError(f"Użytkownik o ID {lecturer_id} nie jest wykładowcą")
+                sprawdzenia.append(
+                    _sprawdz_role(dane_aktualizacji['wykladowcaId'], 'wykladowca', 'wykładowcą')
+                )
                 pola_do_zapisu['lecturerId'] = dane_aktualizacji['wykladowcaId']
 
+            try:
+                await _sprawdz_wspolbieznie(*sprawdzenia)
+            except _GrupaNieIstnieje:
+                return False
+
             pola_do_zapisu['updatedAt'] = firestore.SERVER_TIMESTAMP
 
-            grupa_ref.update(pola_do_zapisu)
+            await grupa_ref.update(pola_do_zapisu)
             return True
         except Exception as e:
             raise e
@@ -98,34 +258,49 @@ class RepozytoriumGrup:
     async def usun_grupe(cls, grupa_id: str) -> bool:
         """Usuwa grupę z Firestore."""
         try:
-            db.collection(cls.COLLECTION_NAME).document(grupa_id).delete()
+            await db.collection(cls.COLLECTION_NAME).document(grupa_id).delete()
             return True
         except Exception as e:
             raise e
 
     @classmethod
     async def przypisz_studenta_do_grupy(cls, grupa_id: str, student_id: str) -> bool:
-        """Przypisuje studenta do grupy."""
-        try:
-            user_doc = db.collection('users').document(student_id).get()
-            if not user_doc.exists:
-                raise ValueError(f"Użytkownik o ID {student_id} nie istnieje")
+        """Przypisuje studenta do grupy w transakcji Firestore.
 
-            user_data = user_doc.to_dict()
-            if user_data.get('role') != 'student':
-                raise ValueError(f"Użytkownik o ID {student_id} nie jest studentem")
+        Odczyt użytkownika i grupy oraz zapis odbywają się atomowo, a przy
+        konflikcie z innym zapisem transakcja jest automatycznie ponawiana.
+        Rola nie pochodzi z pamięci podręcznej ról, tylko ją odświeża.
+        """
+        try:
+            transakcja = db.transaction(max_attempts=MAKS_PROB_TRANSAKCJI)
+            return await _przypisz_studenta_w_transakcji(
+                transakcja,
+                db.collection('users').document(student_id),
+                db.collection(cls.COLLECTION_NAME).document(grupa_id),
+                student_id
+            )
+        except Exception as e:
+            raise e
 
-            grupa_doc = db.collection(cls.COLLECTION_NAME).document(grupa_id).get()
-            grupa_data = grupa_doc.to_dict()
-            if student_id in grupa_data.get('studentsIds', []):
-                raise ValueError(f"Student o ID {student_id} jest już przypisany do grupy")
+    @classmethod
+    async def przypisz_studentow_do_grupy(
+        cls,
+        grupa_id: str,
+        studenci_ids: List[str]
+    ) -> Optional[WynikPrzypisaniaStudentow]:
+        """Przypisuje wielu studentów do grupy jednym odczytem i jednym zapisem.
 
-            grupa_ref = db.collection(cls.COLLECTION_NAME).document(grupa_id)
-            grupa_ref.update({
-                'studentsIds': firestore.ArrayUnion([student_id]),
-                'updatedAt': firestore.SERVER_TIMESTAMP
-            })
-            return True
+        Role studentów są czytane w tej samej transakcji co grupa.
+        Zwraca None, jeśli grupa nie istnieje.
+        """
+        try:
+            transakcja = db.transaction(max_attempts=MAKS_PROB_TRANSAKCJI)
+            return await _przypisz_studentow_w_transakcji(
+                transakcja,
+                db.collection(cls.COLLECTION_NAME).document(grupa_id),
+                [db.collection('users').document(student_id)
+                 for student_id in dict.fromkeys(studenci_ids)]
+            )
         except Exception as e:
             raise e
 
@@ -133,16 +308,10 @@ class RepozytoriumGrup:
     async def usun_studenta_z_grupy(cls, grupa_id: str, student_id: str) -> bool:
         """Usuwa studenta z grupy."""
         try:
-            user_doc = db.collection('users').document(student_id).get()
-            if not user_doc.exists:
-                raise ValueError(f"Użytkownik o ID {student_id} nie istnieje")
-
-            user_data = user_doc.to_dict()
-            if user_data.get('role') != 'student':
-                raise ValueError(f"Użytkownik o ID {student_id} nie jest studentem")
+            await _sprawdz_role(student_id, 'student', 'studentem')
 
             grupa_doc = db.collection(cls.COLLECTION_NAME).document(grupa_id)
-            grupa_doc.update({
+            await grupa_doc.update({
                 'studentsIds': firestore.ArrayRemove([student_id]),
                 'updatedAt': firestore.SERVER_TIMESTAMP
             })
@@ -154,15 +323,9 @@ class RepozytoriumGrup:
     async def zmien_wykladowce_grupy(cls, grupa_id: str, wykladowca_id: str) -> bool:
         """Zmienia wykładowcę przypisanego do grupy."""
         try:
-            user_doc = db.collection('users').document(wykladowca_id).get()
-            if not user_doc.exists:
-                raise ValueError(f"Użytkownik o ID {wykladowca_id} nie istnieje")
-
-            user_data = user_doc.to_dict()
-            if user_data.get('role') != 'wykladowca':
-                raise ValueError(f"Użytkownik o ID {wykladowca_id} nie jest wykładowcą")
+            await _sprawdz_role(wykladowca_id, 'wykladowca', 'wykładowcą')
 
-            db.collection(cls.COLLECTION_NAME).document(grupa_id).update({
+            await db.collection(cls.COLLECTION_NAME).document(grupa_id).update({
                 'lecturerId': wykladowca_id,
                 'updatedAt': firestore.SERVER_TIMESTAMP
             })
@@ -0,0 +1,169 @@
+"""Repozytorium zmaterializowanych kart ocen studentów w Firestore."""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from firebase_admin import firestore
+
+from app.konfiguracja.firebase_config import db
+from app.repozytoria.odczyt import pobierz_dokumenty
+from app.repozytoria.przedmiot import RepozytoriumPrzedmiotow
+
+ROZMIAR_PACZKI = 500
+MAKS_ROWNOLEGLYCH_PACZEK = 4
+
+
+def wpis_karty(
+    ocena_id: str,
+    ocena: Dict[str, Any],
+    grupa: Optional[Dict[str, Any]],
+    przedmiot: Optional[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Buduje wpis karty ocen z dokumentu oceny oraz danych grupy i przedmiotu."""
+    grupa = grupa or {}
+    przedmiot = przedmiot or {}
+    return {
+        'gradeId': ocena_id,
+        'groupId': ocena.get('groupId'),
+        'groupName': grupa.get('name'),
+        'subjectId': grupa.get('subjectId'),
+        'subjectName': przedmiot.get('name'),
+        'value': ocena.get('value'),
+        'timestamp': ocena.get('created_at')
+    }
+
+
+class RepozytoriumKartOcen:
+    """Klasa repozytorium do interakcji z kolekcją 'transcripts' w Firestore.
+
+    Dokument 'transcripts/{studentId}' przechowuje mapę 'entries' z wpisem
+    dla każdej oceny studenta, dzięki czemu cała karta jest jednym odczytem.
+    Wpisy są zmieniane w tej samej paczce lub transakcji co ocena, a nazwy
+    grup i przedmiotów są rozpropagowywane po ich zmianie. Zmiana i usunięcie
+    oceny przekazują tu transakcję, w której odczytały ocenę.
+    """
+    COLLECTION_NAME = 'transcripts'
+
+    @classmethod
+    def referencja(cls, student_id: str):
+        """Zwraca referencję dokumentu karty ocen studenta."""
+        return db.collection(cls.COLLECTION_NAME).document(student_id)
+
+    @classmethod
+    def zapisz_wpisy(cls, paczka, student_id: str, wpisy: Dict[str, Dict[str, Any]]) -> None:
+        """Dodaje do paczki lub transakcji zapis (scalenie) wpisów w karcie studenta."""
+        paczka.set(cls.referencja(student_id), {
+            'studentId': student_id,
+            'entries': wpisy,
+            'updatedAt': firestore.SERVER_TIMESTAMP
+        }, merge=True)
+
+    @classmethod
+    def usun_wpis(cls, paczka, student_id: str, ocena_id: str) -> None:
+        """Dodaje do paczki lub transakcji usunięcie wpisu oceny z karty studenta."""
+        paczka.set(cls.referencja(student_id), {
+            'entries': {ocena_id: firestore.DELETE_FIELD},
+            'updatedAt': firestore.SERVER_TIMESTAMP
+        }, merge=True)
+
+    @classmethod
+    async def pobierz_karte(cls, student_id: str) -> Optional[Dict[str, Any]]:
+        """Pobiera kartę ocen studenta z wpisami uporządkowanymi od najstarszego."""
+        karta_doc = await cls.referencja(student_id).get()
+        if not karta_doc.exists:
+            return None
+        karta = karta_doc.to_dict()
+        wpisy = list((karta.get('entries') or {}).values())
+        wpisy.sort(key=lambda wpis: (wpis.get('timestamp') is None, str(wpis.get('timestamp'))))
+        return {
+            'studentId': student_id,
+            'entries': wpisy,
+            'updatedAt': karta.get('updatedAt')
+        }
+
+    @classmethod
+    async def aktualizuj_grupe_w_kartach(
+        cls,
+        grupa_id: str,
+        grupa: Dict[str, Any],
+        przedmiot: Optional[Dict[str, Any]]
+    ) -> int:
+        """Zapisuje od nowa wpisy wszystkich ocen grupy i zwraca ich liczbę.
+
+        Wpisy są budowane w całości z dokumentów ocen, więc ocena, która
+        nie miała jeszcze wpisu w karcie, dostaje pełny wpis.
+        """
+        wpisy_studentow: Dict[str, Dict[str, Any]] = {}
+        oceny_docs = db.collection('grades').where('groupId', '==', grupa_id).stream()
+        async for doc in oceny_docs:
+            ocena = doc.to_dict()
+            if ocena.get('studentId'):
+                wpisy_studentow.setdefault(ocena['studentId'], {})[doc.id] = wpis_karty(
+                    doc.id, ocena, grupa, przedmiot
+                )
+
+        studenci = list(wpisy_studentow)
+        paczki = [studenci[i:i + ROZMIAR_PACZKI] for i in range(0, len(studenci), ROZMIAR_PACZKI)]
+
+        semafor = asyncio.Semaphore(MAKS_ROWNOLEGLYCH_PACZEK)
+
+        async def zapisz_paczke(paczka_studentow: List[str]):
+            async with semafor:
+                batch = db.batch()
+                for student_id in paczka_studentow:
+                    cls.zapisz_wpisy(batch, student_id, wpisy_studentow[student_id])
+                await batch.commit()
+
+        await asyncio.gather(*(zapisz_paczke(p) for p in paczki))
+        return sum(len(wpisy) for wpisy in wpisy_studentow.values())
+
+    @classmethod
+    async def aktualizuj_przedmiot_w_kartach(
+        cls,
+        przedmiot_id: str,
+        przedmiot: Dict[str, Any]
+    ) -> int:
+        """Zapisuje od nowa wpisy ocen wszystkich grup przedmiotu z jego aktualną nazwą."""
+        zmienione = 0
+        grupy_docs = db.collection('groups').where('subjectId', '==', przedmiot_id).stream()
+        async for grupa_doc in grupy_docs:
+            zmienione += await cls.aktualizuj_grupe_w_kartach(
+                grupa_doc.id, grupa_doc.to_dict(), przedmiot
+            )
+        return zmienione
+
+    @classmethod
+    async def przelicz_karte(cls, student_id: str) -> Dict[str, Any]:
+        """Odtwarza kartę ocen studenta od zera na podstawie jego ocen."""
+        oceny = {}
+        oceny_docs = db.collection('grades').where('studentId', '==', student_id).stream()
+        async for doc in oceny_docs:
+            oceny[doc.id] = doc.to_dict()
+
+        grupy_ids = list(dict.fromkeys(
+            o.get('groupId') for o in oceny.values() if o.get('groupId')
+        ))
+        grupy = {}
+        if grupy_ids:
+            grupy_docs = await pobierz_dokumenty(
+                db, [db.collection('groups').document(grupa_id) for grupa_id in grupy_ids]
+            )
+            grupy = {
+                grupa_id: grupa_doc.to_dict()
+                for grupa_id, grupa_doc in zip(grupy_ids, grupy_docs) if grupa_doc.exists
+            }
+        przedmioty = await RepozytoriumPrzedmiotow.pobierz_przedmioty_z_katalogu(
+            list(dict.fromkeys(g.get('subjectId') for g in grupy.values() if g.get('subjectId')))
+        )
+
+        wpisy = {}
+        for ocena_id, ocena in oceny.items():
+            grupa = grupy.get(ocena.get('groupId'))
+            przedmiot = przedmioty.get((grupa or {}).get('subjectId'))
+            wpisy[ocena_id] = wpis_karty(ocena_id, ocena, grupa, przedmiot)
+        await cls.referencja(student_id).set({
+            'studentId': student_id,
+            'entries': wpisy,
+            'updatedAt': firestore.SERVER_TIMESTAMP
+        })
+        return {'studentId': student_id, 'entries': list(wpisy.values())}
@@ -1,12 +1,135 @@
 """Repozytorium do zarządzania danymi ocen w Firestore."""
 
-from typing import Dict, List, Optional, Any
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
 from datetime import datetime
 
 from firebase_admin import firestore
 
-from app.modele.ocena import Ocena, OcenaTworzenie
+from app.modele.ocena import Ocena, OcenaTworzenie, WynikImportuOceny
 from app.konfiguracja.firebase_config import db
+from app.konfiguracja.mapa_tozsamosci import zapamietaj_zapis
+from app.repozytoria.karta_ocen import RepozytoriumKartOcen, wpis_karty
+from app.repozytoria.odczyt import pobierz_dokumenty
+from app.repozytoria.podsumowanie_ocen import ZmianyPodsumowan
+from app.repozytoria.przedmiot import RepozytoriumPrzedmiotow
+from app.repozytoria.stronicowanie import pobierz_strone, zastosuj_projekcje
+from app.repozytoria.uzytkownik_rep import RepozytoriumUzytkownikow
+
+ROZMIAR_PACZKI = 500
+MAKS_ROWNOLEGLYCH_PACZEK = 4
+MAKS_WARTOSCI_IN = 30
+MAKS_PROB_TRANSAKCJI = 10
+
+
+@firestore.async_transactional
+async def _aktualizuj_ocene_w_transakcji(
+    transakcja,
+    ocena_ref,
+    dane_oceny: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """Zwraca dane oceny po zmianie albo None, gdy nie było czego zmienić."""
+    ocena_id = ocena_ref.id
+    referencje = [ocena_ref]
+    if 'grupaId' in dane_oceny:
+        referencje.append(db.collection('groups').document(dane_oceny['grupaId']))
+    rola_studenta = None
+    if 'studentId' in dane_oceny:
+        rola_studenta = RepozytoriumUzytkownikow.rola_z_pamieci(dane_oceny['studentId'])
+        if rola_studenta is None:
+            referencje.append(db.collection('users').document(dane_oceny['studentId']))
+    ocena_doc, *dokumenty = await pobierz_dokumenty(db, referencje, transakcja)
+    if not ocena_doc.exists:
+        raise ValueError(f"Ocena o ID {ocena_id} nie istnieje")
+
+    ocena_data = ocena_doc.to_dict()
+    update_data = {}
+    group_doc = None
+    grupa_data = None
+
+    if 'studentId' in dane_oceny:
+        student_id = dane_oceny['studentId']
+        if rola_studenta is None:
+            rola_studenta = RepozytoriumUzytkownikow.zapamietaj_role(student_id, dokumenty.pop())
+        if rola_studenta is None:
+            raise ValueError(f"Student o ID {student_id} nie istnieje")
+        update_data['studentId'] = student_id
+
+    if 'grupaId' in dane_oceny:
+        group_id = dane_oceny['grupaId']
+        group_doc = dokumenty.pop(0)
+        if not group_doc.exists:
+            raise ValueError(f"Grupa o ID {group_id} nie istnieje")
+        update_data['groupId'] = group_id
+
+    current_student_id = update_data.get('studentId', ocena_data.get('studentId'))
+    current_group_id = update_data.get('groupId', ocena_data.get('groupId'))
+
+    if current_student_id and current_group_id:
+        if group_doc is None:
+            group_doc, = await pobierz_dokumenty(
+                db, [db.collection('groups').document(current_group_id)], transakcja
+            )
+        if group_doc.exists:
+            grupa_data = group_doc.to_dict()
+            if current_student_id not in grupa_data.get('studentsIds', []):
+                raise ValueError(
+                    f"Student o ID {current_student_id} nie należy do grupy o ID {current_group_id}"
+                )
+        else:
+            raise ValueError(
+                f"Grupa o ID {current_group_id} nie istnieje do sprawdzenia przynależności studenta"
+            )
+
+    if 'wartoscOceny' in dane_oceny:
+        update_data['value'] = dane_oceny['wartoscOceny']
+
+    if 'wystawionePrzez' in dane_oceny:
+        update_data['givenBy'] = dane_oceny['wystawionePrzez']
+
+    if not update_data:
+        return None
+
+    transakcja.update(ocena_ref, update_data)
+    if update_data.keys() & {'studentId', 'groupId', 'value'}:
+        poprzedni_student_id = ocena_data.get('studentId')
+        if poprzedni_student_id and poprzedni_student_id != current_student_id:
+            RepozytoriumKartOcen.usun_wpis(transakcja, poprzedni_student_id, ocena_id)
+        if current_student_id:
+            przedmiot_data = None
+            if grupa_data and grupa_data.get('subjectId'):
+                przedmiot_data = await RepozytoriumPrzedmiotow.pobierz_przedmiot_z_katalogu(
+                    grupa_data['subjectId']
+                )
+            RepozytoriumKartOcen.zapisz_wpisy(transakcja, current_student_id, {
+                ocena_id: wpis_karty(
+                    ocena_id, {**ocena_data, **update_data}, grupa_data, przedmiot_data
+                )
+            })
+    if 'value' in update_data or 'groupId' in update_data:
+        zmiany = ZmianyPodsumowan()
+        if ocena_data.get('groupId'):
+            zmiany.usun(ocena_data['groupId'], ocena_data.get('value'))
+        if current_group_id:
+            zmiany.dodaj(current_group_id, update_data.get('value', ocena_data.get('value')))
+        zmiany.zapisz(transakcja)
+    return {**ocena_data, **update_data}
+
+
+@firestore.async_transactional
+async def _usun_ocene_w_transakcji(transakcja, ocena_ref) -> None:
+    ocena_doc, = await pobierz_dokumenty(db, [ocena_ref], transakcja)
+    if not ocena_doc.exists:
+        return
+
+    ocena_data = ocena_doc.to_dict()
+    transakcja.delete(ocena_ref)
+    if ocena_data.get('studentId'):
+        RepozytoriumKartOcen.usun_wpis(transakcja, ocena_data['studentId'], ocena_ref.id)
+    if ocena_data.get('groupId'):
+        zmiany = ZmianyPodsumowan()
+        zmiany.usun(ocena_data['groupId'], ocena_data.get('value'))
+        zmiany.zapisz(transakcja)
 
 
 class RepozytoriumOcen:
@@ -17,11 +140,16 @@ class RepozytoriumOcen:
     async def utworz_ocene(cls, dane_oceny: OcenaTworzenie) -> Ocena:
         """Tworzy nową ocenę w Firestore."""
         try:
-            student_doc = db.collection('users').document(dane_oceny.studentId).get()
-            if not student_doc.exists:
+            referencje = [db.collection('groups').document(dane_oceny.grupaId)]
+            rola = RepozytoriumUzytkownikow.rola_z_pamieci(dane_oceny.studentId)
+            if rola is None:
+                referencje.append(db.collection('users').document(dane_oceny.studentId))
+            group_doc, *dokumenty = await pobierz_dokumenty(db, referencje)
+            if dokumenty:
+                rola = RepozytoriumUzytkownikow.zapamietaj_role(dane_oceny.studentId, dokumenty[0])
+            if rola is None:
                 raise ValueError(f"Student o ID {dane_oceny.studentId} nie istnieje")
 
-            group_doc = db.collection('groups').document(dane_oceny.grupaId).get()
             if not group_doc.exists:
                 raise ValueError(f"Grupa o ID {dane_oceny.grupaId} nie istnieje")
 
@@ -38,7 +166,22 @@ class RepozytoriumOcen:
                 'created_at': firestore.SERVER_TIMESTAMP,
                 'givenBy': dane_oceny.wystawionePrzez
             }
-            ocena_doc_ref.set(ocena_info)
+            przedmiot_data = None
+            if grupa_data.get('subjectId'):
+                przedmiot_data = await RepozytoriumPrzedmiotow.pobierz_przedmiot_z_katalogu(
+                    grupa_data['subjectId']
+                )
+            zmiany = ZmianyPodsumowan()
+            zmiany.dodaj(dane_oceny.grupaId, dane_oceny.wartoscOceny)
+            batch = db.batch()
+            batch.set(ocena_doc_ref, ocena_info)
+            zmiany.zapisz(batch)
+            RepozytoriumKartOcen.zapisz_wpisy(batch, dane_oceny.studentId, {
+                ocena_doc_ref.id: wpis_karty(
+                    ocena_doc_ref.id, ocena_info, grupa_data, przedmiot_data
+                )
+            })
+            await batch.commit()
 
             return Ocena(
                 ocenaId=ocena_doc_ref.id,
@@ -50,10 +193,113 @@ class RepozytoriumOcen:
         except Exception as e:
             raise e
 
+    @classmethod
+    async def utworz_oceny_hurtowo(cls, oceny: List[OcenaTworzenie]) -> List[WynikImportuOceny]:
+        """Tworzy wiele ocen naraz i zwraca wynik dla każdego wiersza.
+
+        Każda grupa jest odczytywana raz, a przynależność studentów jest
+        sprawdzana względem jej listy 'studentsIds'. Poprawne wiersze są
+        zapisywane paczkami najwyżej ROZMIAR_PACZKI operacji, razem
+        z przyrostami podsumowań grup i wpisami kart ocen studentów.
+        """
+        grupy_ids = list(dict.fromkeys(ocena.grupaId for ocena in oceny))
+        grupy_docs = []
+        if grupy_ids:
+            grupy_docs = await pobierz_dokumenty(
+                db, [db.collection('groups').document(grupa_id) for grupa_id in grupy_ids]
+            )
+        grupy = {
+            grupa_id: grupa_doc.to_dict()
+            for grupa_id, grupa_doc in zip(grupy_ids, grupy_docs)
+            if grupa_doc.exists
+        }
+        studenci_grup = {
+            grupa_id: set(grupa_data.get('studentsIds', []))
+            for grupa_id, grupa_data in grupy.items()
+        }
+
+        wyniki = {}
+        do_zapisu = []
+        for indeks, ocena in enumerate(oceny):
+            studenci = studenci_grup.get(ocena.grupaId)
+            if studenci is None:
+                wyniki[indeks] = WynikImportuOceny(
+                    indeks=indeks, blad=f"Grupa o ID {ocena.grupaId} nie istnieje"
+                )
+            elif ocena.studentId not in studenci:
+                wyniki[indeks] = WynikImportuOceny(
+                    indeks=indeks, blad=f"Student o ID {ocena.studentId} nie należy do grupy"
+                )
+            else:
+                do_zapisu.append((indeks, db.collection(cls.COLLECTION_NAME).document(), ocena))
+
+        przedmioty = {}
+        if do_zapisu:
+            przedmioty_ids = list(dict.fromkeys(
+                grupy[ocena.grupaId].get('subjectId')
+                for _, _, ocena in do_zapisu if grupy[ocena.grupaId].get('subjectId')
+            ))
+            przedmioty = await RepozytoriumPrzedmiotow.pobierz_przedmioty_z_katalogu(przedmioty_ids)
+
+        semafor = asyncio.Semaphore(MAKS_ROWNOLEGLYCH_PACZEK)
+
+        async def zapisz_paczke(paczka):
+            async with semafor:
+                batch = db.batch()
+                zmiany = ZmianyPodsumowan()
+                wpisy_studentow = {}
+                for _, ocena_doc_ref, ocena in paczka:
+                    ocena_info = {
+                        'id': ocena_doc_ref.id,
+                        'studentId': ocena.studentId,
+                        'groupId': ocena.grupaId,
+                        'value': ocena.wartoscOceny,
+                        'created_at': firestore.SERVER_TIMESTAMP,
+                        'givenBy': ocena.wystawionePrzez
+                    }
+                    batch.set(ocena_doc_ref, ocena_info)
+                    zmiany.dodaj(ocena.grupaId, ocena.wartoscOceny)
+                    grupa_data = grupy[ocena.grupaId]
+                    wpisy_studentow.setdefault(ocena.studentId, {})[ocena_doc_ref.id] = wpis_karty(
+                        ocena_doc_ref.id, ocena_info, grupa_data,
+                        przedmioty.get(grupa_data.get('subjectId'))
+                    )
+                zmiany.zapisz(batch)
+                for student_id, wpisy in wpisy_studentow.items():
+                    RepozytoriumKartOcen.zapisz_wpisy(batch, student_id, wpisy)
+                await batch.commit()
+
+        paczki = []
+        paczka, grupy_paczki, studenci_paczki = [], set(), set()
+        for wiersz in do_zapisu:
+            ocena = wiersz[2]
+            grupy_po_dodaniu = grupy_paczki | {ocena.grupaId}
+            studenci_po_dodaniu = studenci_paczki | {ocena.studentId}
+            operacje = len(paczka) + 1 + len(grupy_po_dodaniu) + len(studenci_po_dodaniu)
+            if paczka and operacje > ROZMIAR_PACZKI:
+                paczki.append(paczka)
+                paczka = []
+                grupy_po_dodaniu, studenci_po_dodaniu = {ocena.grupaId}, {ocena.studentId}
+            paczka.append(wiersz)
+            grupy_paczki, studenci_paczki = grupy_po_dodaniu, studenci_po_dodaniu
+        if paczka:
+            paczki.append(paczka)
+        bledy = await asyncio.gather(*(zapisz_paczke(p) for p in paczki), return_exceptions=True)
+        for paczka, blad in zip(paczki, bledy):
+            for indeks, ocena_doc_ref, _ in paczka:
+                if isinstance(blad, Exception):
+                    wyniki[indeks] = WynikImportuOceny(
+                        indeks=indeks, blad=f"Błąd zapisu paczki ocen: {blad}"
+                    )
+                else:
+                    wyniki[indeks] = WynikImportuOceny(indeks=indeks, ocenaId=ocena_doc_ref.id)
+
+        return [wyniki[indeks] for indeks in range(len(oceny))]
+
     @classmethod
     async def pobierz_ocene_po_id(cls, ocena_id: str) -> Optional[Dict[str, Any]]:
         """Pobiera dane oceny na podstawie jej ID."""
-        ocena_doc = db.collection(cls.COLLECTION_NAME).document(ocena_id).get()
+        ocena_doc = await db.collection(cls.COLLECTION_NAME).document(ocena_id).get()
         if ocena_doc.exists:
             return ocena_doc.to_dict()
         return None
@@ -67,7 +313,7 @@ class RepozytoriumOcen:
             .where('studentId', '==', student_id)
             .stream()
         )
-        for doc in oceny_docs:
+        async for doc in oceny_docs:
             oceny.append(doc.to_dict())
         return oceny
 
@@ -76,66 +322,77 @@ class RepozytoriumOcen:
         """Pobiera dane wszystkich ocen dla danej grupy."""
         oceny = []
         oceny_docs = db.collection(cls.COLLECTION_NAME).where('groupId', '==', grupa_id).stream()
-        for doc in oceny_docs:
+        async for doc in oceny_docs:
             oceny.append(doc.to_dict())
         return oceny
 
     @classmethod
-    async def pobierz_wszystkie_oceny(cls) -> List[Dict[str, Any]]:
+    async def pobierz_wartosci_ocen_grup(cls, grupy_ids: List[str]) -> List[Any]:
+        """Pobiera same wartości ocen wskazanych grup, bez pozostałych pól dokumentów."""
+        wartosci = []
+        for i in range(0, len(grupy_ids), MAKS_WARTOSCI_IN):
+            oceny_docs = (
+                db.collection(cls.COLLECTION_NAME)
+                .where('groupId', 'in', grupy_ids[i:i + MAKS_WARTOSCI_IN])
+                .select(['value'])
+                .stream()
+            )
+            async for doc in oceny_docs:
+                wartosci.append(doc.to_dict().get('value'))
+        return wartosci
+
+    @classmethod
+    async def pobierz_wszystkie_oceny(
+        cls,
+        pola: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
         """Pobiera dane wszystkich ocen z Firestore."""
         oceny = []
-        oceny_docs = db.collection(cls.COLLECTION_NAME).stream()
-        for doc in oceny_docs:
+        oceny_docs = zastosuj_projekcje(db.collection(cls.COLLECTION_NAME), pola).stream()
+        async for doc in oceny_docs:
             oceny.append(doc.to_dict())
         return oceny
 
     @classmethod
-    async def aktualizuj_ocene(cls, ocena_id: str, dane_oceny: Dict[str, Any]) -> bool:
-        """Aktualizuje dane istniejącej oceny."""
-        try:
-            ocena_ref = db.collection(cls.COLLECTION_NAME).document(ocena_id)
-            ocena_doc = ocena_ref.get()
-            if not ocena_doc.exists:
-                raise ValueError(f"Ocena o ID {ocena_id} nie istnieje")
-
-            update_data = {}
-
-            if 'studentId' in dane_oceny:
-                student_id = dane_oceny['studentId']
-                student_doc = db.collection('users').document(student_id).get()
-                if not student_doc.exists:
-                    raise ValueError(f"Student o ID {student_id} nie istnieje")
-                update_data['studentId'] = student_id
-
-            if 'grupaId' in dane_oceny:
-                group_id = dane_oceny['grupaId']
-                group_doc = db.collection('groups').document(group_id).get()
-                if not group_doc.exists:
-                    raise ValueError(f"Grupa o ID {group_id} nie istnieje")
-                update_data['groupId'] = group_id
-
-            current_student_id = update_data.get('studentId', ocena_doc.to_dict().get('studentId'))
-            current_group_id = update_data.get('groupId', ocena_doc.to_dict().get('groupId'))
-
-            if current_student_id and current_group_id:
-                group_doc_for_check = db.collection('groups').document(current_group_id).get()
-                if group_doc_for_check.exists:
-                    grupa_data = group_doc_for_check.to_dict()
-                    if current_student_id not in grupa_data.get('studentsIds', []):
-                        raise ValueError(f"Student o ID {current_student_id} nie należy do grupy o ID {current_group_id}")
-                else:
-                    raise ValueError(f"Grupa o ID {current_group_id} nie istnieje do sprawdzenia przynależności studenta")
-
-            if 'wartoscOceny' in dane_oceny:
-                update_data['value'] = dane_oceny['wartoscOceny']
+    async def pobierz_strone_ocen(
+        cls,
+        limit: int,
+        kursor: Optional[str] = None,
+        pola: Optional[List[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Pobiera jedną stronę ocen uporządkowaną po ID dokumentu."""
+        return await pobierz_strone(
+            zastosuj_projekcje(db.collection(cls.COLLECTION_NAME), pola), limit, kursor
+        )
 
-            if 'wystawionePrzez' in dane_oceny:
-                update_data['givenBy'] = dane_oceny['wystawionePrzez']
+    @classmethod
+    async def strumieniuj_oceny(
+        cls,
+        pola: Optional[List[str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Zwraca kolejne oceny w miarę ich odczytu ze strumienia Firestore."""
+        async for doc in zastosuj_projekcje(db.collection(cls.COLLECTION_NAME), pola).stream():
+            yield doc.to_dict()
 
-            if not update_data:
-                return True
+    @classmethod
+    async def aktualizuj_ocene(cls, ocena_id: str, dane_oceny: Dict[str, Any]) -> bool:
+        """Aktualizuje dane istniejącej oceny w transakcji.
 
-            ocena_ref.update(update_data)
+        Odczyt oceny i zapisy oceny, podsumowań grup oraz kart studentów
+        są atomowe, więc współbieżna zmiana lub usunięcie tej samej oceny
+        ponawia transakcję zamiast rozjechać podsumowanie i karty.
+        """
+        try:
+            if 'wartoscOceny' in dane_oceny and not str(dane_oceny['wartoscOceny']).strip():
+                raise ValueError("Wartość oceny nie może być pusta")
+            ocena_ref = db.collection(cls.COLLECTION_NAME).document(ocena_id)
+            transakcja = db.transaction(max_attempts=MAKS_PROB_TRANSAKCJI)
+            dane_po_zmianie = await _aktualizuj_ocene_w_transakcji(
+                transakcja, ocena_ref, dane_oceny
+            )
+            wyniki = getattr(transakcja, 'wyniki', None)
+            if dane_po_zmianie is not None and wyniki:
+                zapamietaj_zapis(ocena_ref, dane_po_zmianie, wyniki[0].update_time)
             return True
         except ValueError as ve:
             raise ve
@@ -144,9 +401,16 @@ class RepozytoriumOcen:
 
     @classmethod
     async def usun_ocene(cls, ocena_id: str) -> bool:
-        """Usuwa ocenę z Firestore."""
+        """Usuwa ocenę z Firestore razem z jej śladem w podsumowaniu grupy i karcie studenta.
+
+        Odczyt i zapisy odbywają się w jednej transakcji, więc ocena
+        usuwana współbieżnie jest odliczana z podsumowania tylko raz.
+        """
         try:
-            db.collection(cls.COLLECTION_NAME).document(ocena_id).delete()
+            transakcja = db.transaction(max_attempts=MAKS_PROB_TRANSAKCJI)
+            await _usun_ocene_w_transakcji(
+                transakcja, db.collection(cls.COLLECTION_NAME).document(ocena_id)
+            )
             return True
         except Exception as e:
             raise e
@@ -0,0 +1,34 @@
+"""Pomocnicze funkcje odczytu wielu dokumentów Firestore w jednym zapytaniu."""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+async def pobierz_dokumenty(
+    klient: Any,
+    referencje: Sequence[Any],
+    transakcja: Optional[Any] = None
+) -> List[Any]:
+    """Pobiera dokumenty jednym wywołaniem get_all, opcjonalnie w transakcji.
+
+    Firestore nie gwarantuje kolejności wyników, dlatego snapshoty są
+    zwracane w kolejności przekazanych referencji.
+    """
+    wedlug_sciezki = {}
+    async for snapshot in klient.get_all(list(referencje), transaction=transakcja):
+        wedlug_sciezki[snapshot.reference.path] = snapshot
+    return [wedlug_sciezki[referencja.path] for referencja in referencje]
+
+
+async def pobierz_z_wersja(referencja: Any) -> Tuple[Optional[Dict[str, Any]], Optional[datetime]]:
+    """Pobiera dane dokumentu wraz z czasem jego ostatniego zapisu.
+
+    Zapytania warunkowe też czytają cały dokument: odczyt z projekcją
+    kosztuje w Firestore tyle samo, a osobne sprawdzenie wersji dokładałoby
+    drugi odczyt, gdy kopia klienta jest nieaktualna.
+    """
+    snapshot = await referencja.get()
+    if not snapshot.exists:
+        return None, None
+    return snapshot.to_dict(), snapshot.update_time
+
@@ -0,0 +1,138 @@
+"""Pamięć podręczna procesu dla rzadko zmieniających się danych z Firestore."""
+
+import asyncio
+import contextvars
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from cachetools import LRUCache, TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class PamiecPodreczna:
+    """Słownik z czasem życia wpisów i usuwaniem najdawniej używanych (LRU)."""
+
+    def __init__(self, maks_rozmiar: int, ttl_sekundy: float):
+        self._dane = TTLCache(maxsize=maks_rozmiar, ttl=ttl_sekundy)
+
+    def __contains__(self, klucz: Hashable) -> bool:
+        return klucz in self._dane
+
+    def pobierz(self, klucz: Hashable, domyslna: Any = None) -> Any:
+        """Zwraca wartość spod klucza albo wartość domyślną, gdy wpis wygasł."""
+        return self._dane.get(klucz, domyslna)
+
+    def zapisz(self, klucz: Hashable, wartosc: Any) -> None:
+        """Zapisuje wartość, odnawiając jej czas życia."""
+        self._dane[klucz] = wartosc
+
+    def uniewaznij(self, klucz: Hashable) -> None:
+        """Usuwa wpis, aby następny odczyt trafił do Firestore."""
+        self._dane.pop(klucz, None)
+
+    def wyczysc(self) -> None:
+        """Usuwa wszystkie wpisy."""
+        self._dane.clear()
+
+
+class PamiecOdswiezanaWTle:
+    """Wyniki wczytywane asynchronicznie i odświeżane w tle (stale-while-revalidate).
+
+    Wpis starszy niż czas świeżości jest zwracany od razu, a jedno zadanie
+    w tle wczytuje go ponownie. Brakujący wpis lub starszy niż maksymalny wiek
+    jest wczytywany na miejscu, a współbieżne odczyty klucza czekają na jedno
+    wczytanie. Unieważnienie odrzuca wyniki wczytań rozpoczętych przed nim.
+    Zwracane wartości są współdzielone i nie mogą być modyfikowane.
+    Liczba wpisów jest ograniczona, a nadmiarowe są usuwane wg LRU.
+    """
+
+    def __init__(
+        self,
+        maks_rozmiar: int,
+        swiezosc_sekundy: float,
+        maks_wiek_sekundy: float,
+        zegar: Callable[[], float] = time.monotonic
+    ):
+        self.swiezosc_sekundy = swiezosc_sekundy
+        self.maks_wiek_sekundy = maks_wiek_sekundy
+        self._zegar = zegar
+        self._wpisy: LRUCache = LRUCache(maxsize=maks_rozmiar)
+        self._wczytywane: Dict[Hashable, asyncio.Task] = {}
+        self._pokolenie = 0
+
+    async def pobierz(self, klucz: Hashable, wczytaj: Callable[[], Awaitable[Any]]) -> Any:
+        """Zwraca wartość spod klucza.
+
+        Przy braku wpisu lub po czasie świeżości wartość jest wczytywana funkcją 'wczytaj'.
+        """
+        wpis = self._wpisy.get(klucz)
+        if wpis is not None:
+            zapisano, wartosc = wpis
+            wiek = self._zegar() - zapisano
+            if wiek < self.maks_wiek_sekundy:
+                if wiek >= self.swiezosc_sekundy and klucz not in self._wczytywane:
+                    # Odświeżenie w tle nie należy do zapytania, które je wywołało.
+                    self._wczytaj(klucz, wczytaj, contextvars.Context())
+                return wartosc
+        zadanie = self._wczytywane.get(klucz) or self._wczytaj(klucz, wczytaj)
+        return await asyncio.shield(zadanie)
+
+    def _wczytaj(
+        self,
+        klucz: Hashable,
+        wczytaj: Callable[[], Awaitable[Any]],
+        kontekst: Optional[contextvars.Context] = None
+    ) -> asyncio.Task:
+        zadanie = asyncio.get_running_loop().create_task(
+            self._wczytaj_i_zapisz(klucz, wczytaj, self._pokolenie), context=kontekst
+        )
+        self._wczytywane[klucz] = zadanie
+        w_tle = kontekst is not None
+        zadanie.add_done_callback(lambda zakonczone: self._zakoncz(klucz, zakonczone, w_tle=w_tle))
+        return zadanie
+
+    async def _wczytaj_i_zapisz(
+        self,
+        klucz: Hashable,
+        wczytaj: Callable[[], Awaitable[Any]],
+        pokolenie: int
+    ) -> Any:
+        wartosc = await wczytaj()
+        if pokolenie == self._pokolenie:
+            self._wpisy[klucz] = (self._zegar(), wartosc)
+        return wartosc
+
+    def _zakoncz(self, klucz: Hashable, zadanie: asyncio.Task, w_tle: bool) -> None:
+        if self._wczytywane.get(klucz) is zadanie:
+            del self._wczytywane[klucz]
+        if w_tle and not zadanie.cancelled() and zadanie.exception() is not None:
+            logger.warning("Nieudane odświeżenie w tle wpisu %r: %s", klucz, zadanie.exception())
+
+    def uniewaznij(self) -> None:
+        """Usuwa wszystkie wpisy i odrzuca wyniki trwających wczytań."""
+        self._pokolenie += 1
+        self._wpisy.clear()
+        self._wczytywane.clear()
+
+    def wyczysc(self) -> None:
+        """Usuwa wszystkie wpisy."""
+        self.uniewaznij()
+
+
+pamiec_rol_uzytkownikow = PamiecPodreczna(maks_rozmiar=50000, ttl_sekundy=300)
+pamiec_przedmiotow = PamiecPodreczna(maks_rozmiar=10000, ttl_sekundy=3600)
+pamiec_listy_przedmiotow = PamiecOdswiezanaWTle(
+    maks_rozmiar=1, swiezosc_sekundy=30, maks_wiek_sekundy=600
+)
+pamiec_listy_grup = PamiecOdswiezanaWTle(
+    maks_rozmiar=1, swiezosc_sekundy=30, maks_wiek_sekundy=600
+)
+
+wszystkie_pamieci = [
+    pamiec_rol_uzytkownikow,
+    pamiec_przedmiotow,
+    pamiec_listy_przedmiotow,
+    pamiec_listy_grup,
+]
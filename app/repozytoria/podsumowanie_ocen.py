@@ -0,0 +1,129 @@
+"""Repozytorium zdenormalizowanych podsumowań ocen grup w Firestore."""
+
+import math
+from typing import Any, Dict, Optional
+
+from firebase_admin import firestore
+from google.cloud.firestore_v1.field_path import FieldPath
+
+from app.konfiguracja.firebase_config import db
+
+BRAK_WARTOSCI = '(brak)'
+
+
+def wartosc_liczbowa(wartosc: Any) -> Optional[float]:
+    """Zamienia wartość oceny na skończoną liczbę lub zwraca None dla ocen nieliczbowych."""
+    try:
+        liczba = float(str(wartosc).replace(',', '.'))
+    except (TypeError, ValueError):
+        return None
+    return liczba if math.isfinite(liczba) else None
+
+
+def klucz_rozkladu(wartosc: Any) -> str:
+    """Zwraca klucz rozkładu ocen: równe liczby ("4,5", "4.5") dają ten sam klucz."""
+    liczba = wartosc_liczbowa(wartosc)
+    if liczba is not None:
+        return str(int(liczba)) if liczba.is_integer() else repr(liczba)
+    tekst = '' if wartosc is None else str(wartosc).strip()
+    return tekst or BRAK_WARTOSCI
+
+
+def pole_rozkladu(klucz: str) -> FieldPath:
+    """Zwraca ścieżkę licznika wartości w mapie rozkładu; kropki w kluczu nie dzielą ścieżki."""
+    return FieldPath('distribution', klucz)
+
+
+class ZmianyPodsumowan:
+    """Zbiera przyrosty podsumowań kilku grup przed zapisem w jednej paczce."""
+
+    def __init__(self):
+        self._zmiany: Dict[str, Dict[str, Any]] = {}
+
+    def dodaj(self, grupa_id: str, wartosc: Any, znak: int = 1) -> None:
+        """Dolicza (znak=1) lub odlicza (znak=-1) jedną ocenę w podsumowaniu grupy."""
+        zmiana = self._zmiany.setdefault(grupa_id, {
+            'count': 0, 'numericCount': 0, 'sum': 0.0, 'distribution': {}
+        })
+        zmiana['count'] += znak
+        liczba = wartosc_liczbowa(wartosc)
+        if liczba is not None:
+            zmiana['numericCount'] += znak
+            zmiana['sum'] += znak * liczba
+        klucz = klucz_rozkladu(wartosc)
+        zmiana['distribution'][klucz] = zmiana['distribution'].get(klucz, 0) + znak
+
+    def usun(self, grupa_id: str, wartosc: Any) -> None:
+        """Odlicza jedną ocenę z podsumowania grupy."""
+        self.dodaj(grupa_id, wartosc, -1)
+
+    def zapisz(self, paczka) -> None:
+        """Dodaje do paczki zapisy niezerowych przyrostów podsumowań."""
+        for grupa_id, zmiana in self._zmiany.items():
+            rozklad = {}
+            for klucz, ile in zmiana['distribution'].items():
+                if ile:
+                    _, pole = pole_rozkladu(klucz).parts
+                    rozklad[pole] = firestore.Increment(ile)
+            if not rozklad and not zmiana['count']:
+                continue
+            dane = {
+                'groupId': grupa_id,
+                'count': firestore.Increment(zmiana['count']),
+                'numericCount': firestore.Increment(zmiana['numericCount']),
+                'sum': firestore.Increment(zmiana['sum']),
+                'updatedAt': firestore.SERVER_TIMESTAMP
+            }
+            if rozklad:
+                dane['distribution'] = rozklad
+            paczka.set(RepozytoriumPodsumowanOcen.referencja(grupa_id), dane, merge=True)
+
+
+class RepozytoriumPodsumowanOcen:
+    """Klasa repozytorium do interakcji z kolekcją 'groupGradeSummaries' w Firestore.
+
+    Dokument podsumowania ma ID grupy i zawiera liczbę ocen, sumę ocen
+    liczbowych, rozkład wartości oraz czas ostatniej zmiany. Jest
+    aktualizowany przyrostowo w tej samej paczce co zapis oceny.
+    """
+    COLLECTION_NAME = 'groupGradeSummaries'
+
+    @classmethod
+    def referencja(cls, grupa_id: str):
+        """Zwraca referencję dokumentu podsumowania grupy."""
+        return db.collection(cls.COLLECTION_NAME).document(grupa_id)
+
+    @classmethod
+    async def pobierz_podsumowanie(cls, grupa_id: str) -> Optional[Dict[str, Any]]:
+        """Pobiera podsumowanie ocen grupy lub None, gdy grupa nie ma jeszcze ocen."""
+        podsumowanie_doc = await cls.referencja(grupa_id).get()
+        if not podsumowanie_doc.exists:
+            return None
+        podsumowanie = podsumowanie_doc.to_dict()
+        liczba_liczbowych = podsumowanie.get('numericCount', 0)
+        podsumowanie['mean'] = (
+            podsumowanie.get('sum', 0) / liczba_liczbowych if liczba_liczbowych else None
+        )
+        return podsumowanie
+
+    @classmethod
+    async def przelicz_podsumowanie(cls, grupa_id: str) -> Dict[str, Any]:
+        """Odtwarza podsumowanie grupy od zera na podstawie wszystkich jej ocen."""
+        podsumowanie = {
+            'groupId': grupa_id, 'count': 0, 'numericCount': 0, 'sum': 0.0, 'distribution': {}
+        }
+        oceny_docs = db.collection('grades').where('groupId', '==', grupa_id).stream()
+        async for doc in oceny_docs:
+            wartosc = doc.to_dict().get('value')
+            podsumowanie['count'] += 1
+            liczba = wartosc_liczbowa(wartosc)
+            if liczba is not None:
+                podsumowanie['numericCount'] += 1
+                podsumowanie['sum'] += liczba
+            klucz = klucz_rozkladu(wartosc)
+            podsumowanie['distribution'][klucz] = podsumowanie['distribution'].get(klucz, 0) + 1
+        await cls.referencja(grupa_id).set({
+            **podsumowanie,
+            'updatedAt': firestore.SERVER_TIMESTAMP
+        })
+        return podsumowanie
@@ -1,11 +1,16 @@
 """Repozytorium do zarządzania danymi przedmiotów w Firestore."""
 
-from typing import Dict, List, Optional, Any
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
 
 from firebase_admin import firestore
+from google.api_core import exceptions
 
 from app.modele.przedmiot import Przedmiot, PrzedmiotTworzenie
 from app.konfiguracja.firebase_config import db
+from app.repozytoria.odczyt import pobierz_dokumenty, pobierz_z_wersja
+from app.repozytoria.pamiec_podreczna import pamiec_przedmiotow
+from app.repozytoria.stronicowanie import pobierz_strone, zastosuj_projekcje
 
 
 class RepozytoriumPrzedmiotow:
@@ -24,7 +29,12 @@ class RepozytoriumPrzedmiotow:
                 'created_at': firestore.SERVER_TIMESTAMP
             }
 
-            przedmiot_doc_ref.set(przedmiot_info)
+            await przedmiot_doc_ref.set(przedmiot_info)
+            pamiec_przedmiotow.zapisz(przedmiot_doc_ref.id, {
+                'id': przedmiot_doc_ref.id,
+                'name': dane_przedmiotu.nazwa,
+                'description': dane_przedmiotu.opis
+            })
 
             return Przedmiot(
                 przedmiotId=przedmiot_doc_ref.id,
@@ -37,42 +47,124 @@ class RepozytoriumPrzedmiotow:
     @classmethod
     async def pobierz_przedmiot_po_id(cls, przedmiot_id: str) -> Optional[Dict[str, Any]]:
         """Pobiera dane przedmiotu na podstawie jego ID."""
-        przedmiot_doc = db.collection(cls.COLLECTION_NAME).document(przedmiot_id).get()
+        przedmiot_doc = await db.collection(cls.COLLECTION_NAME).document(przedmiot_id).get()
         if przedmiot_doc.exists:
             return przedmiot_doc.to_dict()
         return None
 
     @classmethod
-    async def pobierz_wszystkie_przedmioty(cls) -> List[Dict[str, Any]]:
+    async def pobierz_przedmiot_z_wersja(
+        cls,
+        przedmiot_id: str
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[datetime]]:
+        """Pobiera dane przedmiotu wraz z czasem ostatniego zapisu dokumentu."""
+        return await pobierz_z_wersja(db.collection(cls.COLLECTION_NAME).document(przedmiot_id))
+
+    @classmethod
+    def przedmiot_z_pamieci(cls, przedmiot_id: str) -> Optional[Dict[str, Any]]:
+        """Zwraca przedmiot z katalogu w pamięci lub None, gdy trzeba go odczytać."""
+        return pamiec_przedmiotow.pobierz(przedmiot_id)
+
+    @classmethod
+    def zapamietaj_przedmiot(cls, przedmiot_id: str, przedmiot_doc) -> Optional[Dict[str, Any]]:
+        """Zapisuje odczytany dokument przedmiotu w katalogu i zwraca jego dane."""
+        if not przedmiot_doc.exists:
+            return None
+        przedmiot_data = przedmiot_doc.to_dict()
+        pamiec_przedmiotow.zapisz(przedmiot_id, przedmiot_data)
+        return przedmiot_data
+
+    @classmethod
+    async def pobierz_przedmiot_z_katalogu(cls, przedmiot_id: str) -> Optional[Dict[str, Any]]:
+        """Pobiera przedmiot z katalogu w pamięci, odczytując Firestore tylko przy braku wpisu.
+
+        Nieistniejące przedmioty nie są zapamiętywane, więc przedmiot dodany
+        w innym procesie jest widoczny od razu.
+        """
+        przedmiot_data = cls.przedmiot_z_pamieci(przedmiot_id)
+        if przedmiot_data is not None:
+            return przedmiot_data
+        przedmiot_doc = await db.collection(cls.COLLECTION_NAME).document(przedmiot_id).get()
+        return cls.zapamietaj_przedmiot(przedmiot_id, przedmiot_doc)
+
+    @classmethod
+    async def pobierz_przedmioty_z_katalogu(
+        cls,
+        przedmioty_ids: List[str]
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Pobiera wiele przedmiotów z katalogu, doczytując brakujące jednym get_all."""
+        przedmioty = {
+            przedmiot_id: cls.przedmiot_z_pamieci(przedmiot_id) for przedmiot_id in przedmioty_ids
+        }
+        brakujace = [przedmiot_id for przedmiot_id, dane in przedmioty.items() if dane is None]
+        if brakujace:
+            przedmioty_docs = await pobierz_dokumenty(
+                db,
+                [
+                    db.collection(cls.COLLECTION_NAME).document(przedmiot_id)
+                    for przedmiot_id in brakujace
+                ]
+            )
+            for przedmiot_id, przedmiot_doc in zip(brakujace, przedmioty_docs):
+                przedmioty[przedmiot_id] = cls.zapamietaj_przedmiot(przedmiot_id, przedmiot_doc)
+        return przedmioty
+
+    @classmethod
+    async def pobierz_wszystkie_przedmioty(
+        cls,
+        pola: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
         """Pobiera dane wszystkich przedmiotów z Firestore."""
         przedmioty = []
-        przedmiot_docs = db.collection(cls.COLLECTION_NAME).stream()
-        for doc in przedmiot_docs:
+        przedmiot_docs = zastosuj_projekcje(db.collection(cls.COLLECTION_NAME), pola).stream()
+        async for doc in przedmiot_docs:
             przedmioty.append(doc.to_dict())
         return przedmioty
 
+    @classmethod
+    async def pobierz_strone_przedmiotow(
+        cls,
+        limit: int,
+        kursor: Optional[str] = None,
+        pola: Optional[List[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Pobiera jedną stronę przedmiotów uporządkowaną po ID dokumentu."""
+        return await pobierz_strone(
+            zastosuj_projekcje(db.collection(cls.COLLECTION_NAME), pola), limit, kursor
+        )
+
+    @classmethod
+    async def strumieniuj_przedmioty(
+        cls,
+        pola: Optional[List[str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Zwraca kolejne przedmioty w miarę ich odczytu ze strumienia Firestore."""
+        async for doc in zastosuj_projekcje(db.collection(cls.COLLECTION_NAME), pola).stream():
+            yield doc.to_dict()
+
     @classmethod
     async def aktualizuj_przedmiot(
         cls,
         przedmiot_id: str,
-        dane_przedmiotu: PrzedmiotTworzenie
-    ) -> Optional[Przedmiot]:
-        """Aktualizuje dane istniejącego przedmiotu."""
+        dane_aktualizacji: Dict[str, Any]
+    ) -> bool:
+        """Aktualizuje podane pola istniejącego przedmiotu; zwraca False, gdy go nie ma."""
         try:
             przedmiot_doc = db.collection(cls.COLLECTION_NAME).document(przedmiot_id)
-            przedmiot_info = {
-                'name': dane_przedmiotu.nazwa,
-                'description': dane_przedmiotu.opis,
-                'updated_at': firestore.SERVER_TIMESTAMP
-            }
+            przedmiot_info = {}
+            if 'nazwa' in dane_aktualizacji:
+                przedmiot_info['name'] = dane_aktualizacji['nazwa']
+            if 'opis' in dane_aktualizacji:
+                przedmiot_info['description'] = dane_aktualizacji['opis']
+            przedmiot_info['updated_at'] = firestore.SERVER_TIMESTAMP
 
-            przedmiot_doc.update(przedmiot_info)
-
-            return Przedmiot(
-                przedmiotId=przedmiot_id,
-                nazwa=dane_przedmiotu.nazwa,
-                opis=dane_przedmiotu.opis
-            )
+            try:
+                await przedmiot_doc.update(przedmiot_info)
+            except exceptions.NotFound:
+                return False
+            finally:
+                pamiec_przedmiotow.uniewaznij(przedmiot_id)
+            return True
         except Exception as e:
             raise e
 
@@ -80,7 +172,8 @@ class RepozytoriumPrzedmiotow:
     async def usun_przedmiot(cls, przedmiot_id: str) -> bool:
         """Usuwa przedmiot z Firestore."""
         try:
-            db.collection(cls.COLLECTION_NAME).document(przedmiot_id).delete()
+            await db.collection(cls.COLLECTION_NAME).document(przedmiot_id).delete()
+            pamiec_przedmiotow.uniewaznij(przedmiot_id)
             return True
         except Exception as e:
             raise e
@@ -0,0 +1,78 @@
+"""Stronicowanie zapytań Firestore oparte na kursorach."""
+
+import base64
+import binascii
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.cloud.firestore_v1.field_path import FieldPath
+
+
+def zakoduj_kursor(doc_id: str) -> str:
+    """Zamienia ID ostatniego dokumentu strony na nieprzezroczysty kursor."""
+    return base64.urlsafe_b64encode(doc_id.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def odkoduj_kursor(kursor: str) -> str:
+    """Odczytuje ID dokumentu z kursora zwróconego przez zakoduj_kursor."""
+    try:
+        uzupelnienie = '=' * (-len(kursor) % 4)
+        doc_id = base64.urlsafe_b64decode(kursor + uzupelnienie).decode('utf-8')
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Nieprawidłowy kursor stronicowania") from e
+    if not doc_id or '/' in doc_id:
+        raise ValueError("Nieprawidłowy kursor stronicowania")
+    return doc_id
+
+
+def zastosuj_projekcje(zapytanie: Any, pola: Optional[List[str]] = None) -> Any:
+    """Ogranicza zapytanie do wskazanych pól, aby Firestore nie przesyłał reszty dokumentu."""
+    if pola:
+        return zapytanie.select(pola)
+    return zapytanie
+
+
+def projekcja_dokumentu(
+    dokument: Dict[str, Any],
+    pola: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Ogranicza dokument do wskazanych pól, także zagnieżdżonych, jak select w Firestore."""
+    if not pola:
+        return dokument
+    wynik: Dict[str, Any] = {}
+    for pole in pola:
+        czesci = pole.split('.')
+        wartosc: Any = dokument
+        for czesc in czesci:
+            if not isinstance(wartosc, dict) or czesc not in wartosc:
+                break
+            wartosc = wartosc[czesc]
+        else:
+            cel = wynik
+            for czesc in czesci[:-1]:
+                cel = cel.setdefault(czesc, {})
+            cel[czesci[-1]] = wartosc
+    return wynik
+
+
+async def pobierz_strone(
+    zapytanie: Any,
+    limit: int,
+    kursor: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Pobiera co najwyżej `limit` dokumentów zapytania, zaczynając po kursorze.
+
+    Zwraca listę dokumentów oraz kursor następnej strony albo None, gdy
+    strona nie była pełna.
+    """
+    zapytanie = zapytanie.order_by(FieldPath.document_id())
+    if kursor:
+        zapytanie = zapytanie.start_after({FieldPath.document_id(): odkoduj_kursor(kursor)})
+
+    elementy = []
+    ostatni_id = None
+    async for doc in zapytanie.limit(limit).stream():
+        elementy.append(doc.to_dict())
+        ostatni_id = doc.id
+
+    nastepny = zakoduj_kursor(ostatni_id) if len(elementy) == limit else None
+    return elementy, nastepny
@@ -1,9 +1,14 @@
 """Repozytorium do zarządzania danymi użytkowników w Firestore."""
 
-from typing import Dict, List, Optional, Any
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
 from firebase_admin import firestore
 
 from app.konfiguracja.firebase_config import db, auth
+from app.repozytoria.odczyt import pobierz_dokumenty, pobierz_z_wersja
+from app.repozytoria.pamiec_podreczna import pamiec_rol_uzytkownikow
+from app.repozytoria.stronicowanie import pobierz_strone, zastosuj_projekcje
+from app.konfiguracja.wykonawca_auth import wykonaj_auth
 
 
 class RepozytoriumUzytkownikow:
@@ -17,13 +22,18 @@ class RepozytoriumUzytkownikow:
     ) -> str:
         """Tworzy nowego użytkownika w Firestore i Authentication."""
         try:
-            firebase_user = auth.create_user(
+            firebase_user = await wykonaj_auth(
+                auth.create_user,
                 email=dane_uzytkownika.email,
                 password=dane_uzytkownika.haslo,
                 display_name=dane_uzytkownika.imie
             )
 
-            auth.set_custom_user_claims(firebase_user.uid, {"role": dane_uzytkownika.rola.value})
+            await wykonaj_auth(
+                auth.set_custom_user_claims,
+                firebase_user.uid,
+                {"role": dane_uzytkownika.rola.value}
+            )
 
             user_doc_ref = db.collection(cls.COLLECTION_NAME).document(firebase_user.uid)
             user_info = {
@@ -33,7 +43,8 @@ class RepozytoriumUzytkownikow:
                 'role': dane_uzytkownika.rola.value,
                 'created_at': firestore.SERVER_TIMESTAMP
             }
-            user_doc_ref.set(user_info)
+            await user_doc_ref.set(user_info)
+            pamiec_rol_uzytkownikow.zapisz(firebase_user.uid, user_info['role'])
 
             return user_info['uid']
         except Exception as e:
@@ -45,20 +56,92 @@ class RepozytoriumUzytkownikow:
         user_id: str
     ) -> Optional[Dict[str, Any]]:
         """Pobiera dane użytkownika na podstawie ID."""
-        user_doc = db.collection(cls.COLLECTION_NAME).document(user_id).get()
+        user_doc = await db.collection(cls.COLLECTION_NAME).document(user_id).get()
         if user_doc.exists:
             return user_doc.to_dict()
         return None
 
     @classmethod
-    async def pobierz_wszystkich_uzytkownikow(cls) -> List[Dict[str, Any]]:
+    async def pobierz_uzytkownika_z_wersja(
+        cls,
+        user_id: str
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[datetime]]:
+        """Pobiera dane użytkownika wraz z czasem ostatniego zapisu dokumentu."""
+        return await pobierz_z_wersja(db.collection(cls.COLLECTION_NAME).document(user_id))
+
+    @classmethod
+    def rola_z_pamieci(cls, user_id: str) -> Optional[str]:
+        """Zwraca rolę z pamięci podręcznej lub None, gdy trzeba ją odczytać."""
+        return pamiec_rol_uzytkownikow.pobierz(user_id)
+
+    @classmethod
+    def zapamietaj_role(cls, user_id: str, user_doc) -> Optional[str]:
+        """Zapisuje rolę z odczytanego dokumentu użytkownika i ją zwraca."""
+        if not user_doc.exists:
+            return None
+        rola = user_doc.to_dict().get('role') or ''
+        pamiec_rol_uzytkownikow.zapisz(user_id, rola)
+        return rola
+
+    @classmethod
+    async def pobierz_role_uzytkownika(cls, user_id: str) -> Optional[str]:
+        """Zwraca rolę użytkownika lub None, jeśli użytkownik nie istnieje.
+
+        Role są trzymane w pamięci podręcznej procesu, więc powtarzane
+        sprawdzenia tego samego użytkownika nie odczytują Firestore.
+        """
+        rola = cls.rola_z_pamieci(user_id)
+        if rola is not None:
+            return rola
+        user_doc = await db.collection(cls.COLLECTION_NAME).document(user_id).get()
+        return cls.zapamietaj_role(user_id, user_doc)
+
+    @classmethod
+    async def pobierz_role_uzytkownikow(cls, user_ids: List[str]) -> Dict[str, Optional[str]]:
+        """Zwraca role wielu użytkowników, doczytując brakujące jednym get_all."""
+        role = {user_id: cls.rola_z_pamieci(user_id) for user_id in user_ids}
+        brakujace = [user_id for user_id, rola in role.items() if rola is None]
+        if brakujace:
+            user_docs = await pobierz_dokumenty(
+                db, [db.collection(cls.COLLECTION_NAME).document(user_id) for user_id in brakujace]
+            )
+            for user_id, user_doc in zip(brakujace, user_docs):
+                role[user_id] = cls.zapamietaj_role(user_id, user_doc)
+        return role
+
+    @classmethod
+    async def pobierz_wszystkich_uzytkownikow(
+        cls,
+        pola: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
         """Pobiera listę wszystkich zarejestrowanych użytkowników."""
         users = []
-        user_docs = db.collection(cls.COLLECTION_NAME).stream()
-        for doc in user_docs:
+        user_docs = zastosuj_projekcje(db.collection(cls.COLLECTION_NAME), pola).stream()
+        async for doc in user_docs:
             users.append(doc.to_dict())
         return users
 
+    @classmethod
+    async def pobierz_strone_uzytkownikow(
+        cls,
+        limit: int,
+        kursor: Optional[str] = None,
+        pola: Optional[List[str]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Pobiera jedną stronę użytkowników uporządkowaną po ID dokumentu."""
+        return await pobierz_strone(
+            zastosuj_projekcje(db.collection(cls.COLLECTION_NAME), pola), limit, kursor
+        )
+
+    @classmethod
+    async def strumieniuj_uzytkownikow(
+        cls,
+        pola: Optional[List[str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Zwraca kolejnych użytkowników w miarę ich odczytu ze strumienia Firestore."""
+        async for doc in zastosuj_projekcje(db.collection(cls.COLLECTION_NAME), pola).stream():
+            yield doc.to_dict()
+
     @classmethod
     async def aktualizuj_uzytkownika(
         cls,
@@ -68,7 +151,7 @@ class RepozytoriumUzytkownikow:
         """Aktualizuje dane użytkownika w Firestore i Authentication."""
         try:
             user_doc_ref = db.collection(cls.COLLECTION_NAME).document(user_id)
-            user_doc = user_doc_ref.get()
+            user_doc = await user_doc_ref.get()
 
             if not user_doc.exists:
                 return False
@@ -83,16 +166,18 @@ class RepozytoriumUzytkownikow:
 
             firebase_user = None
             if update_data:
-                firebase_user = auth.update_user(
+                firebase_user = await wykonaj_auth(
+                    auth.update_user,
                     user_id,
                     **update_data
                 )
             else:
-                firebase_user = auth.get_user(user_id)
+                firebase_user = await wykonaj_auth(auth.get_user, user_id)
 
 
             if 'rola' in dane_uzytkownika:
-                auth.set_custom_user_claims(
+                await wykonaj_auth(
+                    auth.set_custom_user_claims,
                     firebase_user.uid,
                     {"role": dane_uzytkownika['rola'].value}
                 )
@@ -105,7 +190,8 @@ class RepozytoriumUzytkownikow:
             if 'rola' in dane_uzytkownika:
                 user_info['role'] = dane_uzytkownika['rola'].value
             user_info['updated_at'] = firestore.SERVER_TIMESTAMP
-            user_doc_ref.update(user_info)
+            await user_doc_ref.update(user_info)
+            pamiec_rol_uzytkownikow.uniewaznij(user_id)
 
             return True
         except Exception as e:
@@ -115,8 +201,9 @@ class RepozytoriumUzytkownikow:
     async def usun_uzytkownika(cls, user_id: str) -> bool:
         """Usuwa użytkownika z Firestore i Authentication."""
         try:
-            auth.delete_user(user_id)
-            db.collection(cls.COLLECTION_NAME).document(user_id).delete()
+            await wykonaj_auth(auth.delete_user, user_id)
+            await db.collection(cls.COLLECTION_NAME).document(user_id).delete()
+            pamiec_rol_uzytkownikow.uniewaznij(user_id)
             return True
         except Exception as e:
             raise e
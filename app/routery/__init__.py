@@ -5,11 +5,13 @@ from .ocena import router as ocena_router
 from .przedmiot import router as przedmiot_router
 from .uzytkownik_rout import router as uzytkownik_router
 from .auth_rout import router as auth_router
+from .metryki_rout import router as metryki_router
 
 wszystkie_routery = [
     grupa_router,
     ocena_router,
     przedmiot_router,
     uzytkownik_router,
-    auth_router
+    auth_router,
+    metryki_router
 ]
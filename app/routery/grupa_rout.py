@@ -1,11 +1,25 @@
 """Moduł zawierający routery dla zarządzania grupami."""
 
-from typing import Annotated, Dict, Any
+from typing import Annotated, Dict, Any, Optional
 
-from fastapi import APIRouter, Path, Body, HTTPException, status
+from fastapi import APIRouter, Path, Body, Query, HTTPException, Request, status
 
 from app.serwisy.grupa_serw import SerwisGrup
-from app.modele.grupa import GrupaAktualizacja, GrupaTworzenie
+from app.modele.grupa import (
+    GrupaAktualizacja,
+    GrupaTworzenie,
+    PrzypiszStudentowDoGrupy,
+    WynikPrzypisaniaStudentow
+)
+from app.modele.ocena import StatystykiOcen
+from app.modele.strona import DOMYSLNY_LIMIT, MAKS_LIMIT, parsuj_pola
+from app.routery.odpowiedzi import (
+    czy_niezmieniony,
+    OdpowiedzJSON,
+    odpowiedz_ndjson,
+    odpowiedz_niezmieniony,
+    odpowiedz_z_wersja
+)
 
 router = APIRouter(
     prefix="/grupy",
@@ -19,10 +33,29 @@ router = APIRouter(
 
 
 @router.get("/", summary="Pobierz listę wszystkich grup")
-async def pobierz_wszystkie_grupy():
-    """Pobiera listę wszystkich grup."""
+async def pobierz_wszystkie_grupy(
+    limit: Annotated[Optional[int], Query(ge=1, le=MAKS_LIMIT, title="Rozmiar strony")] = None,
+    kursor: Annotated[Optional[str], Query(title="Kursor następnej strony")] = None,
+    strumien: Annotated[bool, Query(title="Strumieniuj całą kolekcję jako NDJSON")] = False,
+    pola: Annotated[
+        Optional[str], Query(alias="fields", title="Zwracane pola oddzielone przecinkami")
+    ] = None
+):
+    """Pobiera listę grup: całą, jedną stronę (limit/kursor) lub strumień NDJSON."""
     try:
-        return await SerwisGrup.pobierz_wszystkie_grupy()
+        lista_pol = parsuj_pola(pola)
+        if strumien:
+            return odpowiedz_ndjson(SerwisGrup.strumieniuj_grupy(lista_pol))
+        if limit is None and kursor is None:
+            return OdpowiedzJSON(await SerwisGrup.pobierz_wszystkie_grupy(lista_pol))
+        return OdpowiedzJSON(await SerwisGrup.pobierz_strone_grup(
+            limit or DOMYSLNY_LIMIT, kursor, lista_pol
+        ))
+    except ValueError as ve:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(ve)
+        ) from ve
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -30,19 +63,48 @@ async def pobierz_wszystkie_grupy():
         ) from e
 
 
+@router.get(
+    "/{grupa_id}/statystyki",
+    response_model=StatystykiOcen,
+    summary="Pobierz statystyki ocen grupy"
+)
+async def pobierz_statystyki_grupy(
+    grupa_id: Annotated[str, Path(title="ID grupy")]
+):
+    """Zwraca średnią, medianę, percentyle, histogram i odsetek zaliczonych ocen grupy."""
+    try:
+        statystyki = await SerwisGrup.pobierz_statystyki_grupy(grupa_id)
+        if statystyki is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Grupa o ID {grupa_id} nie została znaleziona"
+            )
+        return statystyki
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Błąd podczas liczenia statystyk ocen grupy: {str(e)}"
+        ) from e
+
+
 @router.get("/{grupa_id}", summary="Pobierz dane konkretnej grupy")
 async def pobierz_grupe(
-    grupa_id: Annotated[str, Path(title="ID grupy")]
+    grupa_id: Annotated[str, Path(title="ID grupy")],
+    request: Request
 ):
-    """Pobiera dane konkretnej grupy na podstawie jej ID."""
+    """Pobiera dane grupy; odpowiada 304, gdy kopia klienta (ETag/Last-Modified) jest aktualna."""
     try:
-        grupa = await SerwisGrup.pobierz_grupe_po_id(grupa_id)
+        grupa, wersja = await SerwisGrup.pobierz_grupe_z_wersja(grupa_id)
         if not grupa:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Grupa o ID {grupa_id} nie została znaleziona"
             )
-        return grupa
+        if czy_niezmieniony(request, wersja):
+            return odpowiedz_niezmieniony(wersja)
+        return odpowiedz_z_wersja(grupa, wersja)
     except HTTPException:
         raise
     except Exception as e:
@@ -125,6 +187,33 @@ async def usun_grupe(
         ) from e
 
 
+@router.post(
+    "/{grupa_id}/studenci",
+    response_model=WynikPrzypisaniaStudentow,
+    summary="Przypisz wielu studentów do grupy"
+)
+async def przypisz_studentow_do_grupy(
+    grupa_id: Annotated[str, Path(title="ID grupy")],
+    dane: Annotated[PrzypiszStudentowDoGrupy, Body()]
+):
+    """Przypisuje wielu studentów do grupy i zwraca listę odrzuconych ID."""
+    try:
+        wynik = await SerwisGrup.przypisz_studentow_do_grupy(grupa_id, dane.studenciIds)
+        if wynik is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Grupa o ID {grupa_id} nie została znaleziona"
+            )
+        return wynik
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Błąd podczas przypisywania studentów do grupy: {str(e)}"
+        ) from e
+
+
 @router.post("/{grupa_id}/studenci/{student_id}", summary="Przypisz studenta do grupy")
 async def przypisz_studenta_do_grupy(
     grupa_id: Annotated[str, Path(title="ID grupy")],
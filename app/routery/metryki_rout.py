@@ -0,0 +1,13 @@
+"""Moduł zawierający endpoint metryk aplikacji."""
+
+from fastapi import APIRouter, Response
+
+from app.konfiguracja.metryki import rejestr_metryk, TYP_ZAWARTOSCI
+
+router = APIRouter(tags=["metryki"])
+
+
+@router.get("/metrics", summary="Pobierz metryki w formacie Prometheusa", include_in_schema=False)
+async def pobierz_metryki():
+    """Zwraca liczniki, zapytania w toku i histogramy czasów per trasa."""
+    return Response(content=rejestr_metryk.renderuj(), media_type=TYP_ZAWARTOSCI)
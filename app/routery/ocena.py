@@ -1,11 +1,13 @@
 """Moduł zawierający routery dla zarządzania ocenami."""
 
-from typing import Annotated, Dict, Any
+from typing import Annotated, Dict, Any, Optional
 
-from fastapi import APIRouter, Path, Body, HTTPException, status
+from fastapi import APIRouter, Path, Body, Query, HTTPException, status
 
 from app.serwisy.ocena import SerwisOcen
-from app.modele.ocena import OcenaTworzenie
+from app.modele.ocena import ImportOcen, OcenaTworzenie, RaportImportuOcen
+from app.modele.strona import DOMYSLNY_LIMIT, MAKS_LIMIT, parsuj_pola
+from app.routery.odpowiedzi import OdpowiedzJSON, odpowiedz_ndjson
 
 router = APIRouter(
     prefix="/oceny",
@@ -19,10 +21,29 @@ router = APIRouter(
 
 
 @router.get("/", summary="Pobierz listę wszystkich ocen")
-async def pobierz_wszystkie_oceny():
-    """Pobiera listę wszystkich ocen."""
+async def pobierz_wszystkie_oceny(
+    limit: Annotated[Optional[int], Query(ge=1, le=MAKS_LIMIT, title="Rozmiar strony")] = None,
+    kursor: Annotated[Optional[str], Query(title="Kursor następnej strony")] = None,
+    strumien: Annotated[bool, Query(title="Strumieniuj całą kolekcję jako NDJSON")] = False,
+    pola: Annotated[
+        Optional[str], Query(alias="fields", title="Zwracane pola oddzielone przecinkami")
+    ] = None
+):
+    """Pobiera listę ocen: całą, jedną stronę (limit/kursor) lub strumień NDJSON."""
     try:
-        return await SerwisOcen.pobierz_wszystkie_oceny()
+        lista_pol = parsuj_pola(pola)
+        if strumien:
+            return odpowiedz_ndjson(SerwisOcen.strumieniuj_oceny(lista_pol))
+        if limit is None and kursor is None:
+            return OdpowiedzJSON(await SerwisOcen.pobierz_wszystkie_oceny(lista_pol))
+        return OdpowiedzJSON(await SerwisOcen.pobierz_strone_ocen(
+            limit or DOMYSLNY_LIMIT, kursor, lista_pol
+        ))
+    except ValueError as ve:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(ve)
+        ) from ve
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -67,6 +88,92 @@ async def utworz_ocene(
         ) from e
 
 
+@router.post("/hurtowo", response_model=RaportImportuOcen, summary="Utwórz wiele ocen naraz")
+async def utworz_oceny_hurtowo(
+    oceny: Annotated[ImportOcen, Body()]
+):
+    """Tworzy wiele ocen i zwraca raport z wynikiem każdego wiersza."""
+    try:
+        return await SerwisOcen.utworz_oceny_hurtowo(oceny)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Błąd podczas importu ocen: {str(e)}"
+        ) from e
+
+
+@router.get("/grupy/{grupa_id}/podsumowanie", summary="Pobierz podsumowanie ocen grupy")
+async def pobierz_podsumowanie_grupy(
+    grupa_id: Annotated[str, Path(title="ID grupy")]
+):
+    """Pobiera liczbę, sumę, średnią i rozkład ocen grupy z dokumentu podsumowania."""
+    try:
+        podsumowanie = await SerwisOcen.pobierz_podsumowanie_grupy(grupa_id)
+        if not podsumowanie:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Brak podsumowania ocen dla grupy o ID {grupa_id}"
+            )
+        return podsumowanie
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Błąd podczas pobierania podsumowania ocen: {str(e)}"
+        ) from e
+
+
+@router.post("/grupy/{grupa_id}/podsumowanie/przelicz", summary="Przelicz podsumowanie ocen grupy")
+async def przelicz_podsumowanie_grupy(
+    grupa_id: Annotated[str, Path(title="ID grupy")]
+):
+    """Odtwarza podsumowanie ocen grupy od zera, np. dla ocen sprzed jego wprowadzenia."""
+    try:
+        return await SerwisOcen.przelicz_podsumowanie_grupy(grupa_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Błąd podczas przeliczania podsumowania ocen: {str(e)}"
+        ) from e
+
+
+@router.get("/studenci/{student_id}/karta", summary="Pobierz kartę ocen studenta")
+async def pobierz_karte_studenta(
+    student_id: Annotated[str, Path(title="ID studenta")]
+):
+    """Pobiera oceny studenta z nazwami grup i przedmiotów jednym odczytem."""
+    try:
+        karta = await SerwisOcen.pobierz_karte_studenta(student_id)
+        if not karta:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Brak karty ocen dla studenta o ID {student_id}"
+            )
+        return karta
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Błąd podczas pobierania karty ocen: {str(e)}"
+        ) from e
+
+
+@router.post("/studenci/{student_id}/karta/przelicz", summary="Przelicz kartę ocen studenta")
+async def przelicz_karte_studenta(
+    student_id: Annotated[str, Path(title="ID studenta")]
+):
+    """Odtwarza kartę ocen studenta od zera, np. dla ocen sprzed jej wprowadzenia."""
+    try:
+        return await SerwisOcen.przelicz_karte_studenta(student_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Błąd podczas przeliczania karty ocen: {str(e)}"
+        ) from e
+
+
 @router.put("/{ocena_id}", summary="Zaktualizuj dane oceny")
 async def aktualizuj_ocene(
     ocena_id: Annotated[str, Path(title="ID oceny")],
@@ -82,14 +189,8 @@ async def aktualizuj_ocene(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Ocena o ID {ocena_id} nie istnieje"
             )
-        updated_data = await SerwisOcen.pobierz_ocene_po_id(ocena_id)
-        if not updated_data:
-             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Błąd podczas pobierania zaktualizowanej oceny o ID {ocena_id}"
-            )
         return {"message": f"Ocena {ocena_id} zaktualizowana pomyślnie",
-                "updated_data": updated_data}
+                "updated_data": zaktualizowana_ocena}
     except HTTPException as e:
         raise e
     except Exception as e:
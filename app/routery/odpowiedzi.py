@@ -0,0 +1,106 @@
+"""Pomocnicze klasy i funkcje odpowiedzi HTTP współdzielone przez routery."""
+
+import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, AsyncIterator, Dict
+
+import orjson
+from fastapi import Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def _serializuj_wartosc(wartosc: Any) -> Any:
+    """Zamienia typy Firestore i modele Pydantic nieobsługiwane przez orjson."""
+    if isinstance(wartosc, (datetime.datetime, datetime.date)):
+        return wartosc.isoformat()
+    if isinstance(wartosc, BaseModel):
+        return wartosc.model_dump(by_alias=True)
+    raise TypeError(f"Typ {type(wartosc).__name__} nie jest serializowalny do JSON")
+
+
+def serializuj_json(dane: Any) -> bytes:
+    """Serializuje dokumenty Firestore do JSON (UTF-8) jednym przebiegiem orjson."""
+    return orjson.dumps(dane, default=_serializuj_wartosc)
+
+
+class OdpowiedzJSON(JSONResponse):
+    """Odpowiedź JSON serializowana przez orjson z obsługą typów Firestore.
+
+    Zwrócona wprost z endpointu pomija rekurencyjne przejście jsonable_encoder
+    po całej liście dokumentów, które FastAPI wykonuje dla zwykłych wartości.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return serializuj_json(content)
+
+
+async def _linie_ndjson(dokumenty: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[bytes]:
+    async for dokument in dokumenty:
+        yield serializuj_json(dokument) + b"\n"
+
+
+def odpowiedz_ndjson(dokumenty: AsyncIterator[Dict[str, Any]]) -> StreamingResponse:
+    """Zwraca odpowiedź wysyłającą dokumenty jako NDJSON w miarę ich odczytu."""
+    return StreamingResponse(_linie_ndjson(dokumenty), media_type=NDJSON_MEDIA_TYPE)
+
+
+def _czas_utc(wersja: datetime.datetime) -> datetime.datetime:
+    if wersja.tzinfo is None:
+        return wersja.replace(tzinfo=datetime.timezone.utc)
+    return wersja.astimezone(datetime.timezone.utc)
+
+
+def etag_wersji(wersja: datetime.datetime) -> str:
+    """Buduje silny ETag z czasu ostatniego zapisu dokumentu (z nanosekundami)."""
+    czas = _czas_utc(wersja)
+    nanosekundy = getattr(wersja, 'nanosecond', None) or czas.microsecond * 1000
+    return f'"{int(czas.replace(microsecond=0).timestamp())}.{nanosekundy:09d}"'
+
+
+def naglowki_wersji(wersja: datetime.datetime) -> Dict[str, str]:
+    """Zwraca nagłówki ETag i Last-Modified dla podanej wersji dokumentu."""
+    return {
+        'ETag': etag_wersji(wersja),
+        'Last-Modified': format_datetime(_czas_utc(wersja).replace(microsecond=0), usegmt=True)
+    }
+
+
+def czy_niezmieniony(request: Request, wersja: datetime.datetime) -> bool:
+    """Sprawdza, czy kopia klienta jest aktualna (RFC 9110, sekcje 13.1.2 i 13.1.3).
+
+    If-None-Match ma pierwszeństwo; If-Modified-Since jest brane pod uwagę
+    tylko wtedy, gdy klient nie przysłał ETagu.
+    """
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        etag = etag_wersji(wersja)
+        for znacznik in if_none_match.split(','):
+            znacznik = znacznik.strip()
+            if znacznik == '*' or znacznik.removeprefix('W/') == etag:
+                return True
+        return False
+
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since is None:
+        return False
+    try:
+        od_kiedy = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if od_kiedy.tzinfo is None:
+        od_kiedy = od_kiedy.replace(tzinfo=datetime.timezone.utc)
+    return _czas_utc(wersja).replace(microsecond=0) <= od_kiedy
+
+
+def odpowiedz_niezmieniony(wersja: datetime.datetime) -> Response:
+    """Zwraca pustą odpowiedź 304 z aktualnymi nagłówkami wersji."""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=naglowki_wersji(wersja))
+
+
+def odpowiedz_z_wersja(dane: Any, wersja: Any) -> OdpowiedzJSON:
+    """Zwraca dane jako JSON z nagłówkami ETag i Last-Modified, jeśli wersja jest znana."""
+    naglowki = naglowki_wersji(wersja) if isinstance(wersja, datetime.datetime) else None
+    return OdpowiedzJSON(dane, headers=naglowki)
@@ -1,11 +1,20 @@
 """Moduł zawierający routery dla zarządzania przedmiotami."""
 
-from typing import Annotated, Dict, Any
+from typing import Annotated, Optional
 
-from fastapi import APIRouter, Path, Body, HTTPException, status
+from fastapi import APIRouter, Path, Body, Query, HTTPException, Request, status
 
 from app.serwisy.przedmiot import SerwisPrzedmiotow
-from app.modele.przedmiot import PrzedmiotTworzenie
+from app.modele.przedmiot import PrzedmiotAktualizacja, PrzedmiotTworzenie
+from app.modele.ocena import StatystykiOcen
+from app.modele.strona import DOMYSLNY_LIMIT, MAKS_LIMIT, parsuj_pola
+from app.routery.odpowiedzi import (
+    czy_niezmieniony,
+    OdpowiedzJSON,
+    odpowiedz_ndjson,
+    odpowiedz_niezmieniony,
+    odpowiedz_z_wersja
+)
 
 router = APIRouter(
     prefix="/przedmioty",
@@ -19,10 +28,29 @@ router = APIRouter(
 
 
 @router.get("/", summary="Pobierz listę wszystkich przedmiotów")
-async def pobierz_wszystkie_przedmioty():
-    """Pobiera listę wszystkich przedmiotów."""
+async def pobierz_wszystkie_przedmioty(
+    limit: Annotated[Optional[int], Query(ge=1, le=MAKS_LIMIT, title="Rozmiar strony")] = None,
+    kursor: Annotated[Optional[str], Query(title="Kursor następnej strony")] = None,
+    strumien: Annotated[bool, Query(title="Strumieniuj całą kolekcję jako NDJSON")] = False,
+    pola: Annotated[
+        Optional[str], Query(alias="fields", title="Zwracane pola oddzielone przecinkami")
+    ] = None
+):
+    """Pobiera listę przedmiotów: całą, jedną stronę (limit/kursor) lub strumień NDJSON."""
     try:
-        return await SerwisPrzedmiotow.pobierz_wszystkie_przedmioty()
+        lista_pol = parsuj_pola(pola)
+        if strumien:
+            return odpowiedz_ndjson(SerwisPrzedmiotow.strumieniuj_przedmioty(lista_pol))
+        if limit is None and kursor is None:
+            return OdpowiedzJSON(await SerwisPrzedmiotow.pobierz_wszystkie_przedmioty(lista_pol))
+        return OdpowiedzJSON(await SerwisPrzedmiotow.pobierz_strone_przedmiotow(
+            limit or DOMYSLNY_LIMIT, kursor, lista_pol
+        ))
+    except ValueError as ve:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(ve)
+        ) from ve
     except HTTPException:
         raise
     except Exception as e:
@@ -32,19 +60,51 @@ async def pobierz_wszystkie_przedmioty():
         ) from e
 
 
+@router.get(
+    "/{przedmiot_id}/statystyki",
+    response_model=StatystykiOcen,
+    summary="Pobierz statystyki ocen przedmiotu"
+)
+async def pobierz_statystyki_przedmiotu(
+    przedmiot_id: Annotated[str, Path(title="ID przedmiotu")]
+):
+    """Zwraca średnią, medianę, percentyle, histogram i odsetek zaliczonych ocen przedmiotu."""
+    try:
+        statystyki = await SerwisPrzedmiotow.pobierz_statystyki_przedmiotu(przedmiot_id)
+        if statystyki is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Przedmiot o ID {przedmiot_id} nie został znaleziony"
+            )
+        return statystyki
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Błąd podczas liczenia statystyk ocen przedmiotu: {str(e)}"
+        ) from e
+
+
 @router.get("/{przedmiot_id}", summary="Pobierz dane konkretnego przedmiotu")
 async def pobierz_przedmiot(
-    przedmiot_id: Annotated[str, Path(title="ID przedmiotu")]
+    przedmiot_id: Annotated[str, Path(title="ID przedmiotu")],
+    request: Request
 ):
-    """Pobiera dane konkretnego przedmiotu na podstawie jego ID."""
+    """Pobiera dane przedmiotu.
+
+    Odpowiada 304, gdy kopia klienta (ETag/Last-Modified) jest aktualna.
+    """
     try:
-        przedmiot = await SerwisPrzedmiotow.pobierz_przedmiot_po_id(przedmiot_id)
+        przedmiot, wersja = await SerwisPrzedmiotow.pobierz_przedmiot_z_wersja(przedmiot_id)
         if not przedmiot:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Przedmiot o ID {przedmiot_id} nie został znaleziony"
             )
-        return przedmiot
+        if czy_niezmieniony(request, wersja):
+            return odpowiedz_niezmieniony(wersja)
+        return odpowiedz_z_wersja(przedmiot, wersja)
     except HTTPException:
         raise
     except Exception as e:
@@ -73,12 +133,16 @@ async def utworz_przedmiot(
 @router.put("/{przedmiot_id}", summary="Zaktualizuj dane przedmiotu")
 async def aktualizuj_przedmiot(
     przedmiot_id: Annotated[str, Path(title="ID przedmiotu")],
-    dane_aktualizacji: Annotated[Dict[str, Any], Body()]
+    dane_aktualizacji: Annotated[PrzedmiotAktualizacja, Body()]
 ):
     """Aktualizuje dane przedmiotu na podstawie jego ID."""
     try:
+        update_data_dict = dane_aktualizacji.model_dump(exclude_unset=True)
+        if not update_data_dict:
+            raise ValueError("Nie podano danych do aktualizacji")
+
         zaktualizowany_przedmiot = await SerwisPrzedmiotow.aktualizuj_przedmiot(
-            przedmiot_id, dane_aktualizacji
+            przedmiot_id, update_data_dict
         )
         if not zaktualizowany_przedmiot:
             raise HTTPException(
@@ -87,6 +151,11 @@ async def aktualizuj_przedmiot(
             )
         return {"message": f"Przedmiot {przedmiot_id} zaktualizowany pomyślnie",
                 "updated_data": zaktualizowany_przedmiot}
+    except ValueError as ve:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(ve)
+        ) from ve
     except HTTPException:
         raise
     except Exception as e:
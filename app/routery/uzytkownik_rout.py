@@ -1,11 +1,19 @@
 """Moduł zawierający routery dla zarządzania użytkownikami."""
 
-from typing import Annotated, Dict, Any
+from typing import Annotated, Dict, Any, Optional
 
-from fastapi import APIRouter, Path, Body, HTTPException, status
+from fastapi import APIRouter, Path, Body, Query, HTTPException, Request, status
 
 from app.serwisy.uzytkownik_serw import SerwisUzytkownikow
 from app.modele.uzytkownik import UzytkownikTworzenie, UzytkownikAktualizacja
+from app.modele.strona import DOMYSLNY_LIMIT, MAKS_LIMIT, parsuj_pola
+from app.routery.odpowiedzi import (
+    czy_niezmieniony,
+    OdpowiedzJSON,
+    odpowiedz_ndjson,
+    odpowiedz_niezmieniony,
+    odpowiedz_z_wersja
+)
 
 router = APIRouter(
     prefix="/uzytkownicy",
@@ -19,10 +27,31 @@ router = APIRouter(
 
 
 @router.get("/", summary="Pobierz listę wszystkich użytkowników")
-async def pobierz_wszystkich_uzytkownikow():
-    """Pobiera listę wszystkich użytkowników."""
+async def pobierz_wszystkich_uzytkownikow(
+    limit: Annotated[Optional[int], Query(ge=1, le=MAKS_LIMIT, title="Rozmiar strony")] = None,
+    kursor: Annotated[Optional[str], Query(title="Kursor następnej strony")] = None,
+    strumien: Annotated[bool, Query(title="Strumieniuj całą kolekcję jako NDJSON")] = False,
+    pola: Annotated[
+        Optional[str], Query(alias="fields", title="Zwracane pola oddzielone przecinkami")
+    ] = None
+):
+    """Pobiera listę użytkowników: całą, jedną stronę (limit/kursor) lub strumień NDJSON."""
     try:
-        return await SerwisUzytkownikow.pobierz_wszystkich_uzytkownikow()
+        lista_pol = parsuj_pola(pola)
+        if strumien:
+            return odpowiedz_ndjson(SerwisUzytkownikow.strumieniuj_uzytkownikow(lista_pol))
+        if limit is None and kursor is None:
+            return OdpowiedzJSON(
+                await SerwisUzytkownikow.pobierz_wszystkich_uzytkownikow(lista_pol)
+            )
+        return OdpowiedzJSON(await SerwisUzytkownikow.pobierz_strone_uzytkownikow(
+            limit or DOMYSLNY_LIMIT, kursor, lista_pol
+        ))
+    except ValueError as ve:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(ve)
+        ) from ve
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -32,17 +61,23 @@ async def pobierz_wszystkich_uzytkownikow():
 
 @router.get("/{uzytkownik_id}", summary="Pobierz dane konkretnego użytkownika")
 async def pobierz_uzytkownika(
-    uzytkownik_id: Annotated[str, Path(title="ID użytkownika")]
+    uzytkownik_id: Annotated[str, Path(title="ID użytkownika")],
+    request: Request
 ):
-    """Pobiera dane konkretnego użytkownika na podstawie jego ID."""
+    """Pobiera dane użytkownika.
+
+    Odpowiada 304, gdy kopia klienta (ETag/Last-Modified) jest aktualna.
+    """
     try:
-        uzytkownik = await SerwisUzytkownikow.pobierz_uzytkownika_po_id(uzytkownik_id)
+        uzytkownik, wersja = await SerwisUzytkownikow.pobierz_uzytkownika_z_wersja(uzytkownik_id)
         if not uzytkownik:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Użytkownik o ID {uzytkownik_id} nie został znaleziony"
             )
-        return uzytkownik
+        if czy_niezmieniony(request, wersja):
+            return odpowiedz_niezmieniony(wersja)
+        return odpowiedz_z_wersja(uzytkownik, wersja)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -1,8 +1,17 @@
 """Moduł serwisowy dla zarządzania grupami."""
 
-from typing import List, Optional, Dict, Any
-from app.modele.grupa import Grupa, GrupaTworzenie
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
+from app.modele.grupa import Grupa, GrupaTworzenie, WynikPrzypisaniaStudentow
+from app.modele.ocena import StatystykiOcen
+from app.modele.strona import Strona
 from app.repozytoria.grupa_rep import RepozytoriumGrup
+from app.repozytoria.karta_ocen import RepozytoriumKartOcen
+from app.repozytoria.ocena import RepozytoriumOcen
+from app.repozytoria.pamiec_podreczna import pamiec_listy_grup
+from app.repozytoria.przedmiot import RepozytoriumPrzedmiotow
+from app.repozytoria.stronicowanie import projekcja_dokumentu
+from app.serwisy.statystyki_ocen import oblicz_statystyki_ocen
 
 
 class SerwisGrup:
@@ -11,7 +20,10 @@ class SerwisGrup:
     @staticmethod
     async def utworz_grupe(dane_grupy: GrupaTworzenie) -> Grupa:
         """Tworzy nową grupę."""
-        return await RepozytoriumGrup.utworz_grupe(dane_grupy)
+        try:
+            return await RepozytoriumGrup.utworz_grupe(dane_grupy)
+        finally:
+            pamiec_listy_grup.uniewaznij()
 
     @staticmethod
     async def pobierz_grupe_po_id(grupa_id: str) -> Optional[Dict[str, Any]]:
@@ -19,40 +31,114 @@ class SerwisGrup:
         return await RepozytoriumGrup.pobierz_grupe_po_id(grupa_id)
 
     @staticmethod
-    async def pobierz_wszystkie_grupy() -> List[Dict[str, Any]]:
-        """Pobiera listę wszystkich grup."""
-        return await RepozytoriumGrup.pobierz_wszystkie_grupy()
+    async def pobierz_grupe_z_wersja(
+        grupa_id: str
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[datetime]]:
+        """Pobiera grupę wraz z czasem jej ostatniej zmiany."""
+        return await RepozytoriumGrup.pobierz_grupe_z_wersja(grupa_id)
+
+    @staticmethod
+    async def pobierz_wszystkie_grupy(pola: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Pobiera listę wszystkich grup z pamięci odświeżanej w tle.
+
+        Wynik nie może być modyfikowany. Pamięć trzyma jedną, pełną listę,
+        a projekcja pól jest wykonywana w pamięci.
+        """
+        wszystkie = await pamiec_listy_grup.pobierz(
+            None, RepozytoriumGrup.pobierz_wszystkie_grupy
+        )
+        if pola:
+            return [projekcja_dokumentu(dokument, pola) for dokument in wszystkie]
+        return wszystkie
+
+    @staticmethod
+    async def pobierz_strone_grup(
+        limit: int,
+        kursor: Optional[str] = None,
+        pola: Optional[List[str]] = None
+    ) -> Strona:
+        """Pobiera jedną stronę listy grup."""
+        elementy, nastepna = await RepozytoriumGrup.pobierz_strone_grup(limit, kursor, pola)
+        return Strona(elementy=elementy, nastepnaStrona=nastepna)
+
+    @staticmethod
+    def strumieniuj_grupy(pola: Optional[List[str]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Zwraca strumień wszystkich grup bez buforowania całej listy."""
+        return RepozytoriumGrup.strumieniuj_grupy(pola)
+
+    @staticmethod
+    async def pobierz_statystyki_grupy(grupa_id: str) -> Optional[StatystykiOcen]:
+        """Liczy statystyki ocen grupy lub zwraca None, gdy grupa nie istnieje."""
+        if not await RepozytoriumGrup.pobierz_grupe_po_id(grupa_id):
+            return None
+        wartosci = await RepozytoriumOcen.pobierz_wartosci_ocen_grup([grupa_id])
+        return oblicz_statystyki_ocen(wartosci)
 
     @staticmethod
     async def aktualizuj_grupe(
         grupa_id: str,
         dane_aktualizacji: Dict[str, Any]
     ) -> Optional[Dict[str, Any]]:
-        """Aktualizuje dane istniejącej grupy."""
+        """Aktualizuje dane istniejącej grupy i jej nazwy w kartach ocen studentów."""
         if not dane_aktualizacji:
             raise ValueError("Nie podano danych do aktualizacji")
 
-        zaktualizowano = await RepozytoriumGrup.aktualizuj_grupe(grupa_id, dane_aktualizacji)
-        if zaktualizowano:
-            return await RepozytoriumGrup.pobierz_grupe_po_id(grupa_id)
-        return None
+        try:
+            zaktualizowano = await RepozytoriumGrup.aktualizuj_grupe(grupa_id, dane_aktualizacji)
+        finally:
+            pamiec_listy_grup.uniewaznij()
+        if not zaktualizowano:
+            return None
+
+        grupa = await RepozytoriumGrup.pobierz_grupe_po_id(grupa_id)
+        if grupa and dane_aktualizacji.keys() & {'nazwa', 'przedmiotId'}:
+            przedmiot = None
+            if grupa.get('subjectId'):
+                przedmiot = await RepozytoriumPrzedmiotow.pobierz_przedmiot_z_katalogu(
+                    grupa['subjectId']
+                )
+            await RepozytoriumKartOcen.aktualizuj_grupe_w_kartach(grupa_id, grupa, przedmiot)
+        return grupa
 
     @staticmethod
     async def usun_grupe(grupa_id: str) -> bool:
         """Usuwa grupę po jej identyfikatorze."""
-        return await RepozytoriumGrup.usun_grupe(grupa_id)
+        try:
+            return await RepozytoriumGrup.usun_grupe(grupa_id)
+        finally:
+            pamiec_listy_grup.uniewaznij()
 
     @staticmethod
     async def przypisz_studenta_do_grupy(grupa_id: str, student_id: str) -> bool:
         """Przypisuje studenta do grupy."""
-        return await RepozytoriumGrup.przypisz_studenta_do_grupy(grupa_id, student_id)
+        try:
+            return await RepozytoriumGrup.przypisz_studenta_do_grupy(grupa_id, student_id)
+        finally:
+            pamiec_listy_grup.uniewaznij()
+
+    @staticmethod
+    async def przypisz_studentow_do_grupy(
+        grupa_id: str,
+        studenci_ids: List[str]
+    ) -> Optional[WynikPrzypisaniaStudentow]:
+        """Przypisuje wielu studentów do grupy naraz."""
+        try:
+            return await RepozytoriumGrup.przypisz_studentow_do_grupy(grupa_id, studenci_ids)
+        finally:
+            pamiec_listy_grup.uniewaznij()
 
     @staticmethod
     async def usun_studenta_z_grupy(grupa_id: str, student_id: str) -> bool:
         """Usuwa studenta z grupy."""
-        return await RepozytoriumGrup.usun_studenta_z_grupy(grupa_id, student_id)
+        try:
+            return await RepozytoriumGrup.usun_studenta_z_grupy(grupa_id, student_id)
+        finally:
+            pamiec_listy_grup.uniewaznij()
 
     @staticmethod
     async def zmien_wykladowce_grupy(grupa_id: str, wykladowca_id: str) -> bool:
         """Zmienia wykładowcę przypisanego do grupy."""
-        return await RepozytoriumGrup.zmien_wykladowce_grupy(grupa_id, wykladowca_id)
+        try:
+            return await RepozytoriumGrup.zmien_wykladowce_grupy(grupa_id, wykladowca_id)
+        finally:
+            pamiec_listy_grup.uniewaznij()
@@ -1,8 +1,11 @@
 """Moduł serwisowy dla zarządzania ocenami."""
 
-from typing import List, Optional, Dict, Any
-from app.modele.ocena import Ocena, OcenaTworzenie
+from typing import AsyncIterator, List, Optional, Dict, Any
+from app.modele.ocena import Ocena, OcenaTworzenie, RaportImportuOcen
+from app.modele.strona import Strona
+from app.repozytoria.karta_ocen import RepozytoriumKartOcen
 from app.repozytoria.ocena import RepozytoriumOcen
+from app.repozytoria.podsumowanie_ocen import RepozytoriumPodsumowanOcen
 
 
 class SerwisOcen:
@@ -13,15 +16,61 @@ class SerwisOcen:
         """Tworzy nową ocenę."""
         return await RepozytoriumOcen.utworz_ocene(dane_oceny)
 
+    @staticmethod
+    async def utworz_oceny_hurtowo(oceny: List[OcenaTworzenie]) -> RaportImportuOcen:
+        """Tworzy wiele ocen i zwraca raport z wynikiem każdego wiersza."""
+        wyniki = await RepozytoriumOcen.utworz_oceny_hurtowo(oceny)
+        utworzone = sum(1 for wynik in wyniki if wynik.ocenaId)
+        return RaportImportuOcen(
+            utworzone=utworzone,
+            odrzucone=len(wyniki) - utworzone,
+            wyniki=wyniki
+        )
+
     @staticmethod
     async def pobierz_ocene_po_id(ocena_id: str) -> Optional[Dict[str, Any]]:
         """Pobiera ocenę po jej identyfikatorze."""
         return await RepozytoriumOcen.pobierz_ocene_po_id(ocena_id)
 
     @staticmethod
-    async def pobierz_wszystkie_oceny() -> List[Dict[str, Any]]:
+    async def pobierz_wszystkie_oceny(pola: Optional[List[str]] = None) -> List[Dict[str, Any]]:
         """Pobiera listę wszystkich ocen."""
-        return await RepozytoriumOcen.pobierz_wszystkie_oceny()
+        return await RepozytoriumOcen.pobierz_wszystkie_oceny(pola)
+
+    @staticmethod
+    async def pobierz_strone_ocen(
+        limit: int,
+        kursor: Optional[str] = None,
+        pola: Optional[List[str]] = None
+    ) -> Strona:
+        """Pobiera jedną stronę listy ocen."""
+        elementy, nastepna = await RepozytoriumOcen.pobierz_strone_ocen(limit, kursor, pola)
+        return Strona(elementy=elementy, nastepnaStrona=nastepna)
+
+    @staticmethod
+    def strumieniuj_oceny(pola: Optional[List[str]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Zwraca strumień wszystkich ocen bez buforowania całej listy."""
+        return RepozytoriumOcen.strumieniuj_oceny(pola)
+
+    @staticmethod
+    async def pobierz_podsumowanie_grupy(grupa_id: str) -> Optional[Dict[str, Any]]:
+        """Pobiera podsumowanie ocen grupy bez odczytu samych ocen."""
+        return await RepozytoriumPodsumowanOcen.pobierz_podsumowanie(grupa_id)
+
+    @staticmethod
+    async def przelicz_podsumowanie_grupy(grupa_id: str) -> Dict[str, Any]:
+        """Odtwarza podsumowanie ocen grupy na podstawie wszystkich jej ocen."""
+        return await RepozytoriumPodsumowanOcen.przelicz_podsumowanie(grupa_id)
+
+    @staticmethod
+    async def pobierz_karte_studenta(student_id: str) -> Optional[Dict[str, Any]]:
+        """Pobiera zmaterializowaną kartę ocen studenta jednym odczytem."""
+        return await RepozytoriumKartOcen.pobierz_karte(student_id)
+
+    @staticmethod
+    async def przelicz_karte_studenta(student_id: str) -> Dict[str, Any]:
+        """Odtwarza kartę ocen studenta na podstawie wszystkich jego ocen."""
+        return await RepozytoriumKartOcen.przelicz_karte(student_id)
 
     @staticmethod
     async def aktualizuj_ocene(
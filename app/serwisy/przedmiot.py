@@ -1,8 +1,17 @@
 """Moduł serwisowy dla zarządzania przedmiotami."""
 
-from typing import List, Optional, Dict, Any
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 from app.modele.przedmiot import Przedmiot, PrzedmiotTworzenie
+from app.modele.ocena import StatystykiOcen
+from app.modele.strona import Strona
+from app.repozytoria.grupa_rep import RepozytoriumGrup
+from app.repozytoria.karta_ocen import RepozytoriumKartOcen
+from app.repozytoria.ocena import RepozytoriumOcen
+from app.repozytoria.pamiec_podreczna import pamiec_listy_przedmiotow
 from app.repozytoria.przedmiot import RepozytoriumPrzedmiotow
+from app.repozytoria.stronicowanie import projekcja_dokumentu
+from app.serwisy.statystyki_ocen import oblicz_statystyki_ocen
 
 class SerwisPrzedmiotow:
     """Klasa serwisowa do obsługi operacji na przedmiotach."""
@@ -10,7 +19,10 @@ class SerwisPrzedmiotow:
     @staticmethod
     async def utworz_przedmiot(dane_przedmiotu: PrzedmiotTworzenie) -> Przedmiot:
         """Tworzy nowy przedmiot."""
-        return await RepozytoriumPrzedmiotow.utworz_przedmiot(dane_przedmiotu)
+        try:
+            return await RepozytoriumPrzedmiotow.utworz_przedmiot(dane_przedmiotu)
+        finally:
+            pamiec_listy_przedmiotow.uniewaznij()
 
     @staticmethod
     async def pobierz_przedmiot_po_id(przedmiot_id: str) -> Optional[Dict[str, Any]]:
@@ -18,28 +30,82 @@ class SerwisPrzedmiotow:
         return await RepozytoriumPrzedmiotow.pobierz_przedmiot_po_id(przedmiot_id)
 
     @staticmethod
-    async def pobierz_wszystkie_przedmioty() -> List[Dict[str, Any]]:
-        """Pobiera listę wszystkich przedmiotów."""
-        return await RepozytoriumPrzedmiotow.pobierz_wszystkie_przedmioty()
+    async def pobierz_przedmiot_z_wersja(
+        przedmiot_id: str
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[datetime]]:
+        """Pobiera przedmiot wraz z czasem jego ostatniej zmiany."""
+        return await RepozytoriumPrzedmiotow.pobierz_przedmiot_z_wersja(przedmiot_id)
+
+    @staticmethod
+    async def pobierz_wszystkie_przedmioty(
+        pola: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Pobiera listę wszystkich przedmiotów z pamięci odświeżanej w tle.
+
+        Wynik nie może być modyfikowany. Pamięć trzyma jedną, pełną listę,
+        a projekcja pól jest wykonywana w pamięci.
+        """
+        wszystkie = await pamiec_listy_przedmiotow.pobierz(
+            None, RepozytoriumPrzedmiotow.pobierz_wszystkie_przedmioty
+        )
+        if pola:
+            return [projekcja_dokumentu(dokument, pola) for dokument in wszystkie]
+        return wszystkie
+
+    @staticmethod
+    async def pobierz_strone_przedmiotow(
+        limit: int,
+        kursor: Optional[str] = None,
+        pola: Optional[List[str]] = None
+    ) -> Strona:
+        """Pobiera jedną stronę listy przedmiotów."""
+        elementy, nastepna = await RepozytoriumPrzedmiotow.pobierz_strone_przedmiotow(
+            limit, kursor, pola
+        )
+        return Strona(elementy=elementy, nastepnaStrona=nastepna)
+
+    @staticmethod
+    def strumieniuj_przedmioty(pola: Optional[List[str]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Zwraca strumień wszystkich przedmiotów bez buforowania całej listy."""
+        return RepozytoriumPrzedmiotow.strumieniuj_przedmioty(pola)
+
+    @staticmethod
+    async def pobierz_statystyki_przedmiotu(przedmiot_id: str) -> Optional[StatystykiOcen]:
+        """Liczy statystyki ocen ze wszystkich grup przedmiotu lub zwraca None, gdy go nie ma."""
+        if not await RepozytoriumPrzedmiotow.pobierz_przedmiot_z_katalogu(przedmiot_id):
+            return None
+        grupy_ids = await RepozytoriumGrup.pobierz_ids_grup_przedmiotu(przedmiot_id)
+        wartosci = await RepozytoriumOcen.pobierz_wartosci_ocen_grup(grupy_ids)
+        return oblicz_statystyki_ocen(wartosci)
 
     @staticmethod
     async def aktualizuj_przedmiot(
         przedmiot_id: str,
         dane_aktualizacji: Dict[str, Any]
     ) -> Optional[Dict[str, Any]]:
-        """Aktualizuje dane istniejącego przedmiotu."""
+        """Aktualizuje dane istniejącego przedmiotu i jego nazwę w kartach ocen studentów."""
         if not dane_aktualizacji:
             raise ValueError("Nie podano danych do aktualizacji")
 
-        zaktualizowano = await RepozytoriumPrzedmiotow.aktualizuj_przedmiot(
-            przedmiot_id,
-            dane_aktualizacji
-        )
-        if zaktualizowano:
-            return await RepozytoriumPrzedmiotow.pobierz_przedmiot_po_id(przedmiot_id)
-        return None
+        try:
+            zaktualizowano = await RepozytoriumPrzedmiotow.aktualizuj_przedmiot(
+                przedmiot_id,
+                dane_aktualizacji
+            )
+        finally:
+            pamiec_listy_przedmiotow.uniewaznij()
+        if not zaktualizowano:
+            return None
+
+        przedmiot = await RepozytoriumPrzedmiotow.pobierz_przedmiot_po_id(przedmiot_id)
+        if przedmiot and 'nazwa' in dane_aktualizacji:
+            await RepozytoriumKartOcen.aktualizuj_przedmiot_w_kartach(przedmiot_id, przedmiot)
+        return przedmiot
 
     @staticmethod
     async def usun_przedmiot(przedmiot_id: str) -> bool:
         """Usuwa przedmiot po jego identyfikatorze."""
-        return await RepozytoriumPrzedmiotow.usun_przedmiot(przedmiot_id)
+        try:
+            return await RepozytoriumPrzedmiotow.usun_przedmiot(przedmiot_id)
+        finally:
+            pamiec_listy_przedmiotow.uniewaznij()
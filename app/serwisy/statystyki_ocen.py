@@ -0,0 +1,66 @@
+"""Wektorowe obliczanie statystyk ocen przy użyciu NumPy."""
+
+from typing import Any, Sequence
+
+import numpy as np
+
+from app.modele.ocena import StatystykiOcen
+
+PROG_ZALICZENIA = 3.0
+PERCENTYLE = (10, 25, 50, 75, 90)
+
+
+def _na_liczbe(wartosc: Any) -> float:
+    try:
+        return float(str(wartosc).replace(',', '.'))
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def na_tablice_liczb(wartosci: Sequence[Any]) -> np.ndarray:
+    """Zamienia wartości ocen na tablicę float64, z NaN dla ocen nieliczbowych.
+
+    Skala ocen ma kilka różnych wartości, więc każda jest parsowana raz,
+    a tablica jest wypełniana przez odwzorowanie bez pętli Pythona.
+    Wartości niehaszowalne (np. listy) są parsowane bez zapamiętywania.
+    """
+    sparsowane = {}
+
+    def parsuj(wartosc: Any) -> float:
+        klucz = (type(wartosc), wartosc)
+        try:
+            return sparsowane[klucz]
+        except KeyError:
+            liczba = sparsowane[klucz] = _na_liczbe(wartosc)
+            return liczba
+        except TypeError:
+            return _na_liczbe(wartosc)
+
+    return np.fromiter(map(parsuj, wartosci), dtype=np.float64, count=len(wartosci))
+
+
+def oblicz_statystyki_ocen(wartosci: Sequence[Any]) -> StatystykiOcen:
+    """Liczy średnią, medianę, percentyle, histogram i odsetek zaliczonych ocen.
+
+    Oceny nieliczbowe i nieskończone ("inf", "nan") są tylko zliczane w liczbaNieliczbowych.
+    """
+    if len(wartosci) == 0:
+        return StatystykiOcen(liczbaOcen=0)
+
+    liczby = na_tablice_liczb(wartosci)
+    liczby = liczby[np.isfinite(liczby)]
+    nieliczbowe = len(wartosci) - liczby.size
+    if liczby.size == 0:
+        return StatystykiOcen(liczbaOcen=len(wartosci), liczbaNieliczbowych=nieliczbowe)
+
+    percentyle = np.percentile(liczby, (50, *PERCENTYLE))
+    wartosci_histogramu, liczebnosci = np.unique(liczby, return_counts=True)
+    return StatystykiOcen(
+        liczbaOcen=len(wartosci),
+        liczbaNieliczbowych=nieliczbowe,
+        srednia=float(liczby.mean()),
+        mediana=float(percentyle[0]),
+        percentyle={f"p{p}": float(v) for p, v in zip(PERCENTYLE, percentyle[1:])},
+        histogram={f"{w:g}": int(n) for w, n in zip(wartosci_histogramu, liczebnosci)},
+        odsetekZaliczonych=float(np.count_nonzero(liczby >= PROG_ZALICZENIA) / liczby.size)
+    )
@@ -1,10 +1,13 @@
 """Moduł serwisowy dla zarządzania użytkownikami."""
 
-from typing import List, Optional, Dict, Any
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
 
 from firebase_admin import auth
 
+from app.konfiguracja.wykonawca_auth import wykonaj_auth
 from app.modele.uzytkownik import Uzytkownik, UzytkownikTworzenie, UzytkownikLogin
+from app.modele.strona import Strona
 from app.repozytoria.uzytkownik_rep import RepozytoriumUzytkownikow
 
 
@@ -22,9 +25,35 @@ class SerwisUzytkownikow:
         return await RepozytoriumUzytkownikow.pobierz_uzytkownika_po_id(uzytkownik_id)
 
     @staticmethod
-    async def pobierz_wszystkich_uzytkownikow() -> List[Dict[str, Any]]:
+    async def pobierz_uzytkownika_z_wersja(
+        uzytkownik_id: str
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[datetime]]:
+        """Pobiera użytkownika wraz z czasem jego ostatniej zmiany."""
+        return await RepozytoriumUzytkownikow.pobierz_uzytkownika_z_wersja(uzytkownik_id)
+
+    @staticmethod
+    async def pobierz_wszystkich_uzytkownikow(
+        pola: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
         """Pobiera listę wszystkich użytkowników."""
-        return await RepozytoriumUzytkownikow.pobierz_wszystkich_uzytkownikow()
+        return await RepozytoriumUzytkownikow.pobierz_wszystkich_uzytkownikow(pola)
+
+    @staticmethod
+    async def pobierz_strone_uzytkownikow(
+        limit: int,
+        kursor: Optional[str] = None,
+        pola: Optional[List[str]] = None
+    ) -> Strona:
+        """Pobiera jedną stronę listy użytkowników."""
+        elementy, nastepna = await RepozytoriumUzytkownikow.pobierz_strone_uzytkownikow(
+            limit, kursor, pola
+        )
+        return Strona(elementy=elementy, nastepnaStrona=nastepna)
+
+    @staticmethod
+    def strumieniuj_uzytkownikow(pola: Optional[List[str]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Zwraca strumień wszystkich użytkowników bez buforowania całej listy."""
+        return RepozytoriumUzytkownikow.strumieniuj_uzytkownikow(pola)
 
     @staticmethod
     async def aktualizuj_uzytkownika(
@@ -52,7 +81,7 @@ class SerwisUzytkownikow:
     async def generuj_token_resetu_hasla(email: str) -> str:
         """Generuje token do resetowania hasła dla podanego adresu email."""
         try:
-            link = auth.generate_password_reset_link(email)
+            link = await wykonaj_auth(auth.generate_password_reset_link, email)
             return link
         except Exception as e:
             print(f"Błąd podczas generowania linku resetu hasła: {e}")
@@ -62,7 +91,7 @@ class SerwisUzytkownikow:
     async def generuj_token_weryfikacji_emaila(email: str) -> str:
         """Generuje token do weryfikacji adresu email dla podanego adresu email."""
         try:
-            link = auth.generate_email_verification_link(email)
+            link = await wykonaj_auth(auth.generate_email_verification_link, email)
             return link
         except Exception as e:
             print(f"Błąd podczas generowania linku weryfikacji emaila: {e}")
@@ -77,11 +106,11 @@ class SerwisUzytkownikow:
     async def zaloguj_uzytkownika(dane_logowania: UzytkownikLogin) -> Optional[Dict[str, Any]]:
         try:
             try:
-                user = auth.get_user_by_email(dane_logowania.email)
-            except firebase_auth.UserNotFoundError:
+                user = await wykonaj_auth(auth.get_user_by_email, dane_logowania.email)
+            except auth.UserNotFoundError:
                 return None
             
-            custom_token = auth.create_custom_token(user.uid)
+            custom_token = await wykonaj_auth(auth.create_custom_token, user.uid)
             
             user_data = await RepozytoriumUzytkownikow.pobierz_uzytkownika_po_id(user.uid)
             
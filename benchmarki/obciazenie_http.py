@@ -0,0 +1,496 @@
+"""Benchmark HTTP wszystkich tras aplikacji na syntetycznych danych uczelni.
+
+Uruchomienie: python -m benchmarki.obciazenie_http [--studenci N] [--zadania N] [--klienci N] ...
+
+Aplikacja działa w tym samym procesie (httpx.ASGITransport) na lokalnym
+backendzie bazy: BACKEND_BAZY=pamiec (domyślnie) albo sqlite, więc wynik
+nie zależy od sieci ani projektu Firebase. Dla każdej trasy
+z wszystkie_routery wysyłanych jest --zadania zapytań przez --klienci
+równoległych klientów; raport podaje p50/p95/p99 opóźnienia oraz RPS.
+Odpowiedzi spoza 2xx/3xx są liczone jako błędy: trasa z błędami nie ma
+percentyli ani RPS w raporcie, a benchmark kończy się kodem 1.
+Zapytania są budowane przed pomiarem, a cele zapytań DELETE tworzone
+wcześniej, więc czas fazy obejmuje wyłącznie obsługę zapytań HTTP.
+"""
+
+import os
+
+os.environ.setdefault('BACKEND_BAZY', 'pamiec')
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+import httpx
+import numpy as np
+from firebase_admin import firestore
+
+from app.konfiguracja.firebase_config import BACKEND_BAZY, db
+from app.modele.grupa import GrupaTworzenie
+from app.modele.ocena import MAKS_OCEN_W_IMPORCIE, OcenaTworzenie
+from app.modele.przedmiot import PrzedmiotTworzenie
+from app.repozytoria.grupa_rep import RepozytoriumGrup
+from app.repozytoria.ocena import RepozytoriumOcen
+from app.repozytoria.przedmiot import RepozytoriumPrzedmiotow
+from app.routery import wszystkie_routery
+from main import app
+
+WARTOSCI_OCEN = ('2', '3', '3.5', '4', '4.5', '5')
+ROZMIAR_STRONY = 100
+STUDENTOW_W_PRZYPISANIU = 5
+OCEN_W_IMPORCIE = 20
+KOLEJNOSC_METOD = {'GET': 0, 'POST': 1, 'PUT': 2, 'DELETE': 3}
+
+POMINIETE = {
+    ('POST', '/uzytkownicy/'): 'wymaga Firebase Authentication',
+    ('PUT', '/uzytkownicy/{uzytkownik_id}'): 'wymaga Firebase Authentication',
+    ('DELETE', '/uzytkownicy/{uzytkownik_id}'): 'wymaga Firebase Authentication',
+    ('POST', '/auth/login'): 'wymaga Firebase Authentication',
+}
+
+
+class Zapytanie(NamedTuple):
+    """Jedno zapytanie HTTP przygotowane przed pomiarem."""
+    metoda: str
+    url: str
+    json: Any = None
+
+
+class WynikTrasy(NamedTuple):
+    """Zmierzone opóźnienia i przepustowość jednej trasy; bez pomiarów, gdy były błędy."""
+    trasa: str
+    zapytania: int
+    bledy: int
+    p50_ms: Optional[float] = None
+    p95_ms: Optional[float] = None
+    p99_ms: Optional[float] = None
+    rps: Optional[float] = None
+
+
+class ZbiorDanych:
+    """Identyfikatory wygenerowanych encji oraz pule celów zapytań zmieniających dane."""
+
+    def __init__(self):
+        self.studenci: List[str] = []
+        self.wykladowcy: List[str] = []
+        self.przedmioty: List[str] = []
+        self.grupy: List[str] = []
+        self.wykladowca_grupy: Dict[str, str] = {}
+        self.czlonkowie: Dict[str, Set[str]] = {}
+        self.oceny: List[str] = []
+        self.oceniani: Set[str] = set()
+        self.pule: Dict[str, List[Any]] = {}
+
+    def czlonek(self, los: random.Random) -> Tuple[str, str]:
+        """Zwraca losową parę (grupa, student należący do grupy)."""
+        while True:
+            grupa_id = los.choice(self.grupy)
+            if self.czlonkowie[grupa_id]:
+                return grupa_id, los.choice(sorted(self.czlonkowie[grupa_id]))
+
+    def nie_czlonek(self, los: random.Random, grupa_id: str) -> str:
+        """Zwraca losowego studenta spoza grupy."""
+        while True:
+            student_id = los.choice(self.studenci)
+            if student_id not in self.czlonkowie[grupa_id]:
+                return student_id
+
+
+# --- Generowanie danych -------------------------------------------------------
+
+
+async def _zapisz_uzytkownikow(ids: List[str], rola: str) -> None:
+    for i in range(0, len(ids), 500):
+        paczka = db.batch()
+        for uid in ids[i:i + 500]:
+            paczka.set(db.collection('users').document(uid), {
+                'uid': uid,
+                'email': f'{uid}@uczelnia.example',
+                'name': uid.replace('_', ' ').title(),
+                'role': rola,
+                'created_at': firestore.SERVER_TIMESTAMP
+            })
+        await paczka.commit()
+
+
+async def _utworz_grupy(dane: ZbiorDanych, liczba: int, los: random.Random) -> List[str]:
+    wykladowcy = [los.choice(dane.wykladowcy) for _ in range(liczba)]
+    grupy = await asyncio.gather(*(
+        RepozytoriumGrup.utworz_grupe(GrupaTworzenie(
+            nazwa=f'Grupa {los.randrange(10 ** 6)}',
+            przedmiotId=los.choice(dane.przedmioty),
+            wykladowcaId=wykladowca
+        ))
+        for wykladowca in wykladowcy
+    ))
+    for grupa, wykladowca in zip(grupy, wykladowcy):
+        dane.wykladowca_grupy[grupa.grupaId] = wykladowca
+        dane.czlonkowie[grupa.grupaId] = set()
+    return [grupa.grupaId for grupa in grupy]
+
+
+async def _utworz_przedmioty(liczba: int, los: random.Random) -> List[str]:
+    przedmioty = await asyncio.gather(*(
+        RepozytoriumPrzedmiotow.utworz_przedmiot(PrzedmiotTworzenie(
+            nazwa=f'Przedmiot {los.randrange(10 ** 6)}',
+            opis='Syntetyczny przedmiot benchmarku'
+        ))
+        for _ in range(liczba)
+    ))
+    return [przedmiot.przedmiotId for przedmiot in przedmioty]
+
+
+async def _utworz_oceny(
+    dane: ZbiorDanych,
+    pary: List[Tuple[str, str]],
+    los: random.Random
+) -> List[str]:
+    ids = []
+    for i in range(0, len(pary), MAKS_OCEN_W_IMPORCIE):
+        wyniki = await RepozytoriumOcen.utworz_oceny_hurtowo([
+            OcenaTworzenie(
+                studentId=student_id,
+                grupaId=grupa_id,
+                wystawionePrzez=dane.wykladowca_grupy[grupa_id],
+                wartoscOceny=los.choice(WARTOSCI_OCEN)
+            )
+            for grupa_id, student_id in pary[i:i + MAKS_OCEN_W_IMPORCIE]
+        ])
+        ids.extend(wynik.ocenaId for wynik in wyniki if wynik.ocenaId)
+        dane.oceniani.update(
+            pary[i + wynik.indeks][1] for wynik in wyniki if wynik.ocenaId
+        )
+    return ids
+
+
+async def generuj_dane(argumenty: argparse.Namespace, los: random.Random) -> ZbiorDanych:
+    """Zapisuje w bazie syntetycznych studentów, wykładowców, przedmioty, grupy i oceny."""
+    dane = ZbiorDanych()
+    dane.studenci = [f'student_{i:06d}' for i in range(argumenty.studenci)]
+    dane.wykladowcy = [f'wykladowca_{i:04d}' for i in range(argumenty.wykladowcy)]
+    await _zapisz_uzytkownikow(dane.studenci, 'student')
+    await _zapisz_uzytkownikow(dane.wykladowcy, 'wykladowca')
+
+    dane.przedmioty = await _utworz_przedmioty(argumenty.przedmioty, los)
+    dane.grupy = await _utworz_grupy(dane, argumenty.grupy, los)
+
+    for student_id in dane.studenci:
+        for grupa_id in los.sample(dane.grupy, min(argumenty.grup_na_studenta, len(dane.grupy))):
+            dane.czlonkowie[grupa_id].add(student_id)
+    await asyncio.gather(*(
+        RepozytoriumGrup.przypisz_studentow_do_grupy(grupa_id, sorted(studenci))
+        for grupa_id, studenci in dane.czlonkowie.items() if studenci
+    ))
+
+    pary = [dane.czlonek(los) for _ in range(argumenty.studenci * argumenty.ocen_na_studenta)]
+    dane.oceny = await _utworz_oceny(dane, pary, los)
+    return dane
+
+
+# --- Scenariusze tras ---------------------------------------------------------
+
+
+class Scenariusz(NamedTuple):
+    """Sposób zbudowania zapytania do trasy oraz opcjonalne przygotowanie celów."""
+    zbuduj: Callable[[ZbiorDanych, random.Random], Zapytanie]
+    przygotuj: Optional[Callable[[ZbiorDanych, int, random.Random], Awaitable[None]]] = None
+
+
+async def _przygotuj_grupy_do_usuniecia(dane: ZbiorDanych, liczba: int, los: random.Random) -> None:
+    dane.pule['grupy_do_usuniecia'] = await _utworz_grupy(dane, liczba, los)
+
+
+async def _przygotuj_przedmioty_do_usuniecia(
+    dane: ZbiorDanych,
+    liczba: int,
+    los: random.Random
+) -> None:
+    dane.pule['przedmioty_do_usuniecia'] = await _utworz_przedmioty(liczba, los)
+
+
+async def _przygotuj_oceny_do_usuniecia(dane: ZbiorDanych, liczba: int, los: random.Random) -> None:
+    pary = [dane.czlonek(los) for _ in range(liczba)]
+    dane.pule['oceny_do_usuniecia'] = await _utworz_oceny(dane, pary, los)
+
+
+async def _przygotuj_przypisania(dane: ZbiorDanych, liczba: int, los: random.Random) -> None:
+    pary = []
+    for _ in range(liczba):
+        grupa_id = los.choice(dane.grupy)
+        student_id = dane.nie_czlonek(los, grupa_id)
+        dane.czlonkowie[grupa_id].add(student_id)
+        pary.append((grupa_id, student_id))
+    dane.pule['przypisania'] = pary
+
+
+async def _przygotuj_przypisania_hurtowe(
+    dane: ZbiorDanych,
+    liczba: int,
+    los: random.Random
+) -> None:
+    zestawy = []
+    for _ in range(liczba):
+        grupa_id = los.choice(dane.grupy)
+        studenci = list(dict.fromkeys(
+            dane.nie_czlonek(los, grupa_id) for _ in range(STUDENTOW_W_PRZYPISANIU)
+        ))
+        dane.czlonkowie[grupa_id].update(studenci)
+        zestawy.append((grupa_id, studenci))
+    dane.pule['przypisania_hurtowe'] = zestawy
+
+
+async def _przygotuj_wypisania(dane: ZbiorDanych, liczba: int, los: random.Random) -> None:
+    pary = []
+    for _ in range(liczba):
+        grupa_id, student_id = dane.czlonek(los)
+        dane.czlonkowie[grupa_id].discard(student_id)
+        pary.append((grupa_id, student_id))
+    dane.pule['wypisania'] = pary
+
+
+def _nowa_ocena(dane: ZbiorDanych, los: random.Random) -> Dict[str, str]:
+    grupa_id, student_id = dane.czlonek(los)
+    return {
+        'studentId': student_id,
+        'grupaId': grupa_id,
+        'wystawionePrzez': dane.wykladowca_grupy[grupa_id],
+        'wartoscOceny': los.choice(WARTOSCI_OCEN)
+    }
+
+
+def _import_ocen(dane: ZbiorDanych, los: random.Random) -> Zapytanie:
+    grupa_id = los.choice([g for g in dane.grupy if dane.czlonkowie[g]])
+    czlonkowie = sorted(dane.czlonkowie[grupa_id])
+    return Zapytanie('POST', '/oceny/hurtowo', [
+        {
+            'studentId': los.choice(czlonkowie),
+            'grupaId': grupa_id,
+            'wystawionePrzez': dane.wykladowca_grupy[grupa_id],
+            'wartoscOceny': los.choice(WARTOSCI_OCEN)
+        }
+        for _ in range(OCEN_W_IMPORCIE)
+    ])
+
+
+def _przypisanie_hurtowe(dane: ZbiorDanych, los: random.Random) -> Zapytanie:
+    grupa_id, studenci = dane.pule['przypisania_hurtowe'].pop()
+    return Zapytanie('POST', f'/grupy/{grupa_id}/studenci', {'studenciIds': studenci})
+
+
+def _z_puli(
+    nazwa: str,
+    metoda: str,
+    szablon: str
+) -> Callable[[ZbiorDanych, random.Random], Zapytanie]:
+    def zbuduj(dane: ZbiorDanych, los: random.Random) -> Zapytanie:
+        cel = dane.pule[nazwa].pop()
+        sciezka = szablon.format(*cel) if isinstance(cel, tuple) else szablon.format(cel)
+        return Zapytanie(metoda, sciezka)
+    return zbuduj
+
+
+SCENARIUSZE: Dict[Tuple[str, str], Scenariusz] = {
+    ('GET', '/grupy/'): Scenariusz(
+        lambda d, l: Zapytanie('GET', f'/grupy/?limit={ROZMIAR_STRONY}')),
+    ('GET', '/grupy/{grupa_id}/statystyki'): Scenariusz(
+        lambda d, l: Zapytanie('GET', f'/grupy/{l.choice(d.grupy)}/statystyki')),
+    ('GET', '/grupy/{grupa_id}'): Scenariusz(
+        lambda d, l: Zapytanie('GET', f'/grupy/{l.choice(d.grupy)}')),
+    ('POST', '/grupy/'): Scenariusz(lambda d, l: Zapytanie('POST', '/grupy/', {
+        'nazwa': f'Grupa {l.randrange(10 ** 6)}',
+        'przedmiotId': l.choice(d.przedmioty),
+        'wykladowcaId': l.choice(d.wykladowcy)
+    })),
+    ('PUT', '/grupy/{grupa_id}'): Scenariusz(
+        lambda d, l: Zapytanie(
+            'PUT', f'/grupy/{l.choice(d.grupy)}', {'nazwa': f'Grupa {l.randrange(10 ** 6)}'}
+        )),
+    ('DELETE', '/grupy/{grupa_id}'): Scenariusz(
+        _z_puli('grupy_do_usuniecia', 'DELETE', '/grupy/{}'), _przygotuj_grupy_do_usuniecia),
+    ('POST', '/grupy/{grupa_id}/studenci'): Scenariusz(
+        _przypisanie_hurtowe, _przygotuj_przypisania_hurtowe),
+    ('POST', '/grupy/{grupa_id}/studenci/{student_id}'): Scenariusz(
+        _z_puli('przypisania', 'POST', '/grupy/{}/studenci/{}'), _przygotuj_przypisania),
+    ('DELETE', '/grupy/{grupa_id}/studenci/{student_id}'): Scenariusz(
+        _z_puli('wypisania', 'DELETE', '/grupy/{}/studenci/{}'), _przygotuj_wypisania),
+    ('GET', '/oceny/'): Scenariusz(
+        lambda d, l: Zapytanie('GET', f'/oceny/?limit={ROZMIAR_STRONY}')),
+    ('GET', '/oceny/{ocena_id}'): Scenariusz(
+        lambda d, l: Zapytanie('GET', f'/oceny/{l.choice(d.oceny)}')),
+    ('POST', '/oceny/'): Scenariusz(lambda d, l: Zapytanie('POST', '/oceny/', _nowa_ocena(d, l))),
+    ('POST', '/oceny/hurtowo'): Scenariusz(_import_ocen),
+    ('GET', '/oceny/grupy/{grupa_id}/podsumowanie'): Scenariusz(
+        lambda d, l: Zapytanie('GET', f'/oceny/grupy/{l.choice(d.grupy)}/podsumowanie')),
+    ('POST', '/oceny/grupy/{grupa_id}/podsumowanie/przelicz'): Scenariusz(
+        lambda d, l: Zapytanie('POST', f'/oceny/grupy/{l.choice(d.grupy)}/podsumowanie/przelicz')),
+    ('GET', '/oceny/studenci/{student_id}/karta'): Scenariusz(
+        lambda d, l: Zapytanie('GET', f'/oceny/studenci/{l.choice(sorted(d.oceniani))}/karta')),
+    ('POST', '/oceny/studenci/{student_id}/karta/przelicz'): Scenariusz(
+        lambda d, l: Zapytanie('POST', f'/oceny/studenci/{l.choice(d.studenci)}/karta/przelicz')),
+    ('PUT', '/oceny/{ocena_id}'): Scenariusz(
+        lambda d, l: Zapytanie(
+            'PUT', f'/oceny/{l.choice(d.oceny)}', {'wartoscOceny': l.choice(WARTOSCI_OCEN)}
+        )),
+    ('DELETE', '/oceny/{ocena_id}'): Scenariusz(
+        _z_puli('oceny_do_usuniecia', 'DELETE', '/oceny/{}'), _przygotuj_oceny_do_usuniecia),
+    ('GET', '/przedmioty/'): Scenariusz(
+        lambda d, l: Zapytanie('GET', f'/przedmioty/?limit={ROZMIAR_STRONY}')),
+    ('GET', '/przedmioty/{przedmiot_id}/statystyki'): Scenariusz(
+        lambda d, l: Zapytanie('GET', f'/przedmioty/{l.choice(d.przedmioty)}/statystyki')),
+    ('GET', '/przedmioty/{przedmiot_id}'): Scenariusz(
+        lambda d, l: Zapytanie('GET', f'/przedmioty/{l.choice(d.przedmioty)}')),
+    ('POST', '/przedmioty/'): Scenariusz(lambda d, l: Zapytanie('POST', '/przedmioty/', {
+        'nazwa': f'Przedmiot {l.randrange(10 ** 6)}', 'opis': 'Nowy przedmiot'
+    })),
+    ('PUT', '/przedmioty/{przedmiot_id}'): Scenariusz(lambda d, l: Zapytanie(
+        'PUT', f'/przedmioty/{l.choice(d.przedmioty)}',
+        {'nazwa': f'Przedmiot {l.randrange(10 ** 6)}', 'opis': 'Zmieniony opis'}
+    )),
+    ('DELETE', '/przedmioty/{przedmiot_id}'): Scenariusz(
+        _z_puli('przedmioty_do_usuniecia', 'DELETE', '/przedmioty/{}'),
+        _przygotuj_przedmioty_do_usuniecia),
+    ('GET', '/uzytkownicy/'): Scenariusz(
+        lambda d, l: Zapytanie('GET', f'/uzytkownicy/?limit={ROZMIAR_STRONY}')),
+    ('GET', '/uzytkownicy/{uzytkownik_id}'): Scenariusz(
+        lambda d, l: Zapytanie('GET', f'/uzytkownicy/{l.choice(d.studenci + d.wykladowcy)}')),
+    ('GET', '/metrics'): Scenariusz(lambda d, l: Zapytanie('GET', '/metrics')),
+}
+
+
+# --- Pomiar -------------------------------------------------------------------
+
+
+def trasy_aplikacji() -> List[Tuple[str, str]]:
+    """Zwraca pary (metoda, szablon ścieżki) wszystkich tras w kolejności GET, POST, PUT, DELETE."""
+    trasy = [
+        (metoda, trasa.path)
+        for router in wszystkie_routery
+        for trasa in router.routes
+        for metoda in sorted(trasa.methods)
+    ]
+    return sorted(trasy, key=lambda t: KOLEJNOSC_METOD.get(t[0], len(KOLEJNOSC_METOD)))
+
+
+async def zmierz_trase(
+    klient: httpx.AsyncClient,
+    trasa: Tuple[str, str],
+    zapytania: List[Zapytanie],
+    liczba_klientow: int
+) -> WynikTrasy:
+    """Wysyła przygotowane zapytania przez równoległych klientów i liczy percentyle.
+
+    Percentyle i RPS są liczone tylko dla trasy, która odpowiedziała bez błędów.
+    """
+    czasy: List[float] = []
+    bledy = 0
+    kolejka = iter(zapytania)
+
+    async def klient_http():
+        nonlocal bledy
+        for zapytanie in kolejka:
+            start = time.perf_counter()
+            odpowiedz = await klient.request(zapytanie.metoda, zapytanie.url, json=zapytanie.json)
+            czasy.append(time.perf_counter() - start)
+            bledy += not 200 <= odpowiedz.status_code < 400
+
+    start = time.perf_counter()
+    await asyncio.gather(*(klient_http() for _ in range(liczba_klientow)))
+    czas_fazy = time.perf_counter() - start
+
+    if bledy:
+        return WynikTrasy(f'{trasa[0]} {trasa[1]}', len(czasy), bledy)
+    p50, p95, p99 = np.percentile(np.array(czasy) * 1000, [50, 95, 99])
+    return WynikTrasy(
+        f'{trasa[0]} {trasa[1]}', len(czasy), bledy,
+        float(p50), float(p95), float(p99), len(czasy) / czas_fazy
+    )
+
+
+async def uruchom(argumenty: argparse.Namespace) -> List[WynikTrasy]:
+    """Generuje dane, a następnie mierzy kolejno każdą trasę aplikacji."""
+    los = random.Random(argumenty.ziarno)
+    start = time.perf_counter()
+    dane = await generuj_dane(argumenty, los)
+    print(f"Dane: {len(dane.studenci)} studentów, {len(dane.wykladowcy)} wykładowców, "
+          f"{len(dane.przedmioty)} przedmiotów, {len(dane.grupy)} grup, {len(dane.oceny)} ocen "
+          f"({time.perf_counter() - start:.1f} s, backend {BACKEND_BAZY})")
+
+    filtr = re.compile(argumenty.trasy) if argumenty.trasy else None
+    wyniki = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://benchmark') as klient:
+        for trasa in trasy_aplikacji():
+            nazwa = f'{trasa[0]} {trasa[1]}'
+            if filtr and not filtr.search(nazwa):
+                continue
+            if trasa in POMINIETE:
+                print(f"pominięto {nazwa}: {POMINIETE[trasa]}")
+                continue
+            scenariusz = SCENARIUSZE.get(trasa)
+            if scenariusz is None:
+                print(f"brak scenariusza dla {nazwa}")
+                continue
+            if scenariusz.przygotuj:
+                await scenariusz.przygotuj(dane, argumenty.zadania, los)
+            zapytania = [scenariusz.zbuduj(dane, los) for _ in range(argumenty.zadania)]
+            wyniki.append(await zmierz_trase(klient, trasa, zapytania, argumenty.klienci))
+    return wyniki
+
+
+def _liczba(wartosc: Optional[float], szerokosc: int, precyzja: int) -> str:
+    return f"{'-':>{szerokosc}}" if wartosc is None else f"{wartosc:>{szerokosc}.{precyzja}f}"
+
+
+def wypisz_raport(wyniki: List[WynikTrasy]) -> None:
+    """Wypisuje tabelę opóźnień i przepustowości tras oraz listę tras z błędami."""
+    szerokosc = max(len(wynik.trasa) for wynik in wyniki)
+    print(f"{'trasa':<{szerokosc}} {'n':>6} {'błędy':>6} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'RPS':>9}")
+    for wynik in wyniki:
+        print(f"{wynik.trasa:<{szerokosc}} {wynik.zapytania:>6} {wynik.bledy:>6} "
+              f"{_liczba(wynik.p50_ms, 8, 2)} {_liczba(wynik.p95_ms, 8, 2)} "
+              f"{_liczba(wynik.p99_ms, 8, 2)} {_liczba(wynik.rps, 9, 1)}")
+    for wynik in wyniki:
+        if wynik.bledy:
+            print(f"błędy: {wynik.trasa} "
+                  f"({wynik.bledy}/{wynik.zapytania} odpowiedzi spoza 2xx/3xx)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--studenci', type=int, default=2000)
+    parser.add_argument('--wykladowcy', type=int, default=100)
+    parser.add_argument('--przedmioty', type=int, default=50)
+    parser.add_argument('--grupy', type=int, default=200)
+    parser.add_argument('--grup-na-studenta', type=int, default=4)
+    parser.add_argument('--ocen-na-studenta', type=int, default=10)
+    parser.add_argument('--zadania', type=int, default=200, help="Liczba zapytań na trasę")
+    parser.add_argument('--klienci', type=int, default=16, help="Liczba równoległych klientów")
+    parser.add_argument(
+        '--ziarno', type=int, default=2024, help="Ziarno generatora danych i zapytań"
+    )
+    parser.add_argument('--trasy', help="Wyrażenie regularne wybierające trasy, np. '^GET /grupy'")
+    parser.add_argument('--json', help="Ścieżka pliku, do którego zapisać wyniki")
+    argumenty = parser.parse_args()
+
+    if BACKEND_BAZY == 'firestore':
+        parser.error(
+            "Benchmark działa tylko na lokalnym backendzie (BACKEND_BAZY=pamiec lub sqlite)"
+        )
+
+    wyniki = asyncio.run(uruchom(argumenty))
+    wypisz_raport(wyniki)
+    if argumenty.json:
+        with open(argumenty.json, 'w', encoding='utf-8') as plik:
+            json.dump([wynik._asdict() for wynik in wyniki], plik, ensure_ascii=False, indent=2)
+    if any(wynik.bledy for wynik in wyniki):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
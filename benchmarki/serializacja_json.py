@@ -0,0 +1,95 @@
+"""Porównanie przepustowości serializacji list dokumentów Firestore do JSON.
+
+Uruchomienie: python -m benchmarki.serializacja_json [--dokumenty N] [--powtorzenia N]
+
+Mierzy ścieżkę domyślną FastAPI (jsonable_encoder + JSONResponse) oraz
+OdpowiedzJSON zwracaną wprost z endpointu, na syntetycznych grupach
+zawierających znaczniki czasu DatetimeWithNanoseconds.
+"""
+
+import argparse
+import datetime
+import statistics
+import time
+from typing import Any, Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+
+from app.routery.odpowiedzi import OdpowiedzJSON
+
+
+def syntetyczne_grupy(liczba: int) -> List[Dict[str, Any]]:
+    """Buduje listę dokumentów grup w postaci zwracanej przez repozytorium."""
+    poczatek = datetime.datetime(2024, 10, 1, tzinfo=datetime.timezone.utc)
+    grupy = []
+    for i in range(liczba):
+        czas = poczatek + datetime.timedelta(seconds=i)
+        grupy.append({
+            'id': f'grupa_{i}',
+            'name': f'Grupa laboratoryjna {i}',
+            'subjectId': f'przedmiot_{i % 50}',
+            'lecturerId': f'wykladowca_{i % 200}',
+            'studentsIds': [f'student_{i}_{j}' for j in range(30)],
+            'createdAt': DatetimeWithNanoseconds(
+                *czas.timetuple()[:6], nanosecond=123456789, tzinfo=czas.tzinfo
+            ),
+            'updatedAt': DatetimeWithNanoseconds(
+                *czas.timetuple()[:6], nanosecond=987654321, tzinfo=czas.tzinfo
+            ),
+        })
+    return grupy
+
+
+def sciezka_domyslna(dokumenty: List[Dict[str, Any]]) -> bytes:
+    """Odtwarza serializację FastAPI dla endpointu zwracającego listę słowników."""
+    return JSONResponse(jsonable_encoder(dokumenty)).body
+
+
+def sciezka_orjson(dokumenty: List[Dict[str, Any]]) -> bytes:
+    """Serializuje listę tak, jak robią to endpointy listowe zwracające OdpowiedzJSON."""
+    return OdpowiedzJSON(dokumenty).body
+
+
+def zmierz(
+    funkcja: Callable[[List[Dict[str, Any]]], bytes],
+    dokumenty: List[Dict[str, Any]],
+    powtorzenia: int
+) -> List[float]:
+    """Zwraca czasy (w sekundach) kolejnych serializacji całej listy."""
+    funkcja(dokumenty)
+    czasy = []
+    for _ in range(powtorzenia):
+        start = time.perf_counter()
+        funkcja(dokumenty)
+        czasy.append(time.perf_counter() - start)
+    return czasy
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dokumenty', type=int, default=5000)
+    parser.add_argument('--powtorzenia', type=int, default=20)
+    argumenty = parser.parse_args()
+
+    dokumenty = syntetyczne_grupy(argumenty.dokumenty)
+    wyniki = {}
+    sciezki = (
+        ('jsonable_encoder + json', sciezka_domyslna),
+        ('OdpowiedzJSON (orjson)', sciezka_orjson)
+    )
+    for nazwa, funkcja in sciezki:
+        mediana = statistics.median(zmierz(funkcja, dokumenty, argumenty.powtorzenia))
+        wyniki[nazwa] = mediana
+        print(
+            f"{nazwa:<26} mediana {mediana * 1000:8.2f} ms  "
+            f"{len(dokumenty) / mediana:12.0f} dok/s"
+        )
+
+    domyslna, szybka = wyniki.values()
+    print(f"przyspieszenie: {domyslna / szybka:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
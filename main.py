@@ -2,14 +2,21 @@
 
 from fastapi import FastAPI
 
+from app.konfiguracja.mapa_tozsamosci import PosrednikMapyTozsamosci
+from app.konfiguracja.metryki import PosrednikMetryk
 from app.routery import wszystkie_routery
+from app.routery.odpowiedzi import OdpowiedzJSON
 
 app = FastAPI(
     title="System Informacji Studenckiej USOS-like",
     description="API do zarządzania informacjami studenckimi",
     version="1.0.0",
+    default_response_class=OdpowiedzJSON,
 )
 
+app.add_middleware(PosrednikMapyTozsamosci)
+app.add_middleware(PosrednikMetryk)
+
 for router in wszystkie_routery:
     app.include_router(router)
 
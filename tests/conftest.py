@@ -2,6 +2,9 @@ import pytest
 import pytest_asyncio
 from unittest.mock import MagicMock, AsyncMock
 from app.serwisy import przedmiot as serwis_przedmiot_module
+from app.repozytoria.pamiec_podreczna import wszystkie_pamieci
+from app.konfiguracja.baza_lokalna import KlientLokalny, MagazynPamieci
+from app.konfiguracja.operacje_firestore import KlientZPomiarem
 from httpx import AsyncClient
 from main import app as main_app
 from fastapi.testclient import TestClient
@@ -10,10 +13,78 @@ async def mock_async_iterator(items):
     for item in items:
         yield item
 
+MODULY_Z_BAZA = (
+    "app.repozytoria.grupa_rep",
+    "app.repozytoria.uzytkownik_rep",
+    "app.repozytoria.przedmiot",
+    "app.repozytoria.ocena",
+    "app.repozytoria.karta_ocen",
+    "app.repozytoria.podsumowanie_ocen",
+)
+
 def mock_iterator(items):
     for item in items:
         yield item
 
+def mock_dokumenty(mock_db, dokumenty):
+    """
+    Podpina pod mock 'db' dokumenty opisane słownikiem {ścieżka: dane}.
+
+    Dane równe None oznaczają nieistniejący dokument. Zwraca słownik
+    referencji według ścieżki, aby testy mogły sprawdzać zapisy.
+    """
+    referencje = {}
+
+    def referencja(sciezka):
+        if sciezka not in referencje:
+            ref = MagicMock(path=sciezka, id=sciezka.split('/')[-1])
+            dane = dokumenty.get(sciezka)
+            snapshot = MagicMock(exists=dane is not None, id=ref.id, reference=ref)
+            snapshot.to_dict.return_value = dane
+            ref.get = AsyncMock(return_value=snapshot)
+            ref.set = AsyncMock()
+            ref.update = AsyncMock()
+            ref.delete = AsyncMock()
+            referencje[sciezka] = ref
+        return referencje[sciezka]
+
+    def kolekcja(nazwa):
+        mock_kolekcja = MagicMock()
+        mock_kolekcja.document.side_effect = (
+            lambda doc_id=None: referencja(f"{nazwa}/{doc_id or 'nowy_dokument'}")
+        )
+        return mock_kolekcja
+
+    mock_db.collection.side_effect = kolekcja
+    mock_db.batch.return_value.commit = AsyncMock()
+    mock_db.get_all = MagicMock(
+        side_effect=lambda refs, *args, **kwargs: mock_async_iterator(
+            [ref.get.return_value for ref in refs]
+        )
+    )
+    return referencje
+
+@pytest.fixture(autouse=True)
+def wyczysc_pamieci_podreczne():
+    """
+    Czyści pamięci podręczne procesu, aby testy nie widziały swoich wpisów.
+    """
+    for pamiec in wszystkie_pamieci:
+        pamiec.wyczysc()
+    yield
+    for pamiec in wszystkie_pamieci:
+        pamiec.wyczysc()
+
+def mock_transakcja():
+    """
+    Tworzy mock transakcji Firestore zgodny z dekoratorem async_transactional.
+    """
+    transakcja = MagicMock(_id=b"mock_transakcja", _max_attempts=1, _read_only=False)
+    transakcja._begin = AsyncMock()
+    transakcja._commit = AsyncMock()
+    transakcja._rollback = AsyncMock()
+    return transakcja
+
 @pytest.fixture
 def mock_serwis_przedmiotow():
     """
@@ -45,7 +116,10 @@ def mock_db():
 
     mock_doc_ref = MagicMock()
     mock_doc_ref.id = "mock_doc_id_123"
-    mock_doc_ref.set.return_value = None
+    mock_doc_ref.get = AsyncMock()
+    mock_doc_ref.set = AsyncMock(return_value=None)
+    mock_doc_ref.update = AsyncMock()
+    mock_doc_ref.delete = AsyncMock()
     mock_db_instance.collection.return_value.document.return_value = mock_doc_ref
     
     mock_doc_snapshot = MagicMock()
@@ -65,6 +139,19 @@ def mock_db():
         yield mock_db_instance
 
 
+@pytest.fixture
+def baza_z_pomiarem():
+    """
+    Fixture podpinający pod wszystkie repozytoria lokalną bazę w pamięci
+    opakowaną w zliczanie operacji, do użycia z licz_operacje()/budzet_operacji().
+    """
+    klient = KlientZPomiarem(KlientLokalny(MagazynPamieci()))
+    with pytest.MonkeyPatch().context() as mp:
+        for modul in MODULY_Z_BAZA:
+            mp.setattr(f"{modul}.db", klient)
+        yield klient
+
+
 @pytest.fixture
 def mock_auth():
     """
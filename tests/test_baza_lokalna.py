@@ -0,0 +1,125 @@
+import pytest
+from firebase_admin import firestore
+from google.api_core import exceptions
+from google.cloud.firestore_v1 import transforms
+
+from app.konfiguracja.baza_lokalna import KlientLokalny, MagazynPamieci, MagazynSQLite
+from app.repozytoria.grupa_rep import RepozytoriumGrup
+
+
+@pytest.fixture(params=['pamiec', 'sqlite'])
+def klient(request, tmp_path):
+    """
+    Fixture zwracający klienta lokalnego na magazynie w pamięci i w SQLite.
+    """
+    if request.param == 'pamiec':
+        yield KlientLokalny(MagazynPamieci())
+    else:
+        magazyn = MagazynSQLite(str(tmp_path / "baza.sqlite3"))
+        yield KlientLokalny(magazyn)
+        magazyn.zamknij()
+
+
+@pytest.mark.asyncio
+async def test_zapisy_z_wartosciami_specjalnymi(klient):
+    """Testuje SERVER_TIMESTAMP, ArrayUnion/ArrayRemove, Increment i DELETE_FIELD."""
+    ref = klient.collection('groups').document('g1')
+    await ref.set({
+        'studentsIds': ['s1'],
+        'stats': {'count': 1, 'old': True},
+        'createdAt': transforms.SERVER_TIMESTAMP
+    })
+    await ref.update({
+        'studentsIds': firestore.ArrayUnion(['s1', 's2']), 'stats.count': firestore.Increment(2)
+    })
+    await ref.set({'stats': {'old': firestore.DELETE_FIELD, 'new': 1}}, merge=True)
+    await ref.update({'studentsIds': firestore.ArrayRemove(['s1'])})
+
+    snapshot = await ref.get()
+
+    dane = snapshot.to_dict()
+    assert dane['studentsIds'] == ['s2']
+    assert dane['stats'] == {'count': 3, 'new': 1}
+    assert dane['createdAt'] == snapshot.create_time.replace(
+        microsecond=dane['createdAt'].microsecond
+    )
+    assert snapshot.update_time > snapshot.create_time
+
+
+@pytest.mark.asyncio
+async def test_update_nieistniejacego_dokumentu_zglasza_not_found(klient):
+    """Testuje, że update brakującego dokumentu zachowuje się jak w Firestore."""
+    with pytest.raises(exceptions.NotFound):
+        await klient.collection('groups').document('brak').update({'name': 'x'})
+
+
+@pytest.mark.asyncio
+async def test_zapytania_where_order_by_limit_start_after_select(klient):
+    """Testuje filtry, sortowanie po ID, kursor i projekcję pól."""
+    for i in range(5):
+        await klient.collection('grades').document(f'o{i}').set(
+            {'groupId': 'g1' if i % 2 else 'g2', 'value': str(i)}
+        )
+
+    g1 = [doc.id async for doc in klient.collection('grades').where('groupId', '==', 'g1').stream()]
+    w_grupach = [
+        doc.id
+        async for doc in klient.collection('grades').where('groupId', 'in', ['g1', 'g2']).stream()
+    ]
+    strona = [
+        doc.to_dict() async for doc in klient.collection('grades').select(['value'])
+        .order_by('__name__').start_after({'__name__': 'o1'}).limit(2).stream()
+    ]
+
+    assert g1 == ['o1', 'o3']
+    assert w_grupach == ['o0', 'o1', 'o2', 'o3', 'o4']
+    assert strona == [{'value': '2'}, {'value': '3'}]
+
+
+@pytest.mark.asyncio
+async def test_paczka_jest_atomowa(klient):
+    """Testuje, że błąd jednego zapisu paczki nie zostawia pozostałych."""
+    paczka = klient.batch()
+    paczka.set(klient.collection('grades').document('o1'), {'value': '5'})
+    paczka.update(klient.collection('grades').document('brak'), {'value': '4'})
+
+    with pytest.raises(exceptions.NotFound):
+        await paczka.commit()
+
+    assert not (await klient.collection('grades').document('o1').get()).exists
+
+
+@pytest.mark.asyncio
+async def test_transakcja_jest_ponawiana_po_zmianie_odczytanego_dokumentu(klient):
+    """Testuje, że równoległa zmiana odczytanego dokumentu wymusza ponowienie."""
+    ref = klient.collection('groups').document('g1')
+    await ref.set({'studentsIds': []})
+    proby = []
+
+    @firestore.async_transactional
+    async def dopisz(transakcja, student_id):
+        snapshot = await ref.get(transaction=transakcja)
+        if not proby:
+            await ref.update({'studentsIds': firestore.ArrayUnion(['obcy'])})
+        proby.append(student_id)
+        transakcja.update(ref, {'studentsIds': snapshot.to_dict()['studentsIds'] + [student_id]})
+
+    await dopisz(klient.transaction(max_attempts=3), 's1')
+
+    assert len(proby) == 2
+    assert (await ref.get()).to_dict()['studentsIds'] == ['obcy', 's1']
+
+
+@pytest.mark.asyncio
+async def test_repozytorium_grup_na_kliencie_lokalnym(monkeypatch):
+    """Testuje przypisanie studenta w transakcji repozytorium na backendzie lokalnym."""
+    klient = KlientLokalny(MagazynPamieci())
+    for modul in ('grupa_rep', 'uzytkownik_rep', 'przedmiot'):
+        monkeypatch.setattr(f"app.repozytoria.{modul}.db", klient)
+    await klient.collection('users').document('s1').set({'role': 'student'})
+    await klient.collection('groups').document('g1').set({'id': 'g1', 'studentsIds': []})
+
+    assert await RepozytoriumGrup.przypisz_studenta_do_grupy('g1', 's1') is True
+    with pytest.raises(ValueError, match="jest już przypisany"):
+        await RepozytoriumGrup.przypisz_studenta_do_grupy('g1', 's1')
+    assert (await RepozytoriumGrup.pobierz_grupe_po_id('g1'))['studentsIds'] == ['s1']
@@ -0,0 +1,178 @@
+from typing import Any, Dict, NamedTuple
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi.routing import APIRoute
+
+from app.konfiguracja.operacje_firestore import budzet_operacji
+from app.modele.ocena import OcenaTworzenie
+from app.repozytoria.ocena import RepozytoriumOcen
+from app.repozytoria.pamiec_podreczna import wszystkie_pamieci
+from main import app as main_app
+
+
+class BudzetTrasy(NamedTuple):
+    """Zapytanie do trasy i maksymalna liczba operacji Firestore, jaką może wykonać."""
+    url: str
+    odczyty: int
+    zapisy: int = 0
+    usuniecia: int = 0
+    strumieniowane: int = 0
+    json: Any = None
+
+
+# Budżety odpowiadają danym z fixture'a dane_uczelni przy zimnych pamięciach
+# podręcznych. Obniżenie liczby operacji trasy powinno obniżyć jej budżet.
+BUDZETY: Dict[tuple, BudzetTrasy] = {
+    ('GET', '/grupy/'): BudzetTrasy('/grupy/', 0, strumieniowane=3),
+    ('GET', '/grupy/{grupa_id}/statystyki'): BudzetTrasy(
+        '/grupy/g1/statystyki', 1, strumieniowane=2),
+    ('GET', '/grupy/{grupa_id}'): BudzetTrasy('/grupy/g1', 1),
+    ('POST', '/grupy/'): BudzetTrasy(
+        '/grupy/', 1, 1, json={'nazwa': 'G4', 'przedmiotId': 'p1', 'wykladowcaId': 'w1'}),
+    ('PUT', '/grupy/{grupa_id}'): BudzetTrasy(
+        '/grupy/g1', 3, 3, strumieniowane=2, json={'nazwa': 'G1 nowa'}),
+    ('DELETE', '/grupy/{grupa_id}'): BudzetTrasy('/grupy/g3', 0, usuniecia=1),
+    ('POST', '/grupy/{grupa_id}/studenci'): BudzetTrasy(
+        '/grupy/g2/studenci', 3, 1, json={'studenciIds': ['s2', 's3']}),
+    ('POST', '/grupy/{grupa_id}/studenci/{student_id}'): BudzetTrasy('/grupy/g2/studenci/s3', 2, 1),
+    ('DELETE', '/grupy/{grupa_id}/studenci/{student_id}'): BudzetTrasy(
+        '/grupy/g1/studenci/s2', 1, 1),
+    ('GET', '/oceny/'): BudzetTrasy('/oceny/', 0, strumieniowane=3),
+    ('GET', '/oceny/{ocena_id}'): BudzetTrasy('/oceny/{o1}', 1),
+    ('POST', '/oceny/'): BudzetTrasy('/oceny/', 3, 3, json={
+        'studentId': 's1', 'grupaId': 'g1', 'wystawionePrzez': 'w1', 'wartoscOceny': '4'
+    }),
+    ('POST', '/oceny/hurtowo'): BudzetTrasy('/oceny/hurtowo', 2, 5, json=[
+        {'studentId': 's1', 'grupaId': 'g1', 'wystawionePrzez': 'w1', 'wartoscOceny': '4'},
+        {'studentId': 's2', 'grupaId': 'g1', 'wystawionePrzez': 'w1', 'wartoscOceny': '5'}
+    ]),
+    ('GET', '/oceny/grupy/{grupa_id}/podsumowanie'): BudzetTrasy('/oceny/grupy/g1/podsumowanie', 1),
+    ('POST', '/oceny/grupy/{grupa_id}/podsumowanie/przelicz'): BudzetTrasy(
+        '/oceny/grupy/g1/podsumowanie/przelicz', 0, 1, strumieniowane=2),
+    ('GET', '/oceny/studenci/{student_id}/karta'): BudzetTrasy('/oceny/studenci/s1/karta', 1),
+    ('POST', '/oceny/studenci/{student_id}/karta/przelicz'): BudzetTrasy(
+        '/oceny/studenci/s1/karta/przelicz', 4, 1, strumieniowane=2),
+    ('PUT', '/oceny/{ocena_id}'): BudzetTrasy('/oceny/{o1}', 3, 3, json={'wartoscOceny': '5'}),
+    ('DELETE', '/oceny/{ocena_id}'): BudzetTrasy('/oceny/{o1}', 1, 2, 1),
+    ('GET', '/przedmioty/'): BudzetTrasy('/przedmioty/', 0, strumieniowane=2),
+    ('GET', '/przedmioty/{przedmiot_id}/statystyki'): BudzetTrasy(
+        '/przedmioty/p1/statystyki', 1, strumieniowane=4),
+    ('GET', '/przedmioty/{przedmiot_id}'): BudzetTrasy('/przedmioty/p1', 1),
+    ('POST', '/przedmioty/'): BudzetTrasy(
+        '/przedmioty/', 0, 1, json={'nazwa': 'Fizyka', 'opis': 'Opis'}),
+    ('PUT', '/przedmioty/{przedmiot_id}'): BudzetTrasy(
+        '/przedmioty/p1', 1, 3, strumieniowane=4, json={'nazwa': 'Analiza II', 'opis': 'Opis'}),
+    ('DELETE', '/przedmioty/{przedmiot_id}'): BudzetTrasy('/przedmioty/p2', 0, usuniecia=1),
+    ('GET', '/uzytkownicy/'): BudzetTrasy('/uzytkownicy/', 0, strumieniowane=4),
+    ('GET', '/uzytkownicy/{uzytkownik_id}'): BudzetTrasy('/uzytkownicy/s1', 1),
+    ('POST', '/uzytkownicy/'): BudzetTrasy('/uzytkownicy/', 0, 1, json={
+        'email': 'nowy@uczelnia.example', 'imie': 'Nowy', 'rola': 'student', 'haslo': 'tajne-haslo'
+    }),
+    ('PUT', '/uzytkownicy/{uzytkownik_id}'): BudzetTrasy(
+        '/uzytkownicy/s3', 2, 1, json={'imie': 'Zmieniony'}),
+    ('DELETE', '/uzytkownicy/{uzytkownik_id}'): BudzetTrasy('/uzytkownicy/s3', 0, usuniecia=1),
+    ('POST', '/auth/login'): BudzetTrasy(
+        '/auth/login', 1, json={'email': 's1@uczelnia.example', 'haslo': 'x'}),
+    ('GET', '/metrics'): BudzetTrasy('/metrics', 0),
+}
+
+def trasy_aplikacji():
+    return sorted(
+        (metoda, trasa.path)
+        for trasa in main_app.routes if isinstance(trasa, APIRoute)
+        for metoda in trasa.methods
+    )
+
+
+@pytest_asyncio.fixture
+async def dane_uczelni(baza_z_pomiarem):
+    """
+    Fixture zapisujący małą uczelnię: 3 studentów, wykładowcę, 2 przedmioty, 3 grupy i 3 oceny.
+
+    Pamięci podręczne są czyszczone po zapisie, więc budżety dotyczą zimnego startu.
+    """
+    db = baza_z_pomiarem
+    uzytkownicy = (('s1', 'student'), ('s2', 'student'), ('s3', 'student'), ('w1', 'wykladowca'))
+    for uid, rola in uzytkownicy:
+        await db.collection('users').document(uid).set({
+            'uid': uid, 'email': f'{uid}@uczelnia.example', 'name': uid, 'role': rola
+        })
+    for przedmiot_id in ('p1', 'p2'):
+        await db.collection('subjects').document(przedmiot_id).set({
+            'id': przedmiot_id, 'name': f'Przedmiot {przedmiot_id}', 'description': 'Opis'
+        })
+    grupy = (('g1', 'p1', ['s1', 's2']), ('g2', 'p2', ['s1']), ('g3', 'p1', []))
+    for grupa_id, przedmiot_id, studenci in grupy:
+        await db.collection('groups').document(grupa_id).set({
+            'id': grupa_id, 'name': grupa_id, 'subjectId': przedmiot_id,
+            'lecturerId': 'w1', 'studentsIds': studenci
+        })
+    wyniki = await RepozytoriumOcen.utworz_oceny_hurtowo([
+        OcenaTworzenie(
+            studentId=student_id, grupaId=grupa_id, wystawionePrzez='w1', wartoscOceny=wartosc
+        )
+        for student_id, grupa_id, wartosc in (
+            ('s1', 'g1', '3'), ('s2', 'g1', '4'), ('s1', 'g2', '5')
+        )
+    ])
+    for pamiec in wszystkie_pamieci:
+        pamiec.wyczysc()
+    return {'o1': wyniki[0].ocenaId}
+
+
+@pytest.fixture
+def auth_uzytkownikow():
+    """
+    Fixture zastępujący Firebase Authentication w repozytorium i serwisie użytkowników.
+    """
+    mock_auth = MagicMock()
+    mock_auth.UserNotFoundError = type('UserNotFoundError', (Exception,), {})
+    mock_auth.create_user.return_value = MagicMock(uid='s4')
+    mock_auth.update_user.return_value = MagicMock(uid='s3')
+    mock_auth.get_user_by_email.return_value = MagicMock(uid='s1', email='s1@uczelnia.example')
+    mock_auth.create_custom_token.return_value = b'token'
+    with pytest.MonkeyPatch().context() as mp:
+        mp.setattr("app.repozytoria.uzytkownik_rep.auth", mock_auth)
+        mp.setattr("app.serwisy.uzytkownik_serw.auth", mock_auth)
+        yield mock_auth
+
+
+def test_kazda_trasa_ma_budzet():
+    """Testuje, że nowa trasa nie trafi do aplikacji bez zadeklarowanego budżetu."""
+    assert trasy_aplikacji() == sorted(BUDZETY)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("trasa", sorted(BUDZETY), ids=lambda trasa: ' '.join(trasa))
+async def test_trasa_miesci_sie_w_budzecie_operacji(trasa, dane_uczelni, auth_uzytkownikow):
+    """Testuje, że trasa wykonuje nie więcej operacji Firestore, niż pozwala jej budżet."""
+    metoda, _ = trasa
+    budzet = BUDZETY[trasa]
+    transport = httpx.ASGITransport(app=main_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as klient:
+        with budzet_operacji(
+            budzet.odczyty, budzet.zapisy, budzet.usuniecia, budzet.strumieniowane
+        ):
+            odpowiedz = await klient.request(
+                metoda, budzet.url.format(**dane_uczelni), json=budzet.json
+            )
+
+    assert odpowiedz.status_code < 400, odpowiedz.text
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("url", ['/grupy/g1', '/przedmioty/p1', '/uzytkownicy/s1'])
+async def test_zapytanie_warunkowe_czyta_dokument_raz(url, dane_uczelni):
+    """Testuje, że zapytanie warunkowe z nieaktualnym i aktualnym ETagiem kosztuje jeden odczyt."""
+    transport = httpx.ASGITransport(app=main_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as klient:
+        with budzet_operacji(1, 0, 0, 0):
+            nieaktualna = await klient.get(url, headers={'If-None-Match': '"1.000000000"'})
+        with budzet_operacji(1, 0, 0, 0):
+            aktualna = await klient.get(url, headers={'If-None-Match': nieaktualna.headers['etag']})
+
+    assert nieaktualna.status_code == 200
+    assert aktualna.status_code == 304
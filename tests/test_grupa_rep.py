@@ -1,9 +1,15 @@
+import asyncio
+
 import pytest
 from unittest.mock import AsyncMock, MagicMock
 from app.repozytoria.grupa_rep import RepozytoriumGrup
+from app.repozytoria.pamiec_podreczna import pamiec_rol_uzytkownikow
+from app.repozytoria.uzytkownik_rep import RepozytoriumUzytkownikow
 from app.modele.grupa import GrupaTworzenie, Grupa
 from firebase_admin import firestore
 
+from .conftest import mock_dokumenty, mock_transakcja
+
 firestore.SERVER_TIMESTAMP = "mocked_timestamp"
 
 @pytest.fixture(autouse=True)
@@ -11,6 +17,8 @@ def mock_db(mocker):
     """Fixture to mock the Firestore db object."""
     mock_firestore_db = MagicMock()
     mocker.patch('app.repozytoria.grupa_rep.db', mock_firestore_db)
+    mocker.patch('app.repozytoria.uzytkownik_rep.db', mock_firestore_db)
+    mocker.patch('app.repozytoria.przedmiot.db', mock_firestore_db)
     return mock_firestore_db
 
 @pytest.mark.asyncio
@@ -18,6 +26,7 @@ async def test_utworz_grupe_sukces(mock_db):
     """Testuje pomyślne utworzenie grupy."""
     mock_doc_ref = MagicMock()
     mock_doc_ref.id = "nowe_id_grupy"
+    mock_doc_ref.set = AsyncMock()
 
     mock_collection_ref = MagicMock()
     mock_collection_ref.document.return_value = mock_doc_ref
@@ -25,7 +34,7 @@ async def test_utworz_grupe_sukces(mock_db):
     mock_subject_doc = MagicMock()
     mock_subject_doc.exists = True
     mock_subject_doc_ref = MagicMock()
-    mock_subject_doc_ref.get = MagicMock(return_value=mock_subject_doc)
+    mock_subject_doc_ref.get = AsyncMock(return_value=mock_subject_doc)
 
     def collection_side_effect(name):
         if name == RepozytoriumGrup.COLLECTION_NAME:
@@ -72,7 +81,7 @@ async def test_utworz_grupe_przedmiot_nie_istnieje(mock_db):
     mock_subject_doc_result.exists = False
 
     mock_subject_doc_ref = MagicMock()
-    mock_subject_doc_ref.get = MagicMock(return_value=mock_subject_doc_result)
+    mock_subject_doc_ref.get = AsyncMock(return_value=mock_subject_doc_result)
 
     mock_subjects_collection = MagicMock()
     mock_subjects_collection.document.return_value = mock_subject_doc_ref
@@ -113,7 +122,7 @@ async def test_pobierz_grupe_po_id_sukces(mock_db):
     mock_doc.to_dict.return_value = mock_grupa_data
 
     mock_doc_ref = MagicMock()
-    mock_doc_ref.get = MagicMock(return_value=mock_doc)
+    mock_doc_ref.get = AsyncMock(return_value=mock_doc)
 
     mock_collection_ref = MagicMock()
     mock_collection_ref.document.return_value = mock_doc_ref
@@ -136,7 +145,7 @@ async def test_pobierz_grupe_po_id_nie_istnieje(mock_db):
     mock_doc.exists = False
 
     mock_doc_ref = MagicMock()
-    mock_doc_ref.get = MagicMock(return_value=mock_doc)
+    mock_doc_ref.get = AsyncMock(return_value=mock_doc)
 
     mock_collection_ref = MagicMock()
     mock_collection_ref.document.return_value = mock_doc_ref
@@ -152,6 +161,20 @@ async def test_pobierz_grupe_po_id_nie_istnieje(mock_db):
     mock_collection_ref.document.assert_called_once_with(grupa_id)
     mock_doc_ref.get.assert_called_once_with()
 
+@pytest.mark.asyncio
+async def test_pobierz_grupe_z_wersja_zwraca_czas_zapisu(mock_db):
+    """Testuje, że odczyt grupy zwraca też update_time snapshotu."""
+    mock_doc = MagicMock()
+    mock_doc.exists = True
+    mock_doc.to_dict.return_value = {'id': 'g1', 'name': 'Grupa'}
+    mock_doc.update_time = "czas_zapisu"
+    mock_db.collection.return_value.document.return_value.get = AsyncMock(return_value=mock_doc)
+
+    grupa, wersja = await RepozytoriumGrup.pobierz_grupe_z_wersja('g1')
+
+    assert grupa == {'id': 'g1', 'name': 'Grupa'}
+    assert wersja == "czas_zapisu"
+
 @pytest.mark.asyncio
 async def test_pobierz_wszystkie_grupy_sukces(mock_db):
     """Testuje pomyślne pobranie wszystkich grup bez zmiany funkcji."""
@@ -177,7 +200,7 @@ async def test_pobierz_wszystkie_grupy_sukces(mock_db):
     mock_doc2 = MagicMock()
     mock_doc2.to_dict.return_value = mock_grupy_data[1]
 
-    def mock_stream():
+    async def mock_stream():
         yield mock_doc1
         yield mock_doc2
 
@@ -196,26 +219,7 @@ async def test_pobierz_wszystkie_grupy_sukces(mock_db):
 @pytest.mark.asyncio
 async def test_aktualizuj_grupe_wykladowca_nie_istnieje(mock_db):
     """Testuje aktualizację grupy z nieistniejącym ID wykładowcy."""
-    mock_grupa_doc = MagicMock()
-    mock_grupa_doc.exists = True
-    
-    mock_wykladowca_doc = MagicMock()
-    mock_wykladowca_doc.exists = False
-
-    mock_grupa_ref = MagicMock()
-    mock_grupa_ref.get = MagicMock(return_value=mock_grupa_doc)
-
-    mock_wykladowca_ref = MagicMock()
-    mock_wykladowca_ref.get = MagicMock(return_value=mock_wykladowca_doc)
-
-    def collection_side_effect(name):
-        if name == RepozytoriumGrup.COLLECTION_NAME:
-            return MagicMock(document=MagicMock(return_value=mock_grupa_ref))
-        elif name == 'users':
-            return MagicMock(document=MagicMock(return_value=mock_wykladowca_ref))
-        return MagicMock()
-
-    mock_db.collection.side_effect = collection_side_effect
+    mock_dokumenty(mock_db, {'groups/grupa1': {'name': 'Grupa'}})
 
     with pytest.raises(ValueError, match="Użytkownik o ID zlyWykladowca nie istnieje"):
         await RepozytoriumGrup.aktualizuj_grupe("grupa1", {"wykladowcaId": "zlyWykladowca"})
@@ -223,27 +227,10 @@ async def test_aktualizuj_grupe_wykladowca_nie_istnieje(mock_db):
 @pytest.mark.asyncio
 async def test_aktualizuj_grupe_uzytkownik_nie_jest_wykladowca(mock_db):
     """Testuje aktualizację grupy z ID użytkownika, który nie jest wykładowcą."""
-    mock_grupa_doc = MagicMock()
-    mock_grupa_doc.exists = True
-    
-    mock_wykladowca_doc = MagicMock()
-    mock_wykladowca_doc.exists = True
-    mock_wykladowca_doc.to_dict.return_value = {'role': 'student'}
-
-    mock_grupa_ref = MagicMock()
-    mock_grupa_ref.get = MagicMock(return_value=mock_grupa_doc)
-
-    mock_wykladowca_ref = MagicMock()
-    mock_wykladowca_ref.get = MagicMock(return_value=mock_wykladowca_doc)
-
-    def collection_side_effect(name):
-        if name == RepozytoriumGrup.COLLECTION_NAME:
-            return MagicMock(document=MagicMock(return_value=mock_grupa_ref))
-        elif name == 'users':
-            return MagicMock(document=MagicMock(return_value=mock_wykladowca_ref))
-        return MagicMock()
-
-    mock_db.collection.side_effect = collection_side_effect
+    mock_dokumenty(mock_db, {
+        'groups/grupa1': {'name': 'Grupa'},
+        'users/nieWykladowca': {'role': 'student'},
+    })
 
     with pytest.raises(ValueError, match="Użytkownik o ID nieWykladowca nie jest wykładowcą"):
         await RepozytoriumGrup.aktualizuj_grupe("grupa1", {"wykladowcaId": "nieWykladowca"})
@@ -251,20 +238,74 @@ async def test_aktualizuj_grupe_uzytkownik_nie_jest_wykladowca(mock_db):
 @pytest.mark.asyncio
 async def test_przypisz_studenta_do_grupy_uzytkownik_nie_istnieje(mock_db):
     """Testuje przypisanie nieistniejącego użytkownika jako studenta."""
-    mock_user_doc = MagicMock()
-    mock_user_doc.exists = False
-    mock_db.collection.return_value.document.return_value.get = MagicMock(return_value=mock_user_doc)
+    mock_dokumenty(mock_db, {'groups/grupa1': {'studentsIds': []}})
+    transakcja = mock_transakcja()
+    mock_db.transaction.return_value = transakcja
 
     with pytest.raises(ValueError, match="Użytkownik o ID zlyStudent nie istnieje"):
         await RepozytoriumGrup.przypisz_studenta_do_grupy("grupa1", "zlyStudent")
 
+    assert mock_db.get_all.call_args.kwargs['transaction'] is transakcja
+    transakcja.update.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_przypisz_studenta_do_grupy_w_transakcji(mock_db):
+    """Testuje przypisanie studenta jednym odczytem i zapisem w transakcji."""
+    referencje = mock_dokumenty(mock_db, {
+        'users/s1': {'role': 'student'},
+        'groups/grupa1': {'studentsIds': ['s0']},
+    })
+    transakcja = mock_transakcja()
+    mock_db.transaction.return_value = transakcja
+
+    wynik = await RepozytoriumGrup.przypisz_studenta_do_grupy("grupa1", "s1")
+
+    assert wynik is True
+    mock_db.get_all.assert_called_once()
+    assert mock_db.get_all.call_args.kwargs['transaction'] is transakcja
+    transakcja.update.assert_called_once()
+    ref, pola = transakcja.update.call_args.args
+    assert ref is referencje['groups/grupa1']
+    assert pola['studentsIds'] == firestore.ArrayUnion(['s1'])
+    transakcja._commit.assert_awaited_once()
+    referencje['groups/grupa1'].update.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_przypisz_studenta_do_grupy_juz_przypisany(mock_db):
+    """Testuje odrzucenie ponownego przypisania studenta."""
+    mock_dokumenty(mock_db, {
+        'users/s1': {'role': 'student'},
+        'groups/grupa1': {'studentsIds': ['s1']},
+    })
+    transakcja = mock_transakcja()
+    mock_db.transaction.return_value = transakcja
+
+    with pytest.raises(ValueError, match="Student o ID s1 jest już przypisany do grupy"):
+        await RepozytoriumGrup.przypisz_studenta_do_grupy("grupa1", "s1")
+
+    transakcja.update.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_przypisz_studenta_do_nieistniejacej_grupy(mock_db):
+    """Testuje przypisanie do grupy, która nie istnieje."""
+    mock_dokumenty(mock_db, {'users/s1': {'role': 'student'}})
+    transakcja = mock_transakcja()
+    mock_db.transaction.return_value = transakcja
+
+    wynik = await RepozytoriumGrup.przypisz_studenta_do_grupy("brak", "s1")
+
+    assert wynik is False
+    transakcja.update.assert_not_called()
+
 @pytest.mark.asyncio
 async def test_usun_studenta_z_grupy_nie_student(mock_db):
     """Testuje usunięcie użytkownika, który nie jest studentem."""
     mock_user_doc = MagicMock()
     mock_user_doc.exists = True
     mock_user_doc.to_dict.return_value = {'role': 'wykladowca'}
-    mock_db.collection.return_value.document.return_value.get = MagicMock(return_value=mock_user_doc)
+    mock_db.collection.return_value.document.return_value.get = AsyncMock(
+        return_value=mock_user_doc
+    )
 
     with pytest.raises(ValueError, match="Użytkownik o ID nieStudent nie jest studentem"):
         await RepozytoriumGrup.usun_studenta_z_grupy("grupa1", "nieStudent")
@@ -274,7 +315,9 @@ async def test_zmien_wykladowce_grupy_uzytkownik_nie_istnieje(mock_db):
     """Testuje zmianę na nieistniejącego użytkownika jako wykładowcę."""
     mock_user_doc = MagicMock()
     mock_user_doc.exists = False
-    mock_db.collection.return_value.document.return_value.get = MagicMock(return_value=mock_user_doc)
+    mock_db.collection.return_value.document.return_value.get = AsyncMock(
+        return_value=mock_user_doc
+    )
 
     with pytest.raises(ValueError, match="Użytkownik o ID zlyWykladowca nie istnieje"):
         await RepozytoriumGrup.zmien_wykladowce_grupy("grupa1", "zlyWykladowca")
@@ -287,43 +330,185 @@ async def test_aktualizuj_grupe_wiele_pol(mock_db):
         "przedmiotId": "nowyPrzedmiot1",
         "wykladowcaId": "nowyWykladowca1"
     }
-    
-    mock_grupa_doc = MagicMock()
-    mock_grupa_doc.exists = True
-    
-    mock_subject_doc = MagicMock()
-    mock_subject_doc.exists = True
-
-    mock_lecturer_doc = MagicMock()
-    mock_lecturer_doc.exists = True
-    mock_lecturer_doc.to_dict.return_value = {'role': 'wykladowca'}
-
-    mock_grupa_ref = MagicMock()
-    mock_grupa_ref.get = MagicMock(return_value=mock_grupa_doc)
-
-    mock_subject_ref = MagicMock(get=MagicMock(return_value=mock_subject_doc))
-    mock_lecturer_ref = MagicMock(get=MagicMock(return_value=mock_lecturer_doc))
-
-    def collection_side_effect(name):
-        if name == RepozytoriumGrup.COLLECTION_NAME:
-            return MagicMock(document=MagicMock(return_value=mock_grupa_ref))
-        elif name == 'subjects':
-            return MagicMock(document=MagicMock(return_value=mock_subject_ref))
-        elif name == 'users':
-            return MagicMock(document=MagicMock(return_value=mock_lecturer_ref))
-        return MagicMock()
-
-    mock_db.collection.side_effect = collection_side_effect
+    referencje = mock_dokumenty(mock_db, {
+        'groups/grupa1': {'name': 'Stara Nazwa'},
+        'subjects/nowyPrzedmiot1': {'name': 'Przedmiot'},
+        'users/nowyWykladowca1': {'role': 'wykladowca'},
+    })
 
     wynik = await RepozytoriumGrup.aktualizuj_grupe("grupa1", dane_aktualizacji)
 
     assert wynik is True
-    mock_grupa_ref.update.assert_called_once_with({
+    referencje['groups/grupa1'].update.assert_called_once_with({
         'name': 'Nowa Nazwa',
         'subjectId': 'nowyPrzedmiot1',
         'lecturerId': 'nowyWykladowca1',
         'updatedAt': 'mocked_timestamp'
     })
 
-    mock_subject_ref.get.assert_called_once()
-    mock_lecturer_ref.get.assert_called_once()
\ No newline at end of file
+    for sciezka in ('groups/grupa1', 'subjects/nowyPrzedmiot1', 'users/nowyWykladowca1'):
+        referencje[sciezka].get.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_aktualizuj_grupe_sprawdza_wspolbieznie_jednym_get_all(baza_z_pomiarem, monkeypatch):
+    """Testuje, że współbieżne sprawdzenia grupy, przedmiotu i wykładowcy dają jeden get_all."""
+    await baza_z_pomiarem.collection('groups').document('grupa1').set({'name': 'Stara Nazwa'})
+    await baza_z_pomiarem.collection('subjects').document('p1').set({'name': 'Przedmiot'})
+    await baza_z_pomiarem.collection('users').document('w1').set({'role': 'wykladowca'})
+    klient = baza_z_pomiarem._cel
+    get_all = MagicMock(side_effect=klient.get_all)
+    monkeypatch.setattr(klient, 'get_all', get_all)
+
+    wynik = await RepozytoriumGrup.aktualizuj_grupe(
+        "grupa1", {"nazwa": "Nowa Nazwa", "przedmiotId": "p1", "wykladowcaId": "w1"}
+    )
+
+    assert wynik is True
+    get_all.assert_called_once()
+    odczytane = sorted(ref.path for ref in get_all.call_args.args[0])
+    assert odczytane == ['groups/grupa1', 'subjects/p1', 'users/w1']
+
+@pytest.mark.asyncio
+async def test_aktualizuj_grupe_blad_anuluje_pozniejsze_sprawdzenia(mock_db):
+    """Testuje, że błąd sprawdzenia przedmiotu anuluje trwające sprawdzenie wykładowcy."""
+    mock_dokumenty(mock_db, {'groups/grupa1': {'name': 'Grupa'}})
+    anulowano = asyncio.Event()
+
+    async def wolny_odczyt(*args, **kwargs):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            anulowano.set()
+            raise
+
+    mock_db.collection('users').document('w1').get.side_effect = wolny_odczyt
+
+    with pytest.raises(ValueError, match="Przedmiot o ID zlyPrzedmiot nie istnieje"):
+        await RepozytoriumGrup.aktualizuj_grupe(
+            "grupa1", {"przedmiotId": "zlyPrzedmiot", "wykladowcaId": "w1"}
+        )
+
+    assert anulowano.is_set()
+    mock_db.collection('groups').document('grupa1').update.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_aktualizuj_nieistniejaca_grupe_z_rola_w_pamieci(mock_db):
+    """Testuje, że brak grupy daje False.
+
+    Rola z pamięci odrzuca wykładowcę, zanim grupa zostanie odczytana.
+    """
+    mock_dokumenty(mock_db, {})
+    pamiec_rol_uzytkownikow.zapisz('s1', 'student')
+    grupa_ref = mock_db.collection('groups').document('brak')
+    brak_grupy = grupa_ref.get.return_value
+
+    async def wolny_odczyt(*args, **kwargs):
+        await asyncio.sleep(0.01)
+        return brak_grupy
+
+    grupa_ref.get.side_effect = wolny_odczyt
+
+    wynik = await RepozytoriumGrup.aktualizuj_grupe("brak", {"wykladowcaId": "s1"})
+
+    assert wynik is False
+    grupa_ref.update.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_aktualizuj_grupe_nie_istnieje(mock_db):
+    """Testuje aktualizację nieistniejącej grupy."""
+    referencje = mock_dokumenty(mock_db, {})
+
+    wynik = await RepozytoriumGrup.aktualizuj_grupe("brak", {"nazwa": "X"})
+
+    assert wynik is False
+    referencje['groups/brak'].update.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_przypisz_studentow_do_grupy_hurtowo(mock_db):
+    """Testuje hurtowe przypisanie jednym odczytem i jednym ArrayUnion."""
+    referencje = mock_dokumenty(mock_db, {
+        'groups/grupa1': {'studentsIds': ['s0']},
+        'users/s0': {'role': 'student'},
+        'users/s1': {'role': 'student'},
+        'users/s2': {'role': 'student'},
+        'users/w1': {'role': 'wykladowca'},
+    })
+    transakcja = mock_transakcja()
+    mock_db.transaction.return_value = transakcja
+
+    wynik = await RepozytoriumGrup.przypisz_studentow_do_grupy(
+        "grupa1", ["s1", "s0", "w1", "brak", "s2", "s1"]
+    )
+
+    assert wynik.przypisani == ["s1", "s2"]
+    assert [(o.studentId, o.powod) for o in wynik.odrzuceni] == [
+        ("s0", "Student o ID s0 jest już przypisany do grupy"),
+        ("w1", "Użytkownik o ID w1 nie jest studentem"),
+        ("brak", "Użytkownik o ID brak nie istnieje"),
+    ]
+    mock_db.get_all.assert_called_once()
+    assert len(mock_db.get_all.call_args.args[0]) == 6
+    assert mock_db.get_all.call_args.kwargs['transaction'] is transakcja
+    transakcja.update.assert_called_once()
+    ref, pola = transakcja.update.call_args.args
+    assert ref is referencje['groups/grupa1']
+    assert pola['studentsIds'] == firestore.ArrayUnion(["s1", "s2"])
+
+@pytest.mark.asyncio
+async def test_przypisz_studentow_do_nieistniejacej_grupy(mock_db):
+    """Testuje hurtowe przypisanie do nieistniejącej grupy."""
+    mock_dokumenty(mock_db, {'users/s1': {'role': 'student'}})
+    transakcja = mock_transakcja()
+    mock_db.transaction.return_value = transakcja
+
+    wynik = await RepozytoriumGrup.przypisz_studentow_do_grupy("brak", ["s1"])
+
+    assert wynik is None
+    transakcja.update.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_przypisz_studenta_czyta_role_w_transakcji_mimo_pamieci(mock_db):
+    """Testuje, że rola w pamięci podręcznej nie zastępuje odczytu użytkownika w transakcji."""
+    mock_dokumenty(mock_db, {
+        'users/s1': {'role': 'wykladowca'},
+        'groups/grupa1': {'studentsIds': []},
+    })
+    transakcja = mock_transakcja()
+    mock_db.transaction.return_value = transakcja
+    pamiec_rol_uzytkownikow.zapisz('s1', 'student')
+
+    with pytest.raises(ValueError, match="Użytkownik o ID s1 nie jest studentem"):
+        await RepozytoriumGrup.przypisz_studenta_do_grupy("grupa1", "s1")
+
+    assert mock_db.get_all.call_args.kwargs['transaction'] is transakcja
+    transakcja.update.assert_not_called()
+    assert pamiec_rol_uzytkownikow.pobierz('s1') == 'wykladowca'
+
+@pytest.mark.asyncio
+async def test_zmien_wykladowce_po_usunieciu_uzytkownika(mock_db, mocker):
+    """Testuje, że usunięcie użytkownika unieważnia jego rolę w pamięci podręcznej."""
+    mocker.patch('app.repozytoria.uzytkownik_rep.wykonaj_auth', AsyncMock())
+    referencje = mock_dokumenty(mock_db, {
+        'users/w1': {'role': 'wykladowca'},
+        'groups/grupa1': {'lecturerId': None},
+    })
+    assert await RepozytoriumGrup.zmien_wykladowce_grupy("grupa1", "w1") is True
+
+    await RepozytoriumUzytkownikow.usun_uzytkownika("w1")
+    referencje['users/w1'].get.return_value.exists = False
+
+    with pytest.raises(ValueError, match="Użytkownik o ID w1 nie istnieje"):
+        await RepozytoriumGrup.zmien_wykladowce_grupy("grupa1", "w1")
+    assert referencje['users/w1'].get.call_count == 2
+
+@pytest.mark.asyncio
+async def test_utworz_wiele_grup_czyta_przedmiot_raz(mock_db):
+    """Testuje, że kolejne grupy tego samego przedmiotu korzystają z katalogu przedmiotów."""
+    referencje = mock_dokumenty(mock_db, {'subjects/przedmiot1': {'name': 'Analiza'}})
+
+    for numer in range(3):
+        await RepozytoriumGrup.utworz_grupe(GrupaTworzenie(
+            nazwa=f"Grupa {numer}", przedmiotId="przedmiot1", wykladowcaId="w1"
+        ))
+
+    referencje['subjects/przedmiot1'].get.assert_called_once()
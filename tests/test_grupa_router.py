@@ -1,9 +1,18 @@
+import datetime
+
 import pytest
 from fastapi import status
 from unittest.mock import patch, AsyncMock
-from app.modele.grupa import Grupa, GrupaTworzenie, GrupaAktualizacja
+from app.modele.grupa import (
+    MAKS_STUDENTOW_W_PRZYPISANIU, Grupa, GrupaTworzenie, GrupaAktualizacja, OdrzuconyStudent,
+    WynikPrzypisaniaStudentow
+)
+from app.modele.ocena import StatystykiOcen
+from app.modele.strona import Strona
 from app.serwisy.grupa_serw import SerwisGrup
 
+WERSJA = datetime.datetime(2023, 11, 14, 22, 13, 20, 123456, tzinfo=datetime.timezone.utc)
+
 @patch.object(SerwisGrup, 'pobierz_wszystkie_grupy', new_callable=AsyncMock)
 def test_pobierz_wszystkie_grupy_sukces(mock_pobierz_wszystkie, async_client):
     oczekiwane_grupy = [
@@ -38,28 +47,76 @@ def test_pobierz_wszystkie_grupy_blad_serwera(mock_pobierz_wszystkie, async_clie
     assert "Błąd podczas pobierania listy grup" in response.json()["detail"]
     mock_pobierz_wszystkie.assert_called_once()
 
-@patch.object(SerwisGrup, 'pobierz_grupe_po_id', new_callable=AsyncMock)
-def test_pobierz_grupe_sukces(mock_pobierz_grupe_po_id, async_client):
+@patch.object(SerwisGrup, 'pobierz_grupe_z_wersja', new_callable=AsyncMock)
+def test_pobierz_grupe_sukces(mock_pobierz_grupe, async_client):
     grupa_id = "g1"
     oczekiwana_grupa = {"grupaId": grupa_id, "nazwa": "Grupa A", "przedmiotId": "p1", "wykladowcaId": "w1", "studenciIds": []}
-    mock_pobierz_grupe_po_id.return_value = oczekiwana_grupa
+    mock_pobierz_grupe.return_value = (oczekiwana_grupa, WERSJA)
 
     response = async_client.get(f"/grupy/{grupa_id}")
 
     assert response.status_code == status.HTTP_200_OK
     assert response.json() == oczekiwana_grupa
-    mock_pobierz_grupe_po_id.assert_called_once_with(grupa_id)
+    assert response.headers["etag"] == '"1700000000.123456000"'
+    assert response.headers["last-modified"] == "Tue, 14 Nov 2023 22:13:20 GMT"
+    mock_pobierz_grupe.assert_called_once_with(grupa_id)
 
-@patch.object(SerwisGrup, 'pobierz_grupe_po_id', new_callable=AsyncMock)
-def test_pobierz_grupe_nie_znaleziono(mock_pobierz_grupe_po_id, async_client):
+@patch.object(SerwisGrup, 'pobierz_grupe_z_wersja', new_callable=AsyncMock)
+def test_pobierz_grupe_nie_znaleziono(mock_pobierz_grupe, async_client):
     grupa_id = "nieistniejaca_grupa"
-    mock_pobierz_grupe_po_id.return_value = None
+    mock_pobierz_grupe.return_value = (None, None)
 
     response = async_client.get(f"/grupy/{grupa_id}")
 
     assert response.status_code == status.HTTP_404_NOT_FOUND
     assert f"Grupa o ID {grupa_id} nie została znaleziona" in response.json()["detail"]
-    mock_pobierz_grupe_po_id.assert_called_once_with(grupa_id)
+    mock_pobierz_grupe.assert_called_once_with(grupa_id)
+
+@patch.object(SerwisGrup, 'pobierz_grupe_z_wersja', new_callable=AsyncMock)
+def test_pobierz_grupe_if_none_match_zwraca_304(mock_pobierz_grupe, async_client):
+    mock_pobierz_grupe.return_value = ({"grupaId": "g1"}, WERSJA)
+
+    response = async_client.get(
+        "/grupy/g1", headers={"If-None-Match": 'W/"1", "1700000000.123456000"'}
+    )
+
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.content == b""
+    assert response.headers["etag"] == '"1700000000.123456000"'
+    mock_pobierz_grupe.assert_called_once_with("g1")
+
+@patch.object(SerwisGrup, 'pobierz_grupe_z_wersja', new_callable=AsyncMock)
+def test_pobierz_grupe_zmieniony_etag_zwraca_dane(mock_pobierz_grupe, async_client):
+    grupa = {"grupaId": "g1", "nazwa": "Grupa A"}
+    mock_pobierz_grupe.return_value = (grupa, WERSJA)
+
+    response = async_client.get("/grupy/g1", headers={"If-None-Match": '"1600000000.000000000"'})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == grupa
+    mock_pobierz_grupe.assert_called_once_with("g1")
+
+@patch.object(SerwisGrup, 'pobierz_grupe_z_wersja', new_callable=AsyncMock)
+def test_pobierz_grupe_if_modified_since(mock_pobierz_grupe, async_client):
+    mock_pobierz_grupe.return_value = ({"grupaId": "g1"}, WERSJA)
+
+    niezmieniona = async_client.get(
+        "/grupy/g1", headers={"If-Modified-Since": "Tue, 14 Nov 2023 22:13:20 GMT"}
+    )
+    zmieniona = async_client.get(
+        "/grupy/g1", headers={"If-Modified-Since": "Tue, 14 Nov 2023 22:13:19 GMT"}
+    )
+
+    assert niezmieniona.status_code == status.HTTP_304_NOT_MODIFIED
+    assert zmieniona.status_code == status.HTTP_200_OK
+
+@patch.object(SerwisGrup, 'pobierz_grupe_z_wersja', new_callable=AsyncMock)
+def test_pobierz_nieistniejaca_grupe_warunkowo_zwraca_404(mock_pobierz_grupe, async_client):
+    mock_pobierz_grupe.return_value = (None, None)
+
+    response = async_client.get("/grupy/brak", headers={"If-None-Match": "*"})
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
 
 @patch.object(SerwisGrup, 'utworz_grupe', new_callable=AsyncMock)
 def test_utworz_grupe_sukces(mock_utworz_grupe, async_client):
@@ -201,4 +258,113 @@ def test_usun_studenta_z_grupy_nie_znaleziono(mock_usun_studenta, async_client):
 
     assert response.status_code == status.HTTP_404_NOT_FOUND
     assert "lub student nie jest przypisany do grupy" in response.json()["detail"]
-    mock_usun_studenta.assert_called_once_with(grupa_id, student_id)
\ No newline at end of file
+    mock_usun_studenta.assert_called_once_with(grupa_id, student_id)
+
+
+@patch.object(SerwisGrup, 'pobierz_strone_grup', new_callable=AsyncMock)
+@patch.object(SerwisGrup, 'pobierz_wszystkie_grupy', new_callable=AsyncMock)
+def test_pobierz_grupy_strona(mock_pobierz_wszystkie, mock_pobierz_strone, async_client):
+    mock_pobierz_strone.return_value = Strona(elementy=[{"id": "g1"}], nastepnaStrona="kursor2")
+
+    response = async_client.get("/grupy/", params={"limit": 1, "kursor": "kursor1"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"elementy": [{"id": "g1"}], "nastepnaStrona": "kursor2"}
+    mock_pobierz_strone.assert_called_once_with(1, "kursor1", None)
+    mock_pobierz_wszystkie.assert_not_called()
+
+@patch.object(SerwisGrup, 'pobierz_strone_grup', new_callable=AsyncMock)
+def test_pobierz_grupy_nieprawidlowy_kursor(mock_pobierz_strone, async_client):
+    mock_pobierz_strone.side_effect = ValueError("Nieprawidłowy kursor stronicowania")
+
+    response = async_client.get("/grupy/", params={"kursor": "zly"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    mock_pobierz_strone.assert_called_once_with(100, "zly", None)
+
+def test_pobierz_grupy_limit_poza_zakresem(async_client):
+    response = async_client.get("/grupy/", params={"limit": 0})
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+@patch.object(SerwisGrup, 'przypisz_studentow_do_grupy', new_callable=AsyncMock)
+def test_przypisz_studentow_do_grupy_sukces(mock_przypisz_studentow, async_client):
+    mock_przypisz_studentow.return_value = WynikPrzypisaniaStudentow(
+        przypisani=["s1"],
+        odrzuceni=[OdrzuconyStudent(studentId="w1", powod="Użytkownik o ID w1 nie jest studentem")]
+    )
+
+    response = async_client.post("/grupy/g1/studenci", json={"studenciIds": ["s1", "w1"]})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        "przypisani": ["s1"],
+        "odrzuceni": [{"studentId": "w1", "powod": "Użytkownik o ID w1 nie jest studentem"}]
+    }
+    mock_przypisz_studentow.assert_called_once_with("g1", ["s1", "w1"])
+
+@patch.object(SerwisGrup, 'przypisz_studentow_do_grupy', new_callable=AsyncMock)
+def test_przypisz_studentow_do_grupy_nie_znaleziono(mock_przypisz_studentow, async_client):
+    mock_przypisz_studentow.return_value = None
+
+    response = async_client.post("/grupy/brak/studenci", json={"studenciIds": ["s1"]})
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+@patch.object(SerwisGrup, 'przypisz_studentow_do_grupy', new_callable=AsyncMock)
+def test_przypisz_studentow_do_grupy_za_duzo(mock_przypisz_studentow, async_client):
+    studenci_ids = [f"s{i}" for i in range(MAKS_STUDENTOW_W_PRZYPISANIU + 1)]
+
+    response = async_client.post("/grupy/g1/studenci", json={"studenciIds": studenci_ids})
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    mock_przypisz_studentow.assert_not_called()
+
+@pytest.mark.parametrize("student_id", ["", "s1/oceny"])
+@patch.object(SerwisGrup, 'przypisz_studentow_do_grupy', new_callable=AsyncMock)
+def test_przypisz_studentow_do_grupy_niepoprawne_id(
+    mock_przypisz_studentow, student_id, async_client
+):
+    response = async_client.post("/grupy/g1/studenci", json={"studenciIds": ["s1", student_id]})
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    mock_przypisz_studentow.assert_not_called()
+
+@patch.object(SerwisGrup, 'pobierz_statystyki_grupy', new_callable=AsyncMock)
+def test_pobierz_statystyki_grupy_sukces(mock_statystyki, async_client):
+    mock_statystyki.return_value = StatystykiOcen(
+        liczbaOcen=2, srednia=4.0, mediana=4.0, histogram={"3": 1, "5": 1}, odsetekZaliczonych=1.0
+    )
+
+    response = async_client.get("/grupy/g1/statystyki")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["srednia"] == 4.0
+    assert response.json()["histogram"] == {"3": 1, "5": 1}
+    mock_statystyki.assert_called_once_with("g1")
+
+@patch.object(SerwisGrup, 'pobierz_statystyki_grupy', new_callable=AsyncMock)
+def test_pobierz_statystyki_grupy_nie_istnieje(mock_statystyki, async_client):
+    mock_statystyki.return_value = None
+
+    response = async_client.get("/grupy/brak/statystyki")
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+@patch.object(SerwisGrup, 'pobierz_wszystkie_grupy', new_callable=AsyncMock)
+def test_pobierz_wszystkie_grupy_wybrane_pola(mock_pobierz_wszystkie, async_client):
+    mock_pobierz_wszystkie.return_value = [{"name": "Grupa A"}]
+
+    response = async_client.get("/grupy/", params={"fields": "name, id,name"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [{"name": "Grupa A"}]
+    mock_pobierz_wszystkie.assert_called_once_with(["name", "id"])
+
+@patch.object(SerwisGrup, 'pobierz_wszystkie_grupy', new_callable=AsyncMock)
+def test_pobierz_wszystkie_grupy_nieprawidlowe_pole(mock_pobierz_wszystkie, async_client):
+    response = async_client.get("/grupy/", params={"fields": "name,`studentsIds`"})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "Nieprawidłowa nazwa pola" in response.json()["detail"]
+    mock_pobierz_wszystkie.assert_not_called()
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from app.konfiguracja.operacje_firestore import licz_operacje
+from app.repozytoria.odczyt import pobierz_dokumenty
+
+
+@pytest.fixture
+def wywolania_get_all(baza_z_pomiarem, monkeypatch):
+    """
+    Fixture zapisujący listy ścieżek przekazywane do get_all lokalnego klienta.
+    """
+    klient = baza_z_pomiarem._cel
+    oryginalne_get_all = klient.get_all
+    wywolania = []
+
+    def get_all(referencje, *args, **kwargs):
+        referencje = list(referencje)
+        wywolania.append([referencja.path for referencja in referencje])
+        return oryginalne_get_all(referencje, *args, **kwargs)
+
+    monkeypatch.setattr(klient, 'get_all', get_all)
+    return wywolania
+
+
+@pytest.mark.asyncio
+async def test_wspolbiezne_odczyty_trafiaja_do_jednego_get_all(baza_z_pomiarem, wywolania_get_all):
+    """Testuje, że odczyty z jednego obiegu pętli są deduplikowane i wysyłane jednym get_all."""
+    await baza_z_pomiarem.collection('users').document('s1').set({'role': 'student'})
+    await baza_z_pomiarem.collection('groups').document('g1').set({'name': 'G1'})
+    users = baza_z_pomiarem.collection('users')
+    groups = baza_z_pomiarem.collection('groups')
+
+    async def zapytanie(*referencje):
+        with licz_operacje() as licznik:
+            snapshoty = await pobierz_dokumenty(baza_z_pomiarem, referencje)
+        return [snapshot.to_dict() for snapshot in snapshoty], licznik.odczyty
+
+    with licz_operacje() as wszystkie:
+        pierwsze, drugie, brak = await asyncio.gather(
+            zapytanie(users.document('s1'), groups.document('g1')),
+            zapytanie(users.document('s1')),
+            users.document('brak').get()
+        )
+
+    assert wywolania_get_all == [['users/s1', 'groups/g1', 'users/brak']]
+    assert pierwsze == ([{'role': 'student'}, {'name': 'G1'}], 2)
+    assert drugie == ([{'role': 'student'}], 0)
+    assert not brak.exists
+    assert wszystkie.odczyty == 3
+
+
+@pytest.mark.asyncio
+async def test_odczyt_po_zapisie_widzi_zapis(baza_z_pomiarem, wywolania_get_all):
+    """Testuje, że ładowacz nie zapamiętuje dokumentów między paczkami."""
+    grupa_ref = baza_z_pomiarem.collection('groups').document('g1')
+    await grupa_ref.set({'name': 'G1'})
+
+    przed = await grupa_ref.get()
+    await grupa_ref.update({'name': 'G1 nowa'})
+    po = await grupa_ref.get()
+
+    assert przed.to_dict() == {'name': 'G1'}
+    assert po.to_dict() == {'name': 'G1 nowa'}
+    assert wywolania_get_all == [['groups/g1'], ['groups/g1']]
+
+
+@pytest.mark.asyncio
+async def test_blad_get_all_trafia_do_wszystkich_oczekujacych(baza_z_pomiarem, monkeypatch):
+    """Testuje, że błąd paczki jest zgłaszany każdej korutynie, która na nią czeka."""
+    def get_all(referencje, *args, **kwargs):
+        raise RuntimeError("Firestore niedostępny")
+
+    monkeypatch.setattr(baza_z_pomiarem._cel, 'get_all', get_all)
+    users = baza_z_pomiarem.collection('users')
+
+    wyniki = await asyncio.gather(
+        users.document('s1').get(), users.document('s2').get(), return_exceptions=True
+    )
+
+    assert [str(wynik) for wynik in wyniki] == ["Firestore niedostępny"] * 2
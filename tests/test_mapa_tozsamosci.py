@@ -0,0 +1,75 @@
+import pytest
+from firebase_admin import firestore
+
+from app.konfiguracja.mapa_tozsamosci import mapa_tozsamosci
+from app.konfiguracja.operacje_firestore import licz_operacje
+from app.repozytoria.odczyt import pobierz_dokumenty
+from app.serwisy.ocena import SerwisOcen
+
+
+async def _zapisz_dane(klient):
+    await klient.collection('users').document('s1').set({'role': 'student'})
+    await klient.collection('subjects').document('p1').set({'name': 'Analiza'})
+    await klient.collection('groups').document('g1').set(
+        {'name': 'G1', 'subjectId': 'p1', 'studentsIds': ['s1']}
+    )
+    await klient.collection('grades').document('o1').set(
+        {'studentId': 's1', 'groupId': 'g1', 'value': '3'}
+    )
+
+
+@pytest.mark.asyncio
+async def test_dokument_jest_odczytywany_raz_na_zapytanie(baza_z_pomiarem):
+    """Testuje, że get i get_all tej samej ścieżki w mapie tożsamości czytają Firestore raz."""
+    await _zapisz_dane(baza_z_pomiarem)
+    grupa_ref = baza_z_pomiarem.collection('groups').document('g1')
+
+    with mapa_tozsamosci(), licz_operacje() as licznik:
+        pierwszy = await grupa_ref.get()
+        pierwszy.to_dict()['name'] = 'zmieniona przez wywołującego'
+        pierwszy.to_dict()['studentsIds'].append('s9')
+        pierwszy.get('studentsIds').append('s9')
+        drugi, ocena = await pobierz_dokumenty(
+            baza_z_pomiarem, [grupa_ref, baza_z_pomiarem.collection('grades').document('o1')]
+        )
+
+    assert drugi is pierwszy
+    assert drugi.to_dict()['name'] == 'G1'
+    assert drugi.to_dict()['studentsIds'] == ['s1']
+    assert ocena.to_dict()['value'] == '3'
+    assert licznik.odczyty == 2
+
+
+@pytest.mark.asyncio
+async def test_zapis_i_transakcja_omijaja_zapamietany_dokument(baza_z_pomiarem):
+    """Testuje, że zapis unieważnia dokument, a odczyt w transakcji idzie do Firestore."""
+    await _zapisz_dane(baza_z_pomiarem)
+    grupa_ref = baza_z_pomiarem.collection('groups').document('g1')
+
+    @firestore.async_transactional
+    async def odczytaj(transakcja):
+        return (await grupa_ref.get(transaction=transakcja)).to_dict()
+
+    with mapa_tozsamosci(), licz_operacje() as licznik:
+        await grupa_ref.get()
+        await grupa_ref.update({'name': 'G1 nowa'})
+        po_zapisie = await grupa_ref.get()
+        w_transakcji = await odczytaj(baza_z_pomiarem.transaction())
+
+    assert po_zapisie.to_dict()['name'] == 'G1 nowa'
+    assert w_transakcji['name'] == 'G1 nowa'
+    assert licznik.odczyty == 3
+
+
+@pytest.mark.asyncio
+async def test_aktualizacja_oceny_nie_odczytuje_oceny_ponownie(baza_z_pomiarem):
+    """Testuje, że serwis zwraca ocenę po zmianie z mapy, bez ponownego odczytu z Firestore."""
+    await _zapisz_dane(baza_z_pomiarem)
+
+    with mapa_tozsamosci(), licz_operacje() as licznik:
+        ocena = await SerwisOcen.aktualizuj_ocene('o1', {'wartoscOceny': '5'})
+
+    assert ocena['value'] == '5'
+    assert licznik.odczyty == 3
+    zapisana = await baza_z_pomiarem.collection('grades').document('o1').get()
+    assert zapisana.to_dict()['value'] == '5'
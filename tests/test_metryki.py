@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+from fastapi import status
+from unittest.mock import patch, AsyncMock
+
+from app.konfiguracja.metryki import (
+    Histogram, MetrykiHTTP, PosrednikMetryk, RejestrMetryk, metryki_http
+)
+from app.serwisy.grupa_serw import SerwisGrup
+
+
+def test_histogram_eksportuje_kumulatywne_przedzialy():
+    """Testuje format ekspozycji histogramu z etykietą 'le' i sumą."""
+    rejestr = RejestrMetryk()
+    histogram = rejestr.rejestruj(Histogram('czas', 'Czas.', ('route',), przedzialy=(0.1, 1.0)))
+    for wartosc in (0.05, 0.1, 0.5, 3.0):
+        histogram.obserwuj(('/grupy/{grupa_id}',), wartosc)
+
+    tekst = rejestr.renderuj()
+
+    assert '# TYPE czas histogram' in tekst
+    assert 'czas_bucket{route="/grupy/{grupa_id}",le="0.1"} 2' in tekst
+    assert 'czas_bucket{route="/grupy/{grupa_id}",le="1.0"} 3' in tekst
+    assert 'czas_bucket{route="/grupy/{grupa_id}",le="+Inf"} 4' in tekst
+    assert 'czas_sum{route="/grupy/{grupa_id}"} 3.65' in tekst
+    assert 'czas_count{route="/grupy/{grupa_id}"} 4' in tekst
+
+
+@patch.object(SerwisGrup, 'pobierz_grupe_z_wersja', new_callable=AsyncMock)
+def test_metryki_grupuja_zapytania_po_szablonie_trasy(mock_pobierz_grupe, async_client):
+    """Testuje, że różne identyfikatory w URL trafiają do jednej serii trasy."""
+    mock_pobierz_grupe.return_value = (None, None)
+    etykiety = ('GET', '/grupy/{grupa_id}', '404')
+    przed = metryki_http.zapytania.wartosc(etykiety)
+
+    async_client.get("/grupy/g1")
+    async_client.get("/grupy/g2")
+    response = async_client.get("/metrics")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert metryki_http.zapytania.wartosc(etykiety) == przed + 2
+    tekst = response.text
+    assert 'http_requests_total{method="GET",route="/grupy/{grupa_id}",status="404"}' in tekst
+    assert 'http_request_duration_seconds_count{method="GET",route="/grupy/{grupa_id}"}' in tekst
+    assert 'route="/grupy/g1"' not in tekst
+
+
+@patch.object(SerwisGrup, 'pobierz_wszystkie_grupy', new_callable=AsyncMock)
+def test_metryki_zliczaja_bledy_serwera(mock_pobierz_wszystkie, async_client):
+    """Testuje licznik odpowiedzi 5xx."""
+    mock_pobierz_wszystkie.side_effect = Exception("Błąd serwera")
+    przed = metryki_http.bledy.wartosc(('GET', '/grupy/'))
+
+    async_client.get("/grupy/")
+
+    assert metryki_http.bledy.wartosc(('GET', '/grupy/')) == przed + 1
+
+
+@pytest.mark.asyncio
+async def test_posrednik_liczy_zapytania_w_toku_i_wyjatki():
+    """Testuje wskaźnik zapytań w toku oraz zapis wyjątku jako 500."""
+    metryki = MetrykiHTTP(RejestrMetryk())
+    zwolnij = asyncio.Event()
+
+    async def aplikacja(scope, receive, send):
+        await zwolnij.wait()
+        raise RuntimeError("awaria")
+
+    posrednik = PosrednikMetryk(aplikacja, metryki)
+    zadanie = asyncio.create_task(posrednik({'type': 'http', 'method': 'GET'}, None, None))
+    await asyncio.sleep(0)
+
+    assert metryki.w_toku() == {('GET', 'nieznana'): 1}
+
+    zwolnij.set()
+    with pytest.raises(RuntimeError):
+        await zadanie
+
+    assert metryki.w_toku() == {}
+    assert metryki.zapytania.wartosc(('GET', 'nieznana', '500')) == 1
+    assert metryki.czas.liczba(('GET', 'nieznana')) == 1
@@ -1,7 +1,8 @@
 """Testy dla modelu Ocena."""
 
 import pytest
-from app.modele.ocena import Ocena
+from pydantic import ValidationError
+from app.modele.ocena import Ocena, OcenaTworzenie
 import datetime
 
 def test_utworz_ocene():
@@ -35,4 +36,12 @@ def test_ocena_minimalne_pola():
     assert ocena.wartoscOceny == "3.0"
     assert ocena.studentId == "test_student_id_2"
     assert ocena.grupaId == "test_grupa_id_2"
-    assert ocena.wystawionePrzez == "test_uzytkownik_id_2"
\ No newline at end of file
+    assert ocena.wystawionePrzez == "test_uzytkownik_id_2"
+
+@pytest.mark.parametrize("wartosc", ["", "   "])
+def test_ocena_pusta_wartosc(wartosc):
+    """Testuje odrzucenie oceny z pustą wartością."""
+    with pytest.raises(ValidationError):
+        OcenaTworzenie(
+            studentId="s1", grupaId="g1", wystawionePrzez="w1", wartoscOceny=wartosc
+        )
@@ -1,10 +1,19 @@
 import pytest
-from unittest.mock import MagicMock, MagicMock, call
+from unittest.mock import AsyncMock, MagicMock, call
+from firebase_admin import firestore
 
 from app.modele.ocena import Ocena, OcenaTworzenie
 from app.repozytoria.ocena import RepozytoriumOcen
+from app.repozytoria.karta_ocen import RepozytoriumKartOcen
+from app.repozytoria.podsumowanie_ocen import (
+    BRAK_WARTOSCI,
+    RepozytoriumPodsumowanOcen,
+    ZmianyPodsumowan,
+    klucz_rozkladu,
+    pole_rozkladu
+)
 
-from .conftest import mock_iterator, mock_iterator
+from .conftest import mock_async_iterator, mock_dokumenty, mock_transakcja
 
 pytestmark = pytest.mark.asyncio
 
@@ -12,7 +21,12 @@ pytestmark = pytest.mark.asyncio
 def mock_db(mocker):
     """Fixture do mockowania obiektu db Firestore i modułu firestore."""
     mock_firestore_db = MagicMock()
+    mock_firestore_db.transaction.return_value = mock_transakcja()
     mocker.patch('app.repozytoria.ocena.db', mock_firestore_db)
+    mocker.patch('app.repozytoria.uzytkownik_rep.db', mock_firestore_db)
+    mocker.patch('app.repozytoria.podsumowanie_ocen.db', mock_firestore_db)
+    mocker.patch('app.repozytoria.karta_ocen.db', mock_firestore_db)
+    mocker.patch('app.repozytoria.przedmiot.db', mock_firestore_db)
     
     mock_firestore_module = MagicMock()
     mock_firestore_module.SERVER_TIMESTAMP = 'SERVER_TIMESTAMP_MOCK'
@@ -23,33 +37,32 @@ def mock_db(mocker):
 async def test_utworz_ocene_sukces(mock_db):
     """Testuje pomyślne tworzenie nowej oceny."""
     dane_oceny = OcenaTworzenie(studentId="student1", grupaId="grupa1", wartoscOceny="4.5", wystawionePrzez="wykladowca1")
-
-    mock_student_doc = MagicMock(exists=True)
-    mock_group_doc = MagicMock(exists=True)
-    mock_group_doc.to_dict.return_value = {'studentsIds': ['student1', 'student2']}
-    
-    mock_ocena_doc_ref = MagicMock(id="nowaOcena123")
-    mock_ocena_doc_ref.set = MagicMock()
-
-    def collection_side_effect(name):
-        if name == 'users':
-            return MagicMock(document=MagicMock(return_value=MagicMock(get=MagicMock(return_value=mock_student_doc))))
-        elif name == 'groups':
-            return MagicMock(document=MagicMock(return_value=MagicMock(get=MagicMock(return_value=mock_group_doc))))
-        elif name == RepozytoriumOcen.COLLECTION_NAME:
-            return MagicMock(document=MagicMock(return_value=mock_ocena_doc_ref))
-        return MagicMock()
-
-    mock_db.collection.side_effect = collection_side_effect
+    referencje = mock_dokumenty(mock_db, {
+        'users/student1': {'role': 'student'},
+        'groups/grupa1': {'studentsIds': ['student1', 'student2']},
+    })
 
     wynik = await RepozytoriumOcen.utworz_ocene(dane_oceny)
 
-    assert wynik.ocenaId == "nowaOcena123"
+    assert wynik.ocenaId == "nowy_dokument"
     assert wynik.studentId == "student1"
     assert wynik.wartoscOceny == "4.5"
 
-    mock_ocena_doc_ref.set.assert_called_once_with({
-        'id': "nowaOcena123",
+    mock_db.get_all.assert_called_once()
+    referencje['users/student1'].get.assert_not_called()
+    referencje['groups/grupa1'].get.assert_not_called()
+    batch = mock_db.batch.return_value
+    ocena_call, podsumowanie_call, karta_call = batch.set.call_args_list
+    assert podsumowanie_call.args[0] is referencje['groupGradeSummaries/grupa1']
+    assert podsumowanie_call.args[1]['count'] == firestore.Increment(1)
+    assert podsumowanie_call.args[1]['sum'] == firestore.Increment(4.5)
+    assert podsumowanie_call.args[1]['distribution'] == {'4.5': firestore.Increment(1)}
+    assert podsumowanie_call.kwargs == {'merge': True}
+    assert karta_call.args[0] is referencje['transcripts/student1']
+    assert karta_call.args[1]['entries']['nowy_dokument']['value'] == "4.5"
+    batch.commit.assert_awaited_once()
+    assert ocena_call.args == (referencje['grades/nowy_dokument'], {
+        'id': "nowy_dokument",
         'studentId': dane_oceny.studentId,
         'groupId': dane_oceny.grupaId,
         'value': dane_oceny.wartoscOceny,
@@ -61,8 +74,7 @@ async def test_utworz_ocene_sukces(mock_db):
 async def test_utworz_ocene_student_nie_istnieje(mock_db):
     """Testuje błąd, gdy student nie istnieje."""
     dane_oceny = OcenaTworzenie(studentId="nieistniejacy", grupaId="grupa1", wartoscOceny="4.0", wystawionePrzez="wykladowca1")
-    mock_student_doc = MagicMock(exists=False)
-    mock_db.collection.return_value.document.return_value.get = MagicMock(return_value=mock_student_doc)
+    mock_dokumenty(mock_db, {'groups/grupa1': {'studentsIds': []}})
 
     with pytest.raises(ValueError, match="Student o ID nieistniejacy nie istnieje"):
         await RepozytoriumOcen.utworz_ocene(dane_oceny)
@@ -71,17 +83,7 @@ async def test_utworz_ocene_student_nie_istnieje(mock_db):
 async def test_utworz_ocene_grupa_nie_istnieje(mock_db):
     """Testuje błąd, gdy grupa nie istnieje."""
     dane_oceny = OcenaTworzenie(studentId="student1", grupaId="nieistniejaca", wartoscOceny="4.0", wystawionePrzez="wykladowca1")
-    mock_student_doc = MagicMock(exists=True)
-    mock_group_doc = MagicMock(exists=False)
-    
-    def get_side_effect(*args, **kwargs):
-        if 'nieistniejaca' in str(args) or 'nieistniejaca' in str(kwargs):
-             return mock_group_doc
-        return mock_student_doc
-
-    mock_get = MagicMock(side_effect=[mock_student_doc, mock_group_doc])
-    mock_db.collection.return_value.document.return_value.get = mock_get
-
+    mock_dokumenty(mock_db, {'users/student1': {'role': 'student'}})
 
     with pytest.raises(ValueError, match="Grupa o ID nieistniejaca nie istnieje"):
         await RepozytoriumOcen.utworz_ocene(dane_oceny)
@@ -90,12 +92,10 @@ async def test_utworz_ocene_grupa_nie_istnieje(mock_db):
 async def test_utworz_ocene_student_nie_w_grupie(mock_db):
     """Testuje błąd, gdy student nie należy do grupy."""
     dane_oceny = OcenaTworzenie(studentId="student3", grupaId="grupa1", wartoscOceny="4.0", wystawionePrzez="wykladowca1")
-    mock_student_doc = MagicMock(exists=True)
-    mock_group_doc = MagicMock(exists=True)
-    mock_group_doc.to_dict.return_value = {'studentsIds': ['student1', 'student2']}
-
-    mock_get = MagicMock(side_effect=[mock_student_doc, mock_group_doc])
-    mock_db.collection.return_value.document.return_value.get = mock_get
+    mock_dokumenty(mock_db, {
+        'users/student3': {'role': 'student'},
+        'groups/grupa1': {'studentsIds': ['student1', 'student2']},
+    })
 
     with pytest.raises(ValueError, match="Student o ID student3 nie należy do grupy"):
         await RepozytoriumOcen.utworz_ocene(dane_oceny)
@@ -106,7 +106,7 @@ async def test_pobierz_ocene_po_id_sukces(mock_db):
     mock_data = {"id": "ocena1", "value": "5.0"}
     mock_doc = MagicMock(exists=True)
     mock_doc.to_dict.return_value = mock_data
-    mock_db.collection.return_value.document.return_value.get = MagicMock(return_value=mock_doc)
+    mock_db.collection.return_value.document.return_value.get = AsyncMock(return_value=mock_doc)
 
     wynik = await RepozytoriumOcen.pobierz_ocene_po_id("ocena1")
     assert wynik == mock_data
@@ -115,7 +115,7 @@ async def test_pobierz_ocene_po_id_sukces(mock_db):
 async def test_pobierz_ocene_po_id_nie_istnieje(mock_db):
     """Testuje pobranie nieistniejącej oceny."""
     mock_doc = MagicMock(exists=False)
-    mock_db.collection.return_value.document.return_value.get = MagicMock(return_value=mock_doc)
+    mock_db.collection.return_value.document.return_value.get = AsyncMock(return_value=mock_doc)
 
     wynik = await RepozytoriumOcen.pobierz_ocene_po_id("nieistniejaca")
     assert wynik is None
@@ -127,7 +127,7 @@ async def test_pobierz_oceny_studenta_sukces(mock_db):
     mock_doc2 = MagicMock(to_dict=MagicMock(return_value={"id": "o2", "value": "4"}))
     
     mock_db.collection.return_value.where.return_value.stream = MagicMock(
-        return_value=mock_iterator([mock_doc1, mock_doc2])
+        return_value=mock_async_iterator([mock_doc1, mock_doc2])
     )
 
     wynik = await RepozytoriumOcen.pobierz_oceny_studenta("student1")
@@ -142,7 +142,7 @@ async def test_pobierz_oceny_z_grupy_sukces(mock_db):
     mock_doc1 = MagicMock(to_dict=MagicMock(return_value={"id": "o1", "value": "5"}))
     
     mock_db.collection.return_value.where.return_value.stream = MagicMock(
-        return_value=mock_iterator([mock_doc1])
+        return_value=mock_async_iterator([mock_doc1])
     )
 
     wynik = await RepozytoriumOcen.pobierz_oceny_z_grupy("grupa1")
@@ -158,41 +158,68 @@ async def test_pobierz_wszystkie_oceny_sukces(mock_db):
     mock_doc2 = MagicMock(to_dict=MagicMock(return_value={"id": "o2"}))
     
     mock_db.collection.return_value.stream = MagicMock(
-        return_value=mock_iterator([mock_doc1, mock_doc2])
+        return_value=mock_async_iterator([mock_doc1, mock_doc2])
     )
 
     wynik = await RepozytoriumOcen.pobierz_wszystkie_oceny()
 
     assert len(wynik) == 2
 
+@pytest.mark.asyncio
+async def test_strumieniuj_oceny(mock_db):
+    """Testuje zwracanie ocen kolejno ze strumienia Firestore."""
+    mock_doc1 = MagicMock(to_dict=MagicMock(return_value={"id": "o1"}))
+    mock_doc2 = MagicMock(to_dict=MagicMock(return_value={"id": "o2"}))
+    mock_db.collection.return_value.stream = MagicMock(
+        return_value=mock_async_iterator([mock_doc1, mock_doc2])
+    )
+
+    wynik = [ocena async for ocena in RepozytoriumOcen.strumieniuj_oceny()]
+
+    assert wynik == [{"id": "o1"}, {"id": "o2"}]
+    mock_db.collection.assert_called_once_with(RepozytoriumOcen.COLLECTION_NAME)
+
 @pytest.mark.asyncio
 async def test_aktualizuj_ocene_sukces(mock_db):
     """Testuje pomyślną aktualizację oceny."""
-    mock_ocena_doc = MagicMock(exists=True)
-    mock_ocena_doc.to_dict.return_value = {'studentId': 's1', 'groupId': 'g1'}
-    
-    mock_grupa_doc = MagicMock(exists=True)
-    mock_grupa_doc.to_dict.return_value = {'studentsIds': ['s1']}
-    
-    mock_ocena_ref = MagicMock()
-    mock_ocena_ref.get = MagicMock(return_value=mock_ocena_doc)
-    mock_ocena_ref.update = MagicMock()
-
-    mock_db.collection.return_value.document.return_value = mock_ocena_ref
-    mock_db.collection.return_value.document.return_value.get = MagicMock(
-        side_effect = [mock_ocena_doc, mock_grupa_doc]
-    )
+    referencje = mock_dokumenty(mock_db, {
+        'grades/ocena1': {'studentId': 's1', 'groupId': 'g1'},
+        'groups/g1': {'studentsIds': ['s1']},
+    })
 
     wynik = await RepozytoriumOcen.aktualizuj_ocene("ocena1", {"wartoscOceny": "3.5"})
 
     assert wynik is True
-    mock_ocena_ref.update.assert_called_once_with({'value': "3.5"})
+    transakcja = mock_db.transaction.return_value
+    transakcja.update.assert_called_once_with(referencje['grades/ocena1'], {'value': "3.5"})
+    transakcja._commit.assert_awaited_once()
+    grupa_call = mock_db.get_all.call_args_list[-1]
+    assert grupa_call.args[0] == [referencje['groups/g1']]
+    assert grupa_call.kwargs['transaction'] is transakcja
+
+@pytest.mark.asyncio
+async def test_aktualizuj_ocene_zmiana_studenta_i_grupy_jednym_odczytem(mock_db):
+    """Testuje, że walidacja nowego studenta i grupy odbywa się jednym get_all."""
+    referencje = mock_dokumenty(mock_db, {
+        'grades/ocena1': {'studentId': 's1', 'groupId': 'g1'},
+        'users/s2': {'role': 'student'},
+        'groups/g2': {'studentsIds': ['s2']},
+    })
+
+    wynik = await RepozytoriumOcen.aktualizuj_ocene("ocena1", {"studentId": "s2", "grupaId": "g2"})
+
+    assert wynik is True
+    mock_db.get_all.assert_called_once()
+    for ref in referencje.values():
+        ref.get.assert_not_called()
+    mock_db.transaction.return_value.update.assert_called_once_with(
+        referencje['grades/ocena1'], {'studentId': 's2', 'groupId': 'g2'}
+    )
 
 @pytest.mark.asyncio
 async def test_aktualizuj_ocene_nie_istnieje(mock_db):
     """Testuje błąd aktualizacji, gdy ocena nie istnieje."""
-    mock_ocena_doc = MagicMock(exists=False)
-    mock_db.collection.return_value.document.return_value.get = MagicMock(return_value=mock_ocena_doc)
+    mock_dokumenty(mock_db, {})
 
     with pytest.raises(ValueError, match="Ocena o ID ocenaNieIstniejaca nie istnieje"):
         await RepozytoriumOcen.aktualizuj_ocene("ocenaNieIstniejaca", {"wartoscOceny": 3.5})
@@ -200,9 +227,257 @@ async def test_aktualizuj_ocene_nie_istnieje(mock_db):
 @pytest.mark.asyncio
 async def test_usun_ocene_sukces(mock_db):
     """Testuje pomyślne usunięcie oceny."""
-    mock_db.collection.return_value.document.return_value.delete = MagicMock()
+    referencje = mock_dokumenty(mock_db, {
+        'grades/ocenaDoUsuniecia': {'groupId': 'g1', 'value': '3.0'},
+    })
 
     wynik = await RepozytoriumOcen.usun_ocene("ocenaDoUsuniecia")
 
     assert wynik is True
-    mock_db.collection.return_value.document.return_value.delete.assert_called_once()
\ No newline at end of file
+    transakcja = mock_db.transaction.return_value
+    transakcja.delete.assert_called_once_with(referencje['grades/ocenaDoUsuniecia'])
+    podsumowanie_ref, dane = transakcja.set.call_args.args
+    assert podsumowanie_ref is referencje['groupGradeSummaries/g1']
+    assert dane['count'] == firestore.Increment(-1)
+    assert dane['distribution'] == {'3': firestore.Increment(-1)}
+    transakcja._commit.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_utworz_oceny_hurtowo(mock_db, mocker):
+    """Testuje hurtowy import z jednym odczytem grupy i zapisem paczkami."""
+    mocker.patch('app.repozytoria.ocena.ROZMIAR_PACZKI', 5)
+    mock_dokumenty(mock_db, {
+        'groups/g1': {'studentsIds': ['s1', 's2', 's3']},
+    })
+    paczki = [MagicMock(commit=AsyncMock()) for _ in range(2)]
+    mock_db.batch.side_effect = paczki
+    oceny = [
+        OcenaTworzenie(studentId="s1", grupaId="g1", wartoscOceny="5.0", wystawionePrzez="w1"),
+        OcenaTworzenie(studentId="obcy", grupaId="g1", wartoscOceny="4.0", wystawionePrzez="w1"),
+        OcenaTworzenie(studentId="s2", grupaId="g1", wartoscOceny="3.0", wystawionePrzez="w1"),
+        OcenaTworzenie(studentId="s1", grupaId="brak", wartoscOceny="2.0", wystawionePrzez="w1"),
+        OcenaTworzenie(studentId="s3", grupaId="g1", wartoscOceny="4.5", wystawionePrzez="w1"),
+    ]
+
+    wyniki = await RepozytoriumOcen.utworz_oceny_hurtowo(oceny)
+
+    assert [wynik.indeks for wynik in wyniki] == [0, 1, 2, 3, 4]
+    assert [wynik.ocenaId is not None for wynik in wyniki] == [True, False, True, False, True]
+    assert wyniki[1].blad == "Student o ID obcy nie należy do grupy"
+    assert wyniki[3].blad == "Grupa o ID brak nie istnieje"
+    mock_db.get_all.assert_called_once()
+    assert len(mock_db.get_all.call_args.args[0]) == 2
+    assert paczki[0].set.call_count == 5
+    assert paczki[1].set.call_count == 3
+    zapisy = {c.args[0].path: c.args[1] for c in paczki[0].set.call_args_list}
+    assert zapisy['groupGradeSummaries/g1']['count'] == firestore.Increment(2)
+    assert zapisy['groupGradeSummaries/g1']['sum'] == firestore.Increment(8.0)
+    assert list(zapisy['transcripts/s1']['entries'].values())[0]['value'] == "5.0"
+    for paczka in paczki:
+        paczka.commit.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_utworz_oceny_hurtowo_blad_paczki(mock_db):
+    """Testuje oznaczenie wierszy paczki, której zapis się nie powiódł."""
+    mock_dokumenty(mock_db, {'groups/g1': {'studentsIds': ['s1']}})
+    mock_db.batch.return_value.commit = AsyncMock(side_effect=Exception("limit zapisów"))
+    oceny = [OcenaTworzenie(studentId="s1", grupaId="g1", wartoscOceny="5.0", wystawionePrzez="w1")]
+
+    wyniki = await RepozytoriumOcen.utworz_oceny_hurtowo(oceny)
+
+    assert wyniki[0].ocenaId is None
+    assert "limit zapisów" in wyniki[0].blad
+
+@pytest.mark.asyncio
+async def test_utworz_ocene_rola_z_pamieci_podrecznej(mock_db):
+    """Testuje, że przy roli w pamięci podręcznej odczytywana jest tylko grupa."""
+    dane_oceny = OcenaTworzenie(
+        studentId="student1", grupaId="grupa1", wartoscOceny="5.0", wystawionePrzez="wykladowca1"
+    )
+    referencje = mock_dokumenty(mock_db, {
+        'users/student1': {'role': 'student'},
+        'groups/grupa1': {'studentsIds': ['student1']},
+    })
+
+    await RepozytoriumOcen.utworz_ocene(dane_oceny)
+    await RepozytoriumOcen.utworz_ocene(dane_oceny)
+
+    pierwszy, drugi = mock_db.get_all.call_args_list
+    assert len(pierwszy.args[0]) == 2
+    assert drugi.args[0] == [referencje['groups/grupa1']]
+
+@pytest.mark.asyncio
+async def test_aktualizuj_ocene_przenosi_wartosc_miedzy_podsumowaniami(mock_db):
+    """Testuje odliczenie starej wartości z poprzedniej grupy i doliczenie nowej do nowej grupy."""
+    referencje = mock_dokumenty(mock_db, {
+        'grades/ocena1': {'studentId': 's1', 'groupId': 'g1', 'value': '3.0'},
+        'groups/g2': {'studentsIds': ['s1']},
+    })
+
+    await RepozytoriumOcen.aktualizuj_ocene("ocena1", {"grupaId": "g2", "wartoscOceny": "4.0"})
+
+    zapisy = {
+        c.args[0].path: c.args[1]
+        for c in mock_db.transaction.return_value.set.call_args_list
+    }
+    assert zapisy['groupGradeSummaries/g1']['count'] == firestore.Increment(-1)
+    assert zapisy['groupGradeSummaries/g1']['distribution'] == {'3': firestore.Increment(-1)}
+    assert zapisy['groupGradeSummaries/g2']['count'] == firestore.Increment(1)
+    assert zapisy['groupGradeSummaries/g2']['sum'] == firestore.Increment(4.0)
+    mock_db.transaction.return_value._commit.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_aktualizuj_ocene_bez_zmiany_wartosci_nie_zmienia_podsumowania(mock_db):
+    """Testuje, że zmiana wystawiającego nie zapisuje podsumowania."""
+    mock_dokumenty(mock_db, {
+        'grades/ocena1': {'studentId': 's1', 'groupId': 'g1', 'value': '3.0'},
+        'groups/g1': {'studentsIds': ['s1']},
+    })
+
+    await RepozytoriumOcen.aktualizuj_ocene("ocena1", {"wystawionePrzez": "w2"})
+
+    mock_db.transaction.return_value.set.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_przelicz_podsumowanie_grupy(mock_db):
+    """Testuje odtworzenie podsumowania grupy ze wszystkich jej ocen."""
+    oceny = [MagicMock(to_dict=MagicMock(return_value={'value': v})) for v in ["5.0", "3,0", "zal"]]
+    mock_db.collection.return_value.where.return_value.stream.return_value = (
+        mock_async_iterator(oceny)
+    )
+    mock_db.collection.return_value.document.return_value.set = AsyncMock()
+
+    podsumowanie = await RepozytoriumPodsumowanOcen.przelicz_podsumowanie("g1")
+
+    assert podsumowanie['count'] == 3
+    assert podsumowanie['numericCount'] == 2
+    assert podsumowanie['sum'] == 8.0
+    assert podsumowanie['distribution'] == {"5": 1, "3": 1, "zal": 1}
+    mock_db.collection.return_value.document.return_value.set.assert_awaited_once()
+
+@pytest.mark.parametrize("wartosc, klucz", [
+    ("5", "5"), ("5.0", "5"), ("4,5", "4.5"), ("4.5", "4.5"), (" zal ", "zal"),
+    ("", BRAK_WARTOSCI), (None, BRAK_WARTOSCI), ("inf", "inf")
+])
+async def test_klucz_rozkladu(wartosc, klucz):
+    """Testuje, że równe wartości ocen trafiają pod ten sam, niepusty klucz rozkładu."""
+    assert klucz_rozkladu(wartosc) == klucz
+
+
+async def test_zmiany_podsumowan_scalaja_rowne_wartosci():
+    """Testuje, że "4,5" i "4.5" zwiększają jeden licznik rozkładu."""
+    zmiany = ZmianyPodsumowan()
+    zmiany.dodaj("g1", "4,5")
+    zmiany.dodaj("g1", "4.5")
+    paczka = MagicMock()
+
+    zmiany.zapisz(paczka)
+
+    dane = paczka.set.call_args.args[1]
+    assert dane['distribution'] == {'4.5': firestore.Increment(2)}
+    assert dane['sum'] == firestore.Increment(9.0)
+    assert pole_rozkladu('4.5').to_api_repr() == 'distribution.`4.5`'
+
+
+async def test_aktualizuj_ocene_pusta_wartosc(mock_db):
+    """Testuje odrzucenie zmiany oceny na pustą wartość przed otwarciem transakcji."""
+    with pytest.raises(ValueError, match="nie może być pusta"):
+        await RepozytoriumOcen.aktualizuj_ocene("ocena1", {'wartoscOceny': ' '})
+
+    mock_db.transaction.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_utworz_ocene_wpis_karty_z_nazwami(mock_db):
+    """Testuje, że wpis karty ocen zawiera nazwę grupy i przedmiotu."""
+    dane_oceny = OcenaTworzenie(
+        studentId="s1", grupaId="g1", wartoscOceny="4.0", wystawionePrzez="w1"
+    )
+    mock_dokumenty(mock_db, {
+        'users/s1': {'role': 'student'},
+        'groups/g1': {'name': 'Grupa A', 'subjectId': 'p1', 'studentsIds': ['s1']},
+        'subjects/p1': {'name': 'Analiza'},
+    })
+
+    await RepozytoriumOcen.utworz_ocene(dane_oceny)
+
+    zapisy = {c.args[0].path: c.args[1] for c in mock_db.batch.return_value.set.call_args_list}
+    wpis = zapisy['transcripts/s1']['entries']['nowy_dokument']
+    assert wpis['groupName'] == 'Grupa A'
+    assert wpis['subjectName'] == 'Analiza'
+    assert wpis['timestamp'] == 'SERVER_TIMESTAMP_MOCK'
+
+@pytest.mark.asyncio
+async def test_aktualizuj_ocene_przenosi_wpis_karty(mock_db):
+    """Testuje przeniesienie wpisu między kartami przy zmianie studenta."""
+    mock_dokumenty(mock_db, {
+        'grades/ocena1': {'studentId': 's1', 'groupId': 'g1', 'value': '3.0'},
+        'users/s2': {'role': 'student'},
+        'groups/g1': {'name': 'Grupa A', 'studentsIds': ['s1', 's2']},
+    })
+
+    await RepozytoriumOcen.aktualizuj_ocene("ocena1", {"studentId": "s2"})
+
+    zapisy = {
+        c.args[0].path: c.args[1]
+        for c in mock_db.transaction.return_value.set.call_args_list
+    }
+    assert zapisy['transcripts/s1']['entries'] == {'ocena1': firestore.DELETE_FIELD}
+    assert zapisy['transcripts/s2']['entries']['ocena1']['groupName'] == 'Grupa A'
+
+@pytest.mark.asyncio
+async def test_aktualizuj_grupe_w_kartach(mock_db):
+    """Testuje zapisanie pełnych wpisów kart dla wszystkich ocen grupy."""
+    oceny = [
+        MagicMock(id=ocena_id, to_dict=MagicMock(return_value={
+            'studentId': student_id, 'groupId': 'g1', 'value': '4', 'created_at': 't1'
+        }))
+        for ocena_id, student_id in (("o1", "s1"), ("o2", "s1"), ("o3", "s2"))
+    ]
+    mock_db.collection.return_value.where.return_value.stream.return_value = (
+        mock_async_iterator(oceny)
+    )
+    mock_db.batch.return_value.commit = AsyncMock()
+
+    zmienione = await RepozytoriumKartOcen.aktualizuj_grupe_w_kartach(
+        "g1", {'name': 'Nowa', 'subjectId': 'p1'}, {'name': 'Analiza'}
+    )
+
+    assert zmienione == 3
+    wpisy = [c.args[1]['entries'] for c in mock_db.batch.return_value.set.call_args_list]
+    assert [list(wpisy_studenta) for wpisy_studenta in wpisy] == [['o1', 'o2'], ['o3']]
+    assert wpisy[1]['o3'] == {
+        'gradeId': 'o3', 'groupId': 'g1', 'groupName': 'Nowa', 'subjectId': 'p1',
+        'subjectName': 'Analiza', 'value': '4', 'timestamp': 't1'
+    }
+    mock_db.batch.return_value.commit.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_pobierz_karte_sortuje_wpisy(mock_db):
+    """Testuje zwrócenie wpisów karty od najstarszego."""
+    mock_dokumenty(mock_db, {'transcripts/s1': {'entries': {
+        'o2': {'gradeId': 'o2', 'timestamp': '2024-02-01'},
+        'o1': {'gradeId': 'o1', 'timestamp': '2024-01-01'},
+    }}})
+
+    karta = await RepozytoriumKartOcen.pobierz_karte("s1")
+
+    assert [wpis['gradeId'] for wpis in karta['entries']] == ['o1', 'o2']
+
+@pytest.mark.asyncio
+async def test_pobierz_wartosci_ocen_grup_dzieli_zapytania_in(mock_db, mocker):
+    """Testuje pobieranie samych wartości ocen zapytaniami 'in' po MAKS_WARTOSCI_IN grup."""
+    mocker.patch('app.repozytoria.ocena.MAKS_WARTOSCI_IN', 2)
+    zapytanie = mock_db.collection.return_value.where.return_value.select.return_value
+    zapytanie.stream.side_effect = [
+        mock_async_iterator([MagicMock(to_dict=MagicMock(return_value={'value': '5.0'}))]),
+        mock_async_iterator([MagicMock(to_dict=MagicMock(return_value={'value': '3.0'}))]),
+    ]
+
+    wartosci = await RepozytoriumOcen.pobierz_wartosci_ocen_grup(["g1", "g2", "g3"])
+
+    assert wartosci == ['5.0', '3.0']
+    assert [c.args for c in mock_db.collection.return_value.where.call_args_list] == [
+        ('groupId', 'in', ['g1', 'g2']),
+        ('groupId', 'in', ['g3']),
+    ]
+    mock_db.collection.return_value.where.return_value.select.assert_called_with(['value'])
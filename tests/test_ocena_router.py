@@ -1,9 +1,18 @@
 import pytest
 from fastapi import status
-from unittest.mock import patch, AsyncMock
-from app.modele.ocena import Ocena, OcenaTworzenie
+from unittest.mock import patch, AsyncMock, MagicMock
+from app.modele.ocena import (
+    MAKS_OCEN_W_IMPORCIE,
+    Ocena,
+    OcenaTworzenie,
+    RaportImportuOcen,
+    WynikImportuOceny
+)
 from app.serwisy.ocena import SerwisOcen
 import datetime
+import json
+
+from .conftest import mock_async_iterator
 
 sample_ocena_data = {
     "studentId": "s1",
@@ -62,6 +71,29 @@ def test_pobierz_wszystkie_oceny_blad_serwera(mock_pobierz_wszystkie, async_clie
     assert "Błąd podczas pobierania listy ocen" in response.json()["detail"]
     mock_pobierz_wszystkie.assert_called_once()
 
+@patch.object(SerwisOcen, 'strumieniuj_oceny')
+@patch.object(SerwisOcen, 'pobierz_wszystkie_oceny', new_callable=AsyncMock)
+def test_pobierz_wszystkie_oceny_strumien_ndjson(
+    mock_pobierz_wszystkie, mock_strumieniuj, async_client
+):
+    dokumenty = [
+        {"id": "o1", "value": "5.0", "created_at": datetime.datetime(2024, 1, 1, 10, 0)},
+        {"id": "o2", "value": "3.5", "created_at": datetime.datetime(2024, 1, 2, 12, 30)}
+    ]
+    mock_strumieniuj.return_value = mock_async_iterator(dokumenty)
+
+    response = async_client.get("/oceny/", params={"strumien": "true"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    linie = [json.loads(linia) for linia in response.text.splitlines()]
+    assert linie == [
+        {"id": "o1", "value": "5.0", "created_at": "2024-01-01T10:00:00"},
+        {"id": "o2", "value": "3.5", "created_at": "2024-01-02T12:30:00"}
+    ]
+    mock_strumieniuj.assert_called_once_with(None)
+    mock_pobierz_wszystkie.assert_not_called()
+
 @patch.object(SerwisOcen, 'pobierz_ocene_po_id', new_callable=AsyncMock)
 def test_pobierz_ocene_sukces(mock_pobierz_ocene_po_id, async_client):
     ocena_id = "o1"
@@ -143,8 +175,7 @@ def test_aktualizuj_ocene_sukces(mock_pobierz_ocene_po_id, mock_aktualizuj_ocene
     ocena_id = "o1"
     dane_aktualizacji = {"wartoscOceny": "4.5"}
     zaktualizowana_ocena_dane = {**sample_ocena_response, **dane_aktualizacji}
-    mock_aktualizuj_ocene.return_value = True
-    mock_pobierz_ocene_po_id.return_value = zaktualizowana_ocena_dane
+    mock_aktualizuj_ocene.return_value = zaktualizowana_ocena_dane
 
     response = async_client.put(f"/oceny/{ocena_id}", json=dane_aktualizacji)
 
@@ -152,7 +183,7 @@ def test_aktualizuj_ocene_sukces(mock_pobierz_ocene_po_id, mock_aktualizuj_ocene
     assert response.json()["message"] == f"Ocena {ocena_id} zaktualizowana pomyślnie"
     assert response.json()["updated_data"] == zaktualizowana_ocena_dane
     mock_aktualizuj_ocene.assert_called_once_with(ocena_id, dane_aktualizacji)
-    mock_pobierz_ocene_po_id.assert_called_once_with(ocena_id)
+    mock_pobierz_ocene_po_id.assert_not_called()
 
 @patch.object(SerwisOcen, 'aktualizuj_ocene', new_callable=AsyncMock)
 @patch.object(SerwisOcen, 'pobierz_ocene_po_id', new_callable=AsyncMock)
@@ -229,3 +260,79 @@ def test_usun_ocene_blad_serwera(mock_usun_ocene, async_client):
     assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
     assert "Błąd podczas usuwania oceny" in response.json()["detail"]
     mock_usun_ocene.assert_called_once_with(ocena_id)
+
+@patch.object(SerwisOcen, 'utworz_oceny_hurtowo', new_callable=AsyncMock)
+def test_utworz_oceny_hurtowo_sukces(mock_utworz_hurtowo, async_client):
+    mock_utworz_hurtowo.return_value = RaportImportuOcen(
+        utworzone=1,
+        odrzucone=1,
+        wyniki=[
+            WynikImportuOceny(indeks=0, ocenaId="o1"),
+            WynikImportuOceny(indeks=1, blad="Student o ID s2 nie należy do grupy")
+        ]
+    )
+
+    response = async_client.post(
+        "/oceny/hurtowo", json=[sample_ocena_data, {**sample_ocena_data, "studentId": "s2"}]
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["utworzone"] == 1
+    assert response.json()["wyniki"][1]["blad"] == "Student o ID s2 nie należy do grupy"
+    args, _ = mock_utworz_hurtowo.call_args
+    assert [ocena.studentId for ocena in args[0]] == ["s1", "s2"]
+
+@patch.object(SerwisOcen, 'utworz_oceny_hurtowo', new_callable=AsyncMock)
+def test_utworz_oceny_hurtowo_za_duzo_wierszy(mock_utworz_hurtowo, async_client):
+    response = async_client.post(
+        "/oceny/hurtowo", json=[sample_ocena_data] * (MAKS_OCEN_W_IMPORCIE + 1)
+    )
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json()["detail"][0]["type"] == "too_long"
+    mock_utworz_hurtowo.assert_not_called()
+
+@patch.object(SerwisOcen, 'pobierz_podsumowanie_grupy', new_callable=AsyncMock)
+def test_pobierz_podsumowanie_grupy_sukces(mock_pobierz_podsumowanie, async_client):
+    mock_pobierz_podsumowanie.return_value = {
+        "groupId": "g1", "count": 2, "numericCount": 2, "sum": 8.0,
+        "distribution": {"5.0": 1, "3.0": 1}, "mean": 4.0
+    }
+
+    response = async_client.get("/oceny/grupy/g1/podsumowanie")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["mean"] == 4.0
+    mock_pobierz_podsumowanie.assert_called_once_with("g1")
+
+@patch.object(SerwisOcen, 'pobierz_podsumowanie_grupy', new_callable=AsyncMock)
+def test_pobierz_podsumowanie_grupy_brak(mock_pobierz_podsumowanie, async_client):
+    mock_pobierz_podsumowanie.return_value = None
+
+    response = async_client.get("/oceny/grupy/g1/podsumowanie")
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+@patch.object(SerwisOcen, 'pobierz_karte_studenta', new_callable=AsyncMock)
+def test_pobierz_karte_studenta_sukces(mock_pobierz_karte, async_client):
+    mock_pobierz_karte.return_value = {
+        "studentId": "s1",
+        "entries": [
+            {"gradeId": "o1", "groupName": "Grupa A", "subjectName": "Analiza", "value": "5.0"}
+        ],
+        "updatedAt": None
+    }
+
+    response = async_client.get("/oceny/studenci/s1/karta")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["entries"][0]["subjectName"] == "Analiza"
+    mock_pobierz_karte.assert_called_once_with("s1")
+
+@patch.object(SerwisOcen, 'pobierz_karte_studenta', new_callable=AsyncMock)
+def test_pobierz_karte_studenta_brak(mock_pobierz_karte, async_client):
+    mock_pobierz_karte.return_value = None
+
+    response = async_client.get("/oceny/studenci/s1/karta")
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
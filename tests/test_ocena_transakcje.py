@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from app.modele.ocena import OcenaTworzenie
+from app.repozytoria.ocena import RepozytoriumOcen
+
+
+async def _zapisz_oceny(klient, *wartosci):
+    await klient.collection('users').document('s1').set({'role': 'student'})
+    await klient.collection('groups').document('g1').set(
+        {'name': 'G1', 'subjectId': 'p1', 'studentsIds': ['s1']}
+    )
+    wyniki = await RepozytoriumOcen.utworz_oceny_hurtowo([
+        OcenaTworzenie(studentId='s1', grupaId='g1', wystawionePrzez='w1', wartoscOceny=wartosc)
+        for wartosc in wartosci
+    ])
+    return [wynik.ocenaId for wynik in wyniki]
+
+
+async def _odczytaj(klient, kolekcja, dokument_id):
+    return (await klient.collection(kolekcja).document(dokument_id).get()).to_dict()
+
+
+@pytest.mark.asyncio
+async def test_wspolbiezne_usuniecia_oceny_odliczaja_ja_raz(baza_z_pomiarem):
+    """Testuje, że dwa współbieżne usunięcia tej samej oceny zmieniają podsumowanie tylko raz."""
+    ocena_id, _ = await _zapisz_oceny(baza_z_pomiarem, '3', '4')
+
+    await asyncio.gather(
+        RepozytoriumOcen.usun_ocene(ocena_id), RepozytoriumOcen.usun_ocene(ocena_id)
+    )
+
+    podsumowanie = await _odczytaj(baza_z_pomiarem, 'groupGradeSummaries', 'g1')
+    assert podsumowanie['count'] == 1
+    assert podsumowanie['sum'] == 4.0
+    assert podsumowanie['distribution'] == {'3': 0, '4': 1}
+
+
+@pytest.mark.asyncio
+async def test_usuniecie_po_wspolbieznej_zmianie_odlicza_nowa_wartosc(baza_z_pomiarem, monkeypatch):
+    """Testuje, że usunięcie zatwierdzone po zmianie oceny odlicza jej nową wartość.
+
+    Nowa wartość znika zarówno z podsumowania grupy, jak i z karty studenta.
+    """
+    ocena_id, drugi_id = await _zapisz_oceny(baza_z_pomiarem, '3', '4')
+    klient = baza_z_pomiarem._cel
+    zatwierdz = klient._zatwierdz
+    opoznione = []
+
+    async def zatwierdz_z_opoznionym_usunieciem(operacje, *args, **kwargs):
+        if not opoznione and any(operacja.rodzaj == 'delete' for operacja in operacje):
+            opoznione.append(True)
+            await asyncio.sleep(0.01)
+        return await zatwierdz(operacje, *args, **kwargs)
+
+    monkeypatch.setattr(klient, '_zatwierdz', zatwierdz_z_opoznionym_usunieciem)
+
+    await asyncio.gather(
+        RepozytoriumOcen.usun_ocene(ocena_id),
+        RepozytoriumOcen.aktualizuj_ocene(ocena_id, {'wartoscOceny': '5'})
+    )
+
+    assert await _odczytaj(baza_z_pomiarem, 'grades', ocena_id) is None
+    karta = await _odczytaj(baza_z_pomiarem, 'transcripts', 's1')
+    assert list(karta['entries']) == [drugi_id]
+    podsumowanie = await _odczytaj(baza_z_pomiarem, 'groupGradeSummaries', 'g1')
+    assert podsumowanie['count'] == 1
+    assert podsumowanie['sum'] == 4.0
+    rozklad = {wartosc: ile for wartosc, ile in podsumowanie['distribution'].items() if ile}
+    assert rozklad == {'4': 1}
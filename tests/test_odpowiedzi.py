@@ -0,0 +1,36 @@
+import datetime
+import json
+
+from google.api_core.datetime_helpers import DatetimeWithNanoseconds
+
+from app.modele.strona import Strona
+from app.routery.odpowiedzi import OdpowiedzJSON, etag_wersji
+
+
+def test_odpowiedz_json_serializuje_typy_firestore_i_modele():
+    """Testuje, że orjson obsługuje znaczniki czasu Firestore i modele Pydantic."""
+    czas = DatetimeWithNanoseconds(
+        2024, 1, 2, 3, 4, 5, nanosecond=123456789, tzinfo=datetime.timezone.utc
+    )
+    strona = Strona(
+        elementy=[{'id': 'g1', 'updatedAt': czas, 'nazwa': 'Zażółć'}], nastepnaStrona='k'
+    )
+
+    odpowiedz = OdpowiedzJSON(strona)
+
+    assert odpowiedz.media_type == "application/json"
+    assert json.loads(odpowiedz.body) == {
+        'elementy': [
+            {'id': 'g1', 'updatedAt': '2024-01-02T03:04:05.123456+00:00', 'nazwa': 'Zażółć'}
+        ],
+        'nastepnaStrona': 'k'
+    }
+
+
+def test_etag_wersji_uwzglednia_nanosekundy():
+    """Testuje, że zapisy różniące się nanosekundami mają różne ETagi."""
+    pierwszy = DatetimeWithNanoseconds(2024, 1, 2, nanosecond=1, tzinfo=datetime.timezone.utc)
+    drugi = DatetimeWithNanoseconds(2024, 1, 2, nanosecond=2, tzinfo=datetime.timezone.utc)
+
+    assert etag_wersji(pierwszy) == '"1704153600.000000001"'
+    assert etag_wersji(pierwszy) != etag_wersji(drugi)
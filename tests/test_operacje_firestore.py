@@ -0,0 +1,158 @@
+import logging
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from firebase_admin import firestore
+from google.api_core import exceptions
+from google.auth.credentials import AnonymousCredentials
+from google.cloud.firestore_v1.async_client import AsyncClient
+from google.cloud.firestore_v1.types import CommitResponse, WriteResult
+
+from app.konfiguracja.metryki import MetrykiHTTP, PosrednikMetryk, RejestrMetryk
+from app.konfiguracja.operacje_firestore import (
+    budzet_operacji, KlientZPomiarem, licz_operacje, PrzekroczonyBudzetOperacji
+)
+from app.repozytoria.grupa_rep import RepozytoriumGrup
+from app.repozytoria.ocena import RepozytoriumOcen
+
+
+async def _zapisz_dane(klient):
+    await klient.collection('users').document('s1').set({'role': 'student'})
+    await klient.collection('subjects').document('p1').set({'name': 'Analiza'})
+    await klient.collection('groups').document('g1').set(
+        {'name': 'G1', 'subjectId': 'p1', 'studentsIds': ['s1']}
+    )
+    await klient.collection('grades').document('o1').set(
+        {'studentId': 's1', 'groupId': 'g1', 'value': '3'}
+    )
+
+
+@pytest.mark.asyncio
+async def test_operacje_poza_kontekstem_nie_sa_liczone(baza_z_pomiarem):
+    """Testuje, że zapisy poza licz_operacje() nie trafiają do żadnego licznika."""
+    with licz_operacje() as licznik:
+        pass
+    await _zapisz_dane(baza_z_pomiarem)
+
+    assert licznik.operacje == {'read': 0, 'write': 0, 'delete': 0, 'streamed': 0}
+
+
+@pytest.mark.asyncio
+async def test_aktualizacja_oceny_zlicza_odczyty_i_zapisy_paczki(baza_z_pomiarem):
+    """Testuje zliczanie odczytów get/get_all i zapisów zatwierdzonej paczki."""
+    await _zapisz_dane(baza_z_pomiarem)
+
+    with licz_operacje() as licznik:
+        await RepozytoriumOcen.aktualizuj_ocene('o1', {'wartoscOceny': '5'})
+
+    assert licznik.odczyty == 3
+    assert licznik.zapisy == 3
+    assert licznik.usuniecia == 0
+
+
+@pytest.mark.asyncio
+async def test_zapytania_i_transakcje_sa_liczone(baza_z_pomiarem):
+    """Testuje dokumenty strumieniowane oraz zapisy transakcji liczone raz po zatwierdzeniu."""
+    await _zapisz_dane(baza_z_pomiarem)
+    await baza_z_pomiarem.collection('users').document('s2').set({'role': 'student'})
+
+    with licz_operacje() as licznik:
+        grupy = await RepozytoriumGrup.pobierz_wszystkie_grupy()
+        await RepozytoriumGrup.przypisz_studenta_do_grupy('g1', 's2')
+        await RepozytoriumOcen.usun_ocene('o1')
+
+    assert len(grupy) == 1
+    assert licznik.strumieniowane == 1
+    assert licznik.zapisy == 1 + 2
+    assert licznik.usuniecia == 1
+
+
+def test_posrednik_eksportuje_operacje_i_loguje_wolne_zapytania(baza_z_pomiarem, caplog):
+    """Testuje metrykę operacji per trasa oraz log wolnego zapytania z licznikami."""
+    metryki = MetrykiHTTP(RejestrMetryk())
+    aplikacja = FastAPI()
+
+    @aplikacja.get("/grupy/{grupa_id}")
+    async def pobierz(grupa_id: str):
+        return await RepozytoriumGrup.pobierz_grupe_po_id(grupa_id)
+
+    aplikacja.add_middleware(PosrednikMetryk, metryki=metryki, prog_wolnego_zapytania=0)
+
+    with caplog.at_level(logging.WARNING, logger="app.konfiguracja.metryki"):
+        TestClient(aplikacja).get("/grupy/brak")
+
+    assert metryki.operacje_firestore.wartosc(('GET', '/grupy/{grupa_id}', 'read')) == 1
+    assert "Wolne zapytanie GET /grupy/brak (/grupy/{grupa_id}) 200" in caplog.text
+    assert "read=1 write=0 delete=0 streamed=0" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_budzet_operacji_zglasza_przekroczenie(baza_z_pomiarem):
+    """Testuje, że budżet przepuszcza blok w limicie i zgłasza błąd ponad nim."""
+    await _zapisz_dane(baza_z_pomiarem)
+
+    with budzet_operacji(odczyty=1, zapisy=0):
+        await RepozytoriumGrup.pobierz_grupe_po_id('g1')
+    with pytest.raises(PrzekroczonyBudzetOperacji, match="read: 2 > 1"):
+        with budzet_operacji(odczyty=1):
+            await RepozytoriumGrup.pobierz_grupe_po_id('g1')
+            await RepozytoriumGrup.pobierz_grupe_po_id('g2')
+
+
+def _klient_sdk(odpowiedzi_commit):
+    """Tworzy prawdziwego AsyncClient Firestore z podmienionym API gRPC (bez sieci)."""
+    klient = AsyncClient(project='test', credentials=AnonymousCredentials())
+    api = MagicMock()
+    api.begin_transaction = AsyncMock(
+        side_effect=lambda **kwargs: MagicMock(transaction=b'transakcja')
+    )
+    api.commit = AsyncMock(side_effect=odpowiedzi_commit)
+    api.rollback = AsyncMock()
+    klient._firestore_api_internal = api
+    return klient, api
+
+
+@pytest.mark.asyncio
+async def test_transakcja_sdk_liczy_tylko_zatwierdzona_probe():
+    """Testuje TransakcjaZPomiarem z AsyncTransaction SDK w firestore.async_transactional."""
+    klient, api = _klient_sdk([
+        exceptions.Aborted("konflikt"),
+        CommitResponse(write_results=[WriteResult(), WriteResult()]),
+    ])
+    baza = KlientZPomiarem(klient)
+
+    @firestore.async_transactional
+    async def zapisz(transakcja):
+        transakcja.set(baza.collection('groups').document('g1'), {'name': 'G1'})
+        transakcja.delete(baza.collection('groups').document('g2'))
+
+    transakcja = baza.transaction(max_attempts=2)
+    with licz_operacje() as licznik:
+        await zapisz(transakcja)
+
+    assert api.begin_transaction.await_count == 2
+    assert api.commit.await_count == 2
+    assert licznik.operacje == {'read': 0, 'write': 1, 'delete': 1, 'streamed': 0}
+    assert len(transakcja.wyniki) == 2
+
+
+@pytest.mark.asyncio
+async def test_transakcja_sdk_nie_liczy_wycofanej_proby():
+    """Testuje, że błąd w funkcji transakcji wycofuje ją bez liczenia zapisów."""
+    klient, api = _klient_sdk([])
+    baza = KlientZPomiarem(klient)
+
+    @firestore.async_transactional
+    async def zapisz(transakcja):
+        transakcja.set(baza.collection('groups').document('g1'), {'name': 'G1'})
+        raise ValueError("błąd w transakcji")
+
+    with licz_operacje() as licznik:
+        with pytest.raises(ValueError):
+            await zapisz(baza.transaction())
+
+    api.rollback.assert_awaited_once()
+    api.commit.assert_not_awaited()
+    assert licznik.operacje['write'] == 0
@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+
+from app.konfiguracja.operacje_firestore import licz_operacje
+from app.modele.grupa import GrupaTworzenie
+from app.repozytoria.pamiec_podreczna import PamiecOdswiezanaWTle
+from app.serwisy.grupa_serw import SerwisGrup
+
+
+class Zegar:
+    def __init__(self):
+        self.teraz = 0.0
+
+    def __call__(self):
+        return self.teraz
+
+
+def wczytywanie(*wartosci):
+    """Zwraca funkcję wczytującą kolejne wartości i listę jej wywołań."""
+    wywolania = []
+
+    async def wczytaj():
+        wywolania.append(len(wywolania))
+        await asyncio.sleep(0)
+        return wartosci[len(wywolania) - 1]
+
+    return wczytaj, wywolania
+
+
+@pytest.mark.asyncio
+async def test_brakujacy_wpis_jest_wczytywany_raz_dla_wspolbieznych_odczytow():
+    """Testuje, że współbieżne odczyty brakującego klucza czekają na jedno wczytanie."""
+    pamiec = PamiecOdswiezanaWTle(maks_rozmiar=8, swiezosc_sekundy=30, maks_wiek_sekundy=600)
+    wczytaj, wywolania = wczytywanie(['a'])
+
+    wyniki = await asyncio.gather(*(pamiec.pobierz('lista', wczytaj) for _ in range(5)))
+
+    assert wyniki == [['a']] * 5
+    assert len(wywolania) == 1
+    assert await pamiec.pobierz('lista', wczytaj) == ['a']
+    assert len(wywolania) == 1
+
+
+@pytest.mark.asyncio
+async def test_nieswiezy_wpis_jest_zwracany_od_razu_i_odswiezany_w_tle():
+    """Testuje, że po czasie świeżości odczyt dostaje stary wpis, a jedno zadanie wczytuje nowy."""
+    zegar = Zegar()
+    pamiec = PamiecOdswiezanaWTle(
+        maks_rozmiar=8, swiezosc_sekundy=30, maks_wiek_sekundy=600, zegar=zegar
+    )
+    wczytaj, wywolania = wczytywanie('stara', 'nowa', 'najnowsza')
+    await pamiec.pobierz('lista', wczytaj)
+
+    zegar.teraz = 31
+    assert [await pamiec.pobierz('lista', wczytaj) for _ in range(3)] == ['stara'] * 3
+    await asyncio.sleep(0.01)
+
+    assert len(wywolania) == 2
+    assert await pamiec.pobierz('lista', wczytaj) == 'nowa'
+
+    zegar.teraz = 1000
+    assert await pamiec.pobierz('lista', wczytaj) == 'najnowsza'
+
+
+@pytest.mark.asyncio
+async def test_uniewaznienie_odrzuca_wynik_trwajacego_wczytania():
+    """Testuje, że wczytanie rozpoczęte przed unieważnieniem nie zapisuje starych danych."""
+    pamiec = PamiecOdswiezanaWTle(maks_rozmiar=8, swiezosc_sekundy=30, maks_wiek_sekundy=600)
+    wczytaj, wywolania = wczytywanie('przed zapisem', 'po zapisie')
+
+    przed = asyncio.ensure_future(pamiec.pobierz('lista', wczytaj))
+    await asyncio.sleep(0)
+    pamiec.uniewaznij()
+
+    assert await przed == 'przed zapisem'
+    assert await pamiec.pobierz('lista', wczytaj) == 'po zapisie'
+    assert len(wywolania) == 2
+
+
+@pytest.mark.asyncio
+async def test_liczba_wpisow_jest_ograniczona():
+    """Testuje, że po przekroczeniu rozmiaru najdawniej używany wpis jest usuwany."""
+    pamiec = PamiecOdswiezanaWTle(maks_rozmiar=2, swiezosc_sekundy=30, maks_wiek_sekundy=600)
+    wczytaj, wywolania = wczytywanie('a', 'b', 'c', 'a2')
+
+    for klucz in ('a', 'b', 'c'):
+        await pamiec.pobierz(klucz, wczytaj)
+
+    assert len(pamiec._wpisy) == 2
+    assert await pamiec.pobierz('a', wczytaj) == 'a2'
+    assert len(wywolania) == 4
+
+
+@pytest.mark.asyncio
+async def test_rozne_pola_korzystaja_z_jednej_listy(baza_z_pomiarem):
+    """Testuje, że projekcja pól jest wykonywana w pamięci na jednej, pełnej liście grup."""
+    await baza_z_pomiarem.collection('groups').document('g1').set(
+        {'id': 'g1', 'name': 'G1', 'subjectId': 'p1', 'lecturer': {'id': 'w1', 'name': 'Nowak'}}
+    )
+
+    with licz_operacje() as licznik:
+        nazwy = await SerwisGrup.pobierz_wszystkie_grupy(['name'])
+        zagniezdzone = await SerwisGrup.pobierz_wszystkie_grupy(['id', 'lecturer.name', 'brak'])
+        pelne = await SerwisGrup.pobierz_wszystkie_grupy()
+
+    assert nazwy == [{'name': 'G1'}]
+    assert zagniezdzone == [{'id': 'g1', 'lecturer': {'name': 'Nowak'}}]
+    assert pelne[0]['lecturer'] == {'id': 'w1', 'name': 'Nowak'}
+    assert licznik.strumieniowane == 1
+
+
+@pytest.mark.asyncio
+async def test_lista_grup_jest_czytana_raz_i_uniewazniana_przez_serwis(baza_z_pomiarem):
+    """Testuje, że lista grup nie odczytuje Firestore ponownie, a utworzenie grupy ją unieważnia."""
+    await baza_z_pomiarem.collection('subjects').document('p1').set({'id': 'p1', 'name': 'Analiza'})
+    await baza_z_pomiarem.collection('groups').document('g1').set(
+        {'id': 'g1', 'name': 'G1', 'subjectId': 'p1'}
+    )
+
+    with licz_operacje() as licznik:
+        pierwsza = await SerwisGrup.pobierz_wszystkie_grupy()
+        druga = await SerwisGrup.pobierz_wszystkie_grupy()
+
+    assert [grupa['id'] for grupa in druga] == ['g1']
+    assert druga is pierwsza
+    assert licznik.strumieniowane == 1
+
+    nowa = await SerwisGrup.utworz_grupe(
+        GrupaTworzenie(nazwa='G2', przedmiotId='p1', wykladowcaId='w1')
+    )
+
+    grupy = await SerwisGrup.pobierz_wszystkie_grupy()
+    assert {grupa['id'] for grupa in grupy} == {'g1', nowa.grupaId}
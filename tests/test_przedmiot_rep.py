@@ -3,8 +3,9 @@ from unittest.mock import MagicMock, AsyncMock
 from app.repozytoria.przedmiot import RepozytoriumPrzedmiotow
 from app.modele.przedmiot import Przedmiot, PrzedmiotTworzenie
 from firebase_admin import firestore
+from google.api_core import exceptions
 
-from .conftest import mock_async_iterator, mock_iterator
+from .conftest import mock_async_iterator, mock_iterator, mock_dokumenty
 
 @pytest.mark.asyncio
 async def test_utworz_przedmiot_sukces(mock_db):
@@ -73,7 +74,9 @@ async def test_pobierz_wszystkie_przedmioty_sukces(mock_db):
     mock_doc1 = MagicMock(to_dict=MagicMock(return_value={"id": "p1", "name": "Chemia"}))
     mock_doc2 = MagicMock(to_dict=MagicMock(return_value={"id": "p2", "name": "Biologia"}))
 
-    mock_db.collection.return_value.stream.return_value = mock_iterator([mock_doc1, mock_doc2])
+    mock_db.collection.return_value.stream.return_value = mock_async_iterator(
+        [mock_doc1, mock_doc2]
+    )
 
     wynik = await RepozytoriumPrzedmiotow.pobierz_wszystkie_przedmioty()
 
@@ -87,7 +90,7 @@ async def test_pobierz_wszystkie_przedmioty_sukces(mock_db):
 @pytest.mark.asyncio
 async def test_pobierz_wszystkie_przedmioty_brak_danych(mock_db):
     """Testuje pobranie wszystkich przedmiotów, gdy nie ma żadnych."""
-    mock_db.collection.return_value.stream.return_value = mock_iterator([])
+    mock_db.collection.return_value.stream.return_value = mock_async_iterator([])
 
     wynik = await RepozytoriumPrzedmiotow.pobierz_wszystkie_przedmioty()
 
@@ -100,16 +103,13 @@ async def test_pobierz_wszystkie_przedmioty_brak_danych(mock_db):
 async def test_aktualizuj_przedmiot_sukces(mock_db):
     """Testuje pomyślną aktualizację przedmiotu."""
     przedmiot_id = "id_do_aktualizacji"
-    dane_przedmiotu = PrzedmiotTworzenie(nazwa="Historia nowa", opis="Historia Polski od 1945")
+    dane_aktualizacji = {"nazwa": "Historia nowa", "opis": "Historia Polski od 1945"}
 
     mock_doc_ref = mock_db.collection.return_value.document.return_value
     
-    wynik = await RepozytoriumPrzedmiotow.aktualizuj_przedmiot(przedmiot_id, dane_przedmiotu)
+    wynik = await RepozytoriumPrzedmiotow.aktualizuj_przedmiot(przedmiot_id, dane_aktualizacji)
 
-    assert isinstance(wynik, Przedmiot)
-    assert wynik.przedmiotId == przedmiot_id
-    assert wynik.nazwa == "Historia nowa"
-    assert wynik.opis == "Historia Polski od 1945"
+    assert wynik is True
 
     mock_db.collection.assert_called_once_with('subjects')
     mock_db.collection.return_value.document.assert_called_once_with(przedmiot_id)
@@ -121,6 +121,27 @@ async def test_aktualizuj_przedmiot_sukces(mock_db):
     assert 'updated_at' in args[0] and isinstance(args[0]['updated_at'], type(firestore.SERVER_TIMESTAMP))
 
 
+@pytest.mark.asyncio
+async def test_aktualizuj_przedmiot_czesciowo(mock_db):
+    """Testuje, że aktualizacja zapisuje tylko podane pola przedmiotu."""
+    mock_doc_ref = mock_db.collection.return_value.document.return_value
+
+    assert await RepozytoriumPrzedmiotow.aktualizuj_przedmiot("p1", {"nazwa": "Fizyka"}) is True
+
+    args, _ = mock_doc_ref.update.call_args
+    assert args[0]['name'] == 'Fizyka'
+    assert 'description' not in args[0]
+
+
+@pytest.mark.asyncio
+async def test_aktualizuj_przedmiot_nie_istnieje(mock_db):
+    """Testuje aktualizację przedmiotu, którego nie ma w Firestore."""
+    mock_doc_ref = mock_db.collection.return_value.document.return_value
+    mock_doc_ref.update.side_effect = exceptions.NotFound("Brak dokumentu")
+
+    assert await RepozytoriumPrzedmiotow.aktualizuj_przedmiot("brak", {"nazwa": "X"}) is False
+
+
 @pytest.mark.asyncio
 async def test_usun_przedmiot_sukces(mock_db):
     """Testuje pomyślne usunięcie przedmiotu."""
@@ -134,3 +155,58 @@ async def test_usun_przedmiot_sukces(mock_db):
     mock_db.collection.assert_called_once_with('subjects')
     mock_db.collection.return_value.document.assert_called_once_with(przedmiot_id)
     mock_doc_ref.delete.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_pobierz_strone_przedmiotow(mock_db):
+    """Testuje pobranie strony przedmiotów z kursorem następnej strony."""
+    mock_doc = MagicMock(id="p1", to_dict=MagicMock(return_value={"id": "p1", "name": "Chemia"}))
+    zapytanie = mock_db.collection.return_value.order_by.return_value.limit.return_value
+    zapytanie.stream.return_value = mock_async_iterator([mock_doc])
+
+    elementy, nastepna = await RepozytoriumPrzedmiotow.pobierz_strone_przedmiotow(1)
+
+    assert elementy == [{"id": "p1", "name": "Chemia"}]
+    assert nastepna is not None
+    mock_db.collection.assert_called_once_with('subjects')
+    mock_db.collection.return_value.order_by.return_value.limit.assert_called_once_with(1)
+
+
+@pytest.mark.asyncio
+async def test_pobierz_przedmiot_z_katalogu_czyta_raz(mock_db):
+    """Testuje, że katalog przedmiotów odczytuje dokument tylko przy pierwszym zapytaniu."""
+    referencje = mock_dokumenty(mock_db, {'subjects/p1': {'id': 'p1', 'name': 'Fizyka'}})
+
+    assert (await RepozytoriumPrzedmiotow.pobierz_przedmiot_z_katalogu("p1"))['name'] == 'Fizyka'
+    assert (await RepozytoriumPrzedmiotow.pobierz_przedmiot_z_katalogu("p1"))['name'] == 'Fizyka'
+
+    referencje['subjects/p1'].get.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_pobierz_przedmiot_z_katalogu_nie_zapamietuje_braku(mock_db):
+    """Testuje, że brak przedmiotu nie jest zapamiętywany."""
+    referencje = mock_dokumenty(mock_db, {})
+
+    assert await RepozytoriumPrzedmiotow.pobierz_przedmiot_z_katalogu("brak") is None
+    assert await RepozytoriumPrzedmiotow.pobierz_przedmiot_z_katalogu("brak") is None
+
+    assert referencje['subjects/brak'].get.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_aktualizuj_i_usun_przedmiot_uniewaznia_katalog(mock_db):
+    """Testuje unieważnienie wpisu katalogu po aktualizacji i usunięciu przedmiotu."""
+    referencje = mock_dokumenty(mock_db, {'subjects/p1': {'id': 'p1', 'name': 'Fizyka'}})
+    await RepozytoriumPrzedmiotow.pobierz_przedmiot_z_katalogu("p1")
+
+    await RepozytoriumPrzedmiotow.aktualizuj_przedmiot(
+        "p1", {"nazwa": "Chemia", "opis": "Opis"}
+    )
+    referencje['subjects/p1'].get.return_value.to_dict.return_value = {'id': 'p1', 'name': 'Chemia'}
+    assert (await RepozytoriumPrzedmiotow.pobierz_przedmiot_z_katalogu("p1"))['name'] == 'Chemia'
+
+    await RepozytoriumPrzedmiotow.usun_przedmiot("p1")
+    referencje['subjects/p1'].get.return_value.exists = False
+    assert await RepozytoriumPrzedmiotow.pobierz_przedmiot_z_katalogu("p1") is None
+    assert referencje['subjects/p1'].get.call_count == 3
@@ -1,7 +1,10 @@
+import httpx
 import pytest
 from fastapi import status
 from unittest.mock import MagicMock, AsyncMock, patch
+from app.modele.ocena import OcenaTworzenie, StatystykiOcen
 from app.modele.przedmiot import Przedmiot, PrzedmiotTworzenie
+from app.repozytoria.ocena import RepozytoriumOcen
 from app.serwisy.przedmiot import SerwisPrzedmiotow
 from app.routery.przedmiot import router as przedmiot_router
 from main import app
@@ -46,44 +49,44 @@ def test_pobierz_wszystkie_przedmioty_blad_serwera(mock_pobierz_wszystkie, async
     mock_pobierz_wszystkie.assert_called_once()
 
 
-@patch.object(SerwisPrzedmiotow, 'pobierz_przedmiot_po_id')
-def test_pobierz_przedmiot_sukces(mock_pobierz_przedmiot_po_id, async_client):
+@patch.object(SerwisPrzedmiotow, 'pobierz_przedmiot_z_wersja')
+def test_pobierz_przedmiot_sukces(mock_pobierz_przedmiot, async_client):
     """Testuje pomyślne pobranie konkretnego przedmiotu."""
     przedmiot_id = "abc123xyz"
     oczekiwany_przedmiot = {"przedmiotId": przedmiot_id, "nazwa": "Historia", "opis": "Średniowiecze"}
-    mock_pobierz_przedmiot_po_id.return_value = oczekiwany_przedmiot
+    mock_pobierz_przedmiot.return_value = (oczekiwany_przedmiot, None)
 
     response = async_client.get(f"/przedmioty/{przedmiot_id}")
 
     assert response.status_code == status.HTTP_200_OK
     assert response.json() == oczekiwany_przedmiot
-    mock_pobierz_przedmiot_po_id.assert_called_once_with(przedmiot_id)
+    mock_pobierz_przedmiot.assert_called_once_with(przedmiot_id)
 
 
-@patch.object(SerwisPrzedmiotow, 'pobierz_przedmiot_po_id')
-def test_pobierz_przedmiot_nie_znaleziono(mock_pobierz_przedmiot_po_id, async_client):
+@patch.object(SerwisPrzedmiotow, 'pobierz_przedmiot_z_wersja')
+def test_pobierz_przedmiot_nie_znaleziono(mock_pobierz_przedmiot, async_client):
     """Testuje pobranie przedmiotu, który nie został znaleziony."""
     przedmiot_id = "non_existent_id"
-    mock_pobierz_przedmiot_po_id.return_value = None
+    mock_pobierz_przedmiot.return_value = (None, None)
 
     response = async_client.get(f"/przedmioty/{przedmiot_id}")
 
     assert response.status_code == status.HTTP_404_NOT_FOUND
     assert f"Przedmiot o ID {przedmiot_id} nie został znaleziony" in response.json()["detail"]
-    mock_pobierz_przedmiot_po_id.assert_called_once_with(przedmiot_id)
+    mock_pobierz_przedmiot.assert_called_once_with(przedmiot_id)
 
 
-@patch.object(SerwisPrzedmiotow, 'pobierz_przedmiot_po_id')
-def test_pobierz_przedmiot_blad_serwera(mock_pobierz_przedmiot_po_id, async_client):
+@patch.object(SerwisPrzedmiotow, 'pobierz_przedmiot_z_wersja')
+def test_pobierz_przedmiot_blad_serwera(mock_pobierz_przedmiot, async_client):
     """Testuje błąd serwera podczas pobierania konkretnego przedmiotu."""
     przedmiot_id = "error_id"
-    mock_pobierz_przedmiot_po_id.side_effect = Exception("Błąd DB")
+    mock_pobierz_przedmiot.side_effect = Exception("Błąd DB")
 
     response = async_client.get(f"/przedmioty/{przedmiot_id}")
 
     assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
     assert "Błąd podczas pobierania przedmiotu" in response.json()["detail"]
-    mock_pobierz_przedmiot_po_id.assert_called_once_with(przedmiot_id)
+    mock_pobierz_przedmiot.assert_called_once_with(przedmiot_id)
 
 
 @patch.object(SerwisPrzedmiotow, 'utworz_przedmiot')
@@ -172,6 +175,24 @@ def test_aktualizuj_przedmiot_nie_istnieje(mock_aktualizuj_przedmiot, async_clie
     )
 
 
+@patch.object(SerwisPrzedmiotow, 'aktualizuj_przedmiot')
+def test_aktualizuj_przedmiot_puste_dane(mock_aktualizuj_przedmiot, async_client):
+    """Testuje aktualizację przedmiotu bez żadnych pól."""
+    response = async_client.put("/przedmioty/p1", json={})
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    mock_aktualizuj_przedmiot.assert_not_called()
+
+
+@patch.object(SerwisPrzedmiotow, 'aktualizuj_przedmiot')
+def test_aktualizuj_przedmiot_nieprawidlowe_dane(mock_aktualizuj_przedmiot, async_client):
+    """Testuje aktualizację przedmiotu z polem niebędącym tekstem."""
+    response = async_client.put("/przedmioty/p1", json={"nazwa": ["Fizyka"]})
+
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    mock_aktualizuj_przedmiot.assert_not_called()
+
+
 @patch.object(SerwisPrzedmiotow, 'usun_przedmiot')
 def test_usun_przedmiot_sukces(mock_usun_przedmiot, async_client):
     """Testuje pomyślne usunięcie przedmiotu."""
@@ -208,4 +229,83 @@ def test_usun_przedmiot_blad_serwera(mock_usun_przedmiot, async_client):
 
     assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
     assert "Błąd podczas usuwania przedmiotu" in response.json()["detail"]
-    mock_usun_przedmiot.assert_called_once_with(przedmiot_id)
\ No newline at end of file
+    mock_usun_przedmiot.assert_called_once_with(przedmiot_id)
+
+
+@patch.object(SerwisPrzedmiotow, 'pobierz_statystyki_przedmiotu', new_callable=AsyncMock)
+def test_pobierz_statystyki_przedmiotu_sukces(mock_statystyki, async_client):
+    """Testuje pobranie statystyk ocen przedmiotu."""
+    mock_statystyki.return_value = StatystykiOcen(liczbaOcen=1, srednia=5.0, mediana=5.0)
+
+    response = async_client.get("/przedmioty/p1/statystyki")
+
+    assert response.status_code == 200
+    assert response.json()["liczbaOcen"] == 1
+    mock_statystyki.assert_called_once_with("p1")
+
+@patch.object(SerwisPrzedmiotow, 'pobierz_statystyki_przedmiotu', new_callable=AsyncMock)
+def test_pobierz_statystyki_przedmiotu_nie_istnieje(mock_statystyki, async_client):
+    """Testuje statystyki nieistniejącego przedmiotu."""
+    mock_statystyki.return_value = None
+
+    response = async_client.get("/przedmioty/brak/statystyki")
+
+    assert response.status_code == 404
+
+
+async def zapisz_przedmiot_z_ocena(db):
+    """Zapisuje przedmiot p1 z grupą g1 i oceną studenta s1 wraz z jego kartą ocen."""
+    await db.collection('subjects').document('p1').set(
+        {'id': 'p1', 'name': 'Analiza', 'description': 'Opis'}
+    )
+    await db.collection('groups').document('g1').set(
+        {'id': 'g1', 'name': 'g1', 'subjectId': 'p1', 'lecturerId': 'w1', 'studentsIds': ['s1']}
+    )
+    await RepozytoriumOcen.utworz_oceny_hurtowo([
+        OcenaTworzenie(studentId='s1', grupaId='g1', wystawionePrzez='w1', wartoscOceny='4')
+    ])
+
+
+@pytest.mark.asyncio
+async def test_zmiana_nazwy_przedmiotu_aktualizuje_karty_ocen(baza_z_pomiarem):
+    """Testuje, że zmiana nazwy przedmiotu przez API nadpisuje ją w kartach ocen studentów."""
+    await zapisz_przedmiot_z_ocena(baza_z_pomiarem)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as klient:
+        przed = await klient.get("/oceny/studenci/s1/karta")
+        response = await klient.put("/przedmioty/p1", json={"nazwa": "Analiza II"})
+        po = await klient.get("/oceny/studenci/s1/karta")
+
+    assert [wpis["subjectName"] for wpis in przed.json()["entries"]] == ["Analiza"]
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["updated_data"]["name"] == "Analiza II"
+    assert response.json()["updated_data"]["description"] == "Opis"
+    assert [wpis["subjectName"] for wpis in po.json()["entries"]] == ["Analiza II"]
+
+
+@pytest.mark.asyncio
+async def test_aktualizuj_nieistniejacy_przedmiot_przez_api(baza_z_pomiarem):
+    """Testuje, że aktualizacja nieistniejącego przedmiotu daje 404, a nie błąd serwera."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as klient:
+        response = await klient.put("/przedmioty/brak", json={"nazwa": "X"})
+
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_zmiana_nazwy_przedmiotu_uniewaznia_katalog(baza_z_pomiarem):
+    """Testuje, że po zmianie nazwy przez API lista i katalog przedmiotów podają nową nazwę."""
+    await zapisz_przedmiot_z_ocena(baza_z_pomiarem)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as klient:
+        lista_przed = await klient.get("/przedmioty/")
+        karta_przed = await klient.post("/oceny/studenci/s1/karta/przelicz")
+        await klient.put("/przedmioty/p1", json={"nazwa": "Analiza II"})
+        lista_po = await klient.get("/przedmioty/")
+        karta_po = await klient.post("/oceny/studenci/s1/karta/przelicz")
+
+    assert [przedmiot["name"] for przedmiot in lista_przed.json()] == ["Analiza"]
+    assert [wpis["subjectName"] for wpis in karta_przed.json()["entries"]] == ["Analiza"]
+    assert [przedmiot["name"] for przedmiot in lista_po.json()] == ["Analiza II"]
+    assert [wpis["subjectName"] for wpis in karta_po.json()["entries"]] == ["Analiza II"]
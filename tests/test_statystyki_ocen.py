@@ -0,0 +1,46 @@
+import pytest
+
+from app.serwisy.statystyki_ocen import na_tablice_liczb, oblicz_statystyki_ocen
+
+
+def test_na_tablice_liczb_z_przecinkiem_i_tekstem():
+    """Testuje parsowanie ocen z przecinkiem dziesiętnym i ocen nieliczbowych."""
+    liczby = na_tablice_liczb(["4,5", "3.0", "zal"])
+
+    assert liczby[0] == 4.5
+    assert liczby[1] == 3.0
+    assert liczby[2] != liczby[2]
+
+
+def test_oblicz_statystyki_ocen():
+    """Testuje średnią, medianę, percentyle, histogram i odsetek zaliczonych."""
+    statystyki = oblicz_statystyki_ocen(["2.0", "3.0", "3.0", "4.5", "5.0", "nb"])
+
+    assert statystyki.liczbaOcen == 6
+    assert statystyki.liczbaNieliczbowych == 1
+    assert statystyki.srednia == pytest.approx(3.5)
+    assert statystyki.mediana == 3.0
+    assert statystyki.percentyle["p50"] == 3.0
+    assert statystyki.percentyle["p90"] == pytest.approx(4.8)
+    assert statystyki.histogram == {"2": 1, "3": 2, "4.5": 1, "5": 1}
+    assert statystyki.odsetekZaliczonych == pytest.approx(0.8)
+
+
+def test_oblicz_statystyki_pomija_wartosci_nieskonczone_i_niehaszowalne():
+    """Testuje, że "inf", "nan", listy i None nie psują statystyk ani nie zgłaszają błędu."""
+    statystyki = oblicz_statystyki_ocen(["4.0", "inf", "-inf", "nan", ["5"], {"a": 1}, None, "2"])
+
+    assert statystyki.liczbaOcen == 8
+    assert statystyki.liczbaNieliczbowych == 6
+    assert statystyki.srednia == pytest.approx(3.0)
+    assert statystyki.histogram == {"2": 1, "4": 1}
+    assert statystyki.odsetekZaliczonych == pytest.approx(0.5)
+
+
+def test_oblicz_statystyki_brak_ocen():
+    """Testuje statystyki pustej listy ocen."""
+    statystyki = oblicz_statystyki_ocen([])
+
+    assert statystyki.liczbaOcen == 0
+    assert statystyki.srednia is None
+    assert statystyki.histogram == {}
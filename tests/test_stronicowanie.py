@@ -0,0 +1,87 @@
+import pytest
+from unittest.mock import MagicMock
+
+from google.cloud.firestore_v1.field_path import FieldPath
+
+from app.repozytoria.stronicowanie import (
+    odkoduj_kursor, pobierz_strone, zakoduj_kursor, zastosuj_projekcje
+)
+
+from .conftest import mock_async_iterator
+
+
+def _mock_doc(doc_id):
+    return MagicMock(id=doc_id, to_dict=MagicMock(return_value={"id": doc_id}))
+
+
+def test_kursor_round_trip():
+    """Testuje, że kursor odtwarza ID dokumentu."""
+    kursor = zakoduj_kursor("grupa_123")
+
+    assert "grupa_123" not in kursor
+    assert odkoduj_kursor(kursor) == "grupa_123"
+
+
+@pytest.mark.parametrize("kursor", ["@@@", zakoduj_kursor("a/b"), ""])
+def test_odkoduj_nieprawidlowy_kursor(kursor):
+    """Testuje odrzucenie uszkodzonego kursora."""
+    with pytest.raises(ValueError, match="Nieprawidłowy kursor stronicowania"):
+        odkoduj_kursor(kursor)
+
+
+@pytest.mark.asyncio
+async def test_pobierz_strone_pelna_zwraca_kursor():
+    """Testuje pobranie pełnej strony wraz z kursorem następnej."""
+    zapytanie = MagicMock()
+    uporzadkowane = zapytanie.order_by.return_value
+    uporzadkowane.limit.return_value.stream = MagicMock(
+        return_value=mock_async_iterator([_mock_doc("a"), _mock_doc("b")])
+    )
+
+    elementy, nastepna = await pobierz_strone(zapytanie, 2)
+
+    assert elementy == [{"id": "a"}, {"id": "b"}]
+    assert odkoduj_kursor(nastepna) == "b"
+    zapytanie.order_by.assert_called_once_with(FieldPath.document_id())
+    uporzadkowane.start_after.assert_not_called()
+    uporzadkowane.limit.assert_called_once_with(2)
+
+
+@pytest.mark.asyncio
+async def test_pobierz_strone_po_kursorze_ostatnia_strona():
+    """Testuje kontynuację po kursorze i brak kursora na niepełnej stronie."""
+    zapytanie = MagicMock()
+    po_kursorze = zapytanie.order_by.return_value.start_after.return_value
+    po_kursorze.limit.return_value.stream = MagicMock(
+        return_value=mock_async_iterator([_mock_doc("c")])
+    )
+
+    elementy, nastepna = await pobierz_strone(zapytanie, 2, zakoduj_kursor("b"))
+
+    assert elementy == [{"id": "c"}]
+    assert nastepna is None
+    zapytanie.order_by.return_value.start_after.assert_called_once_with(
+        {FieldPath.document_id(): "b"}
+    )
+
+
+def test_zastosuj_projekcje():
+    """Testuje, że projekcja trafia do select() tylko, gdy podano pola."""
+    zapytanie = MagicMock()
+
+    assert zastosuj_projekcje(zapytanie, None) is zapytanie
+    assert zastosuj_projekcje(zapytanie, ["name"]) is zapytanie.select.return_value
+    zapytanie.select.assert_called_once_with(["name"])
+
+
+@pytest.mark.asyncio
+async def test_pobierz_strone_z_projekcja():
+    """Testuje stronicowanie zapytania ograniczonego do wybranych pól."""
+    kolekcja = MagicMock()
+    zapytanie = kolekcja.select.return_value.order_by.return_value
+    zapytanie.limit.return_value.stream.return_value = mock_async_iterator([_mock_doc("a")])
+
+    elementy, _ = await pobierz_strone(zastosuj_projekcje(kolekcja, ["id"]), 10)
+
+    assert elementy == [{"id": "a"}]
+    kolekcja.select.assert_called_once_with(["id"])
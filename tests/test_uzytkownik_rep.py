@@ -92,12 +92,14 @@ async def test_pobierz_uzytkownika_po_id_nie_istnieje(mock_db):
 @pytest.mark.asyncio
 async def test_pobierz_wszystkich_uzytkownikow_sukces(mock_db):
     """Testuje pomyślne pobranie wszystkich użytkowników."""
-    from tests.conftest import mock_iterator
+    from tests.conftest import mock_async_iterator
 
     mock_doc1 = MagicMock(to_dict=MagicMock(return_value={"uid": "u1", "name": "User A"}))
     mock_doc2 = MagicMock(to_dict=MagicMock(return_value={"uid": "u2", "name": "User B"}))
 
-    mock_db.collection.return_value.stream.return_value = mock_iterator([mock_doc1, mock_doc2])
+    mock_db.collection.return_value.stream.return_value = mock_async_iterator(
+        [mock_doc1, mock_doc2]
+    )
 
     wynik = await RepozytoriumUzytkownikow.pobierz_wszystkich_uzytkownikow()
 
@@ -108,12 +110,28 @@ async def test_pobierz_wszystkich_uzytkownikow_sukces(mock_db):
     mock_db.collection.return_value.stream.assert_called_once()
 
 
+@pytest.mark.asyncio
+async def test_pobierz_wszystkich_uzytkownikow_wybrane_pola(mock_db):
+    """Testuje przekazanie projekcji pól do select() w Firestore."""
+    from tests.conftest import mock_async_iterator
+
+    mock_doc = MagicMock(to_dict=MagicMock(return_value={"name": "User A"}))
+    zapytanie = mock_db.collection.return_value.select.return_value
+    zapytanie.stream.return_value = mock_async_iterator([mock_doc])
+
+    wynik = await RepozytoriumUzytkownikow.pobierz_wszystkich_uzytkownikow(["name"])
+
+    assert wynik == [{"name": "User A"}]
+    mock_db.collection.return_value.select.assert_called_once_with(["name"])
+    mock_db.collection.return_value.stream.assert_not_called()
+
+
 @pytest.mark.asyncio
 async def test_pobierz_wszystkich_uzytkownikow_brak_danych(mock_db):
     """Testuje pobranie wszystkich użytkowników, gdy nie ma żadnych."""
-    from tests.conftest import mock_iterator
+    from tests.conftest import mock_async_iterator
 
-    mock_db.collection.return_value.stream.return_value = mock_iterator([])
+    mock_db.collection.return_value.stream.return_value = mock_async_iterator([])
 
     wynik = await RepozytoriumUzytkownikow.pobierz_wszystkich_uzytkownikow()
 
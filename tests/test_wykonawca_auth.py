@@ -0,0 +1,57 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.konfiguracja.wykonawca_auth import WykonawcaAuth
+
+
+@pytest.mark.asyncio
+async def test_wykonaj_uruchamia_funkcje_poza_petla():
+    """Testuje, że wywołanie trafia do wątku puli i zwraca wynik."""
+    wykonawca = WykonawcaAuth(maks_watkow=2)
+
+    wynik = await wykonawca.wykonaj(lambda a, b=0: (threading.current_thread().name, a + b), 1, b=2)
+
+    assert wynik[0].startswith("firebase-auth")
+    assert wynik[1] == 3
+    metryki = wykonawca.metryki()
+    assert metryki['zakonczone'] == 1
+    assert metryki['bledy'] == 0
+    assert metryki['w_kolejce'] == 0
+    assert metryki['w_toku'] == 0
+
+
+@pytest.mark.asyncio
+async def test_wykonaj_przekazuje_wyjatek_i_liczy_blad():
+    """Testuje propagację wyjątku z wątku puli."""
+    wykonawca = WykonawcaAuth(maks_watkow=1)
+
+    def zawodzi():
+        raise ValueError("auth niedostępny")
+
+    with pytest.raises(ValueError, match="auth niedostępny"):
+        await wykonawca.wykonaj(zawodzi)
+
+    assert wykonawca.metryki()['bledy'] == 1
+
+
+@pytest.mark.asyncio
+async def test_wykonaj_ogranicza_liczbe_watkow():
+    """Testuje, że równoległe wywołania nie przekraczają rozmiaru puli."""
+    wykonawca = WykonawcaAuth(maks_watkow=2)
+    blokada = threading.Lock()
+    aktywne = [0, 0]
+
+    def zadanie():
+        with blokada:
+            aktywne[0] += 1
+            aktywne[1] = max(aktywne[1], aktywne[0])
+        threading.Event().wait(0.02)
+        with blokada:
+            aktywne[0] -= 1
+
+    await asyncio.gather(*(wykonawca.wykonaj(zadanie) for _ in range(6)))
+
+    assert aktywne[1] <= 2
+    assert wykonawca.metryki()['zakonczone'] == 6